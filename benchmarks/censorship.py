@@ -0,0 +1,62 @@
+# Замер стоимости проверки одного сообщения фильтром цензуры в зависимости от размера словаря.
+# Запуск: python benchmarks/censorship.py [--messages N]
+# Сравнивает автомат Ахо-Корасик с наивной проверкой "слово in текст" для каждого слова.
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bot.censorship import AhoCorasick, normalize  # noqa: E402
+
+SIZES = (100, 1_000, 10_000, 50_000)
+ALPHABET = string.ascii_lowercase + "абвгдеёжзийклмнопрстуфхцчшщъыьэюяіїє"
+
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choice(ALPHABET) for _ in range(rng.randint(4, 10)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк фильтра цензуры")
+    parser.add_argument("--messages", type=int, default=2_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    messages = [" ".join(random_word(rng) for _ in range(rng.randint(3, 25))) for _ in range(args.messages)]
+    normalized = [normalize(message) for message in messages]
+
+    started = time.perf_counter()
+    for message in messages:
+        normalize(message)
+    normalize_us = (time.perf_counter() - started) / len(messages) * 1e6
+    print(f"Нормализация: {normalize_us:.1f} мкс/сообщение")
+    print(f"{'слов':>8} {'сборка, мс':>12} {'автомат, мкс':>14} {'наивно, мкс':>13}")
+
+    for size in SIZES:
+        words = sorted({normalize(random_word(rng)) for _ in range(size)})
+        started = time.perf_counter()
+        automaton = AhoCorasick((word, False) for word in words)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        for text in normalized:
+            automaton.find(text)
+        automaton_us = (time.perf_counter() - started) / len(normalized) * 1e6
+
+        # Наивный вариант слишком медленный на больших словарях — меряем на части сообщений
+        sample = normalized[:max(1, len(normalized) * 100 // size)]
+        started = time.perf_counter()
+        for text in sample:
+            any(word in text for word in words)
+        naive_us = (time.perf_counter() - started) / len(sample) * 1e6
+
+        print(f"{size:>8} {build_ms:>12.1f} {automaton_us:>14.1f} {naive_us:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
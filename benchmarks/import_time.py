@@ -0,0 +1,71 @@
+# Замер холодного старта: импорт bot.core и создание реестра команд в чистом процессе.
+# Запуск: python benchmarks/import_time.py [--runs N] [--module bot.core] [--max-ms 200]
+# Выводит медиану и максимум по N запускам, а также самые тяжёлые импорты (python -X importtime).
+# С --max-ms завершается с кодом 1, если медиана превышает бюджет (для CI).
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("ADMIN_ID", "1")
+    env["PYTHONPATH"] = str(ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def measure(module: str, runs: int):
+    """Время (мс) запуска процесса с импортом модуля минус время пустого процесса."""
+    def run(code):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT, env=_env(),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return (time.perf_counter() - started) * 1000
+
+    baseline = statistics.median(run("pass") for _ in range(runs))
+    samples = [run(f"import {module}") - baseline for _ in range(runs)]
+    return samples
+
+
+def heaviest_imports(module: str, top: int = 10):
+    """Самые тяжёлые модули по суммарному времени импорта (мкс)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True, cwd=ROOT, env=_env())
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер холодного старта: время импорта модуля в чистом процессе")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--module", default="bot.core")
+    parser.add_argument("--max-ms", type=float, help="бюджет медианы, мс: при превышении код выхода 1")
+    args = parser.parse_args()
+
+    samples = measure(args.module, args.runs)
+    median = statistics.median(samples)
+    print(f"import {args.module}: медиана {median:.1f} мс, "
+          f"максимум {max(samples):.1f} мс ({args.runs} запусков)")
+    print("Самые тяжёлые импорты (cumulative, мс):")
+    for cumulative_us, name in heaviest_imports(args.module):
+        print(f"  {cumulative_us / 1000:8.1f}  {name.strip()}")
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"Бюджет превышен: {median:.1f} мс > {args.max_ms:g} мс")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
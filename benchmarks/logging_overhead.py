@@ -0,0 +1,84 @@
+# Замер стоимости логирования одного сообщения в вызывающем потоке.
+# Запуск: python benchmarks/logging_overhead.py [--messages N]
+# Сравнивает прежнюю схему (два файловых обработчика на bot.log, запись прямо в потоке)
+# с очередью (QueueHandler + QueueListener из bot.logger). На каждое сообщение — две записи,
+# как в log_command и LoggingHandler.
+
+import argparse
+import logging
+import os
+import queue
+import statistics
+import sys
+import tempfile
+import time
+from logging.handlers import QueueListener, RotatingFileHandler
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("ADMIN_ID", "1")
+os.environ.setdefault("LOG_CONSOLE", "false")
+
+from bot.logger import LOG_FORMAT, DATE_FORMAT, SamplingFilter, _FastQueueHandler  # noqa: E402
+
+
+def measure(logger: logging.Logger, messages: int):
+    """Время на сообщение (две записи) в микросекундах: медиана и p99."""
+    samples = []
+    clock = time.perf_counter
+    for i in range(messages):
+        started = clock()
+        logger.info(f"Команда от user={i} в chat={i}: '/currency USD'")
+        logger.info(f"[Request] user={i}, chat={i}, text=/currency USD")
+        samples.append((clock() - started) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def file_handler(path: str, rotating: bool) -> logging.Handler:
+    handler = (RotatingFileHandler(path, maxBytes=1_000_000, backupCount=5, encoding="utf-8")
+               if rotating else logging.FileHandler(path, encoding="utf-8"))
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
+    return handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк накладных расходов логирования")
+    parser.add_argument("--messages", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bot.log")
+
+        legacy = logging.getLogger("bench.legacy")
+        legacy.propagate = False
+        legacy.setLevel(logging.INFO)
+        legacy.addHandler(file_handler(path, rotating=True))
+        legacy.addHandler(file_handler(path, rotating=False))
+
+        log_queue = queue.SimpleQueue()
+        queued = logging.getLogger("bench.queued")
+        queued.propagate = False
+        queued.setLevel(logging.INFO)
+        queued.addHandler(_FastQueueHandler(log_queue))
+        listener = QueueListener(log_queue, file_handler(path + ".q", rotating=True))
+        listener.start()
+
+        sampled = logging.getLogger("bench.sampled")
+        sampled.propagate = False
+        sampled.setLevel(logging.INFO)
+        sampled_handler = _FastQueueHandler(log_queue)
+        sampled_handler.addFilter(SamplingFilter({"bench.sampled": 0.1}))
+        sampled.addHandler(sampled_handler)
+
+        print(f"{'схема':<32} {'медиана, мкс':>13} {'p99, мкс':>10}")
+        for title, logger in (("два файловых обработчика", legacy),
+                              ("очередь + фоновая запись", queued),
+                              ("очередь + выборка 10%", sampled)):
+            median, p99 = measure(logger, args.messages)
+            print(f"{title:<32} {median:>13.1f} {p99:>10.1f}")
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Замер стоимости одного наблюдения метрики (bot/metrics.py).
+# Запуск: python benchmarks/metrics_overhead.py [--observations N]
+# Сравнивает наблюдение в заранее полученную гистограмму (как в конвейере middleware),
+# наблюдение с поиском по метке (как в handle_message) и инкремент счётчика.
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("ADMIN_ID", "1")
+os.environ.setdefault("LOG_CONSOLE", "false")
+
+from bot.metrics import MetricsRegistry  # noqa: E402
+
+
+def measure(func, observations: int) -> float:
+    """Среднее время одного вызова в микросекундах (лучший из трёх прогонов)."""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(observations):
+            func()
+        best = min(best, (time.perf_counter() - started) / observations * 1e6)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк накладных расходов метрик")
+    parser.add_argument("--observations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    metrics = MetricsRegistry()
+    family = metrics.histogram("bench_seconds", "Бенчмарк", "command")
+    histogram = family.labels("/currency")
+    counter = metrics.counter("bench_total", "Бенчмарк", "command").labels("/currency")
+
+    print(f"{'операция':<36} {'мкс':>8}")
+    for title, func in (("observe (гистограмма получена)", lambda: histogram.observe(0.0042)),
+                        ("labels(...).observe", lambda: family.labels("/currency").observe(0.0042)),
+                        ("counter.inc", counter.inc)):
+        print(f"{title:<36} {measure(func, args.observations):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
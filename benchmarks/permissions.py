@@ -0,0 +1,69 @@
+# Замер проверки прав (check_command_access): линейный поиск по users_dict против PermissionIndex.
+# Запуск: python benchmarks/permissions.py [--checks N]
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bot.roles.permission_index import PermissionIndex  # noqa: E402
+
+SIZES = (100, 10_000, 100_000)
+COMMANDS = {'/shutdown': ['admin'], '/full_menu': ['moderator', 'admin'], '/dice': ['moderator', 'admin']}
+
+
+def legacy_check_command_access(command, user_id, users_dict, commands_dict):
+    """Прежняя реализация bot/roles/role_helper.check_command_access."""
+    if command not in commands_dict:
+        return True
+    user_role = None
+    for role, user_list in users_dict.items():
+        if int(user_id) in user_list:
+            user_role = role
+            break
+    if user_role is None:
+        return "Access denied: your role is not assigned"
+    allowed_roles = commands_dict[command]
+    if user_role in allowed_roles:
+        return True
+    else:
+        return f"Access denied: role '{user_role}' does not have access to '{command}'"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк проверки прав")
+    parser.add_argument("--checks", type=int, default=20_000)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    print(f"{'участников':>11} {'прежняя, мкс':>13} {'индекс, мкс':>12}")
+    for size in SIZES:
+        members = rng.sample(range(10 * size), size)
+        roles = ['moderator', 'admin', 'seller', 'buyer']
+        users = {role: members[i::len(roles)] for i, role in enumerate(roles)}
+        index = PermissionIndex.from_dicts(users, COMMANDS)
+        # Проверки для случайных участников и посторонних, по защищённым командам
+        queries = [(rng.choice(list(COMMANDS)), rng.choice(members) if rng.random() < 0.8 else -1)
+                   for _ in range(args.checks)]
+
+        legacy_queries = queries[:max(100, args.checks * 100 // size)]
+        started = time.perf_counter()
+        for command, uid in legacy_queries:
+            legacy_check_command_access(command, uid, users, COMMANDS)
+        legacy_us = (time.perf_counter() - started) / len(legacy_queries) * 1e6
+
+        started = time.perf_counter()
+        for command, uid in queries:
+            index.check(command, uid)
+        index_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+        for command, uid in legacy_queries[:200]:
+            assert (legacy_check_command_access(command, uid, users, COMMANDS) is True) == (index.check(command, uid) is True)
+        print(f"{size:>11} {legacy_us:>13.2f} {index_us:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
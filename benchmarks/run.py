@@ -0,0 +1,274 @@
+# Набор микробенчмарков горячего пути обработки сообщения.
+# Запуск: python benchmarks/run.py [--quick] [--filter ПОДСТРОКА] [--output results.json]
+#                                  [--baseline benchmarks/baseline.json] [--tolerance 0.3] [--update-baseline]
+# Что делает:
+# - Работает офлайн: Bot API не вызывается, CurrencyHelper получает курсы от заглушки транспорта.
+# - Для каждого случая считает ns/op и ops/s (лучший из нескольких прогонов, число повторов
+#   подбирается автоматически) и память: пик выделений за одну операцию (tracemalloc) и
+#   блоки, оставшиеся после операции (признак утечки). Счётчика отдельных выделений CPython
+#   не даёт, поэтому вместо него — пик байт.
+# - Печатает таблицу, пишет JSON (--output) и сравнивает ns/op с сохранённым базовым файлом:
+#   если случай медленнее базового больше чем на --tolerance, процесс завершается с кодом 1.
+# Базовый файл зависит от машины: после смены железа или Python его нужно обновить (--update-baseline).
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Окружение задаётся до импорта бота: bot/config.py читает его при импорте
+_LOG_DIR = tempfile.mkdtemp(prefix="bot-bench-")
+os.environ.setdefault("ADMIN_ID", "1")
+os.environ.setdefault("LOG_CONSOLE", "false")
+os.environ["LOG_FILE"] = os.path.join(_LOG_DIR, "bot.log")
+os.environ["SEND_QUEUE_ENABLED"] = "false"
+os.environ["CENSORSHIP_RELOAD_INTERVAL"] = "0"
+os.environ.setdefault("CURRENCY_API_URL", "http://currency.invalid")
+os.environ.setdefault("CURRENCY_API_KEY", "bench")
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Зарегистрированные случаи: имя -> фабрика, которая готовит окружение и возвращает замеряемую функцию
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {}
+
+
+def case(name: str):
+    """Регистрирует фабрику случая под именем `name`."""
+    def register(factory):
+        CASES[name] = factory
+        return factory
+    return register
+
+
+class _StubResponse:
+    def __init__(self, data: dict):
+        self._data = data
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> dict:
+        return self._data
+
+
+class StubCurrencyTransport:
+    """Заглушка HTTP-транспорта для CurrencyHelper: отвечает фиксированными котировками."""
+
+    QUOTES = {"USDEUR": 0.92, "USDUAH": 41.2, "USDGBP": 0.79, "USDPLN": 3.98, "USDJPY": 151.3}
+
+    def get(self, url: str, params=None, **kwargs) -> _StubResponse:
+        endpoint = url.rsplit("/", 1)[-1]
+        if endpoint == "live":
+            return _StubResponse({"success": True, "source": "USD", "quotes": self.QUOTES})
+        return _StubResponse({"success": False, "error": {"info": f"{endpoint} недоступен в бенчмарке"}})
+
+
+def _bot():
+    from bot.core import TelegramBot
+    from bot.transport import HttpTransport
+    TelegramBot._instance = None
+    return TelegramBot("BENCH", transport=HttpTransport(retries=0), api_url="http://127.0.0.1:9/bot")
+
+
+@case("factory.create_command")
+def _factory():
+    from bot.factories import CommandFactory
+    CommandFactory.create_command("/help")  # первый вызов импортирует модуль и создаёт экземпляр
+    return lambda: CommandFactory.create_command("/help")
+
+
+def _permissions(size: int):
+    import random
+    from bot.roles import role_helper
+    from bot.roles.commands import commands_dict
+    from bot.roles.permission_index import PermissionIndex
+
+    rng = random.Random(size)
+    members = rng.sample(range(10 * size), size)
+    roles = ["moderator", "admin", "seller", "buyer"]
+    users = {role: members[i::len(roles)] for i, role in enumerate(roles)}
+    role_helper.permission_index = PermissionIndex.from_dicts(users, commands_dict)
+    command = next(iter(commands_dict))
+    user_id = members[-1]
+    return lambda: role_helper.check_command_access(command, user_id)
+
+
+for _size in (10, 1_000, 100_000):
+    case(f"permissions.check_command_access[{_size}]")(lambda size=_size: _permissions(size))
+
+
+@case("pipeline.censorship+logging")
+def _pipeline():
+    from bot.handlers import CensorshipHandler, LoggingHandler
+    from bot.message import ParsedMessage
+    from bot.middleware import MiddlewarePipeline
+    pipeline = MiddlewarePipeline([CensorshipHandler(), LoggingHandler()])
+    message = ParsedMessage.parse("/currency1 10 USD to EUR пожалуйста, посчитайте побыстрее")
+    return lambda: pipeline.run(message, 100, 2)
+
+
+@case("decorators.route_message")
+def _decorators():
+    from bot.message import ParsedMessage
+    bot = _bot()
+    message = ParsedMessage.parse("/help")
+    # log_command + require_auth вокруг маршрутизации; конвейер замеряется отдельным случаем
+    return lambda: bot.route_message("/help", 100, 2, message=message, run_pipeline=False)
+
+
+@case("core.handle_message[/help]")
+def _handle_message():
+    bot = _bot()
+    return lambda: bot.handle_message("/help", 100, 2)
+
+
+@case("currency1.parse+convert")
+def _currency1():
+    from bot.commands.command_currency1 import Currency1Strategy
+    from bot.helper.currency_helper import CurrencyHelper
+    from bot.message import ParsedMessage
+
+    helper = CurrencyHelper(transport=StubCurrencyTransport(), background_refresh=False, history_dir="")
+    helper.currencies = {code[3:]: code[3:] for code in StubCurrencyTransport.QUOTES} | {"USD": "USD"}
+    CurrencyHelper._shared = helper
+    strategy = Currency1Strategy()
+    text = "/currency1 10 USD to EUR"
+    message = ParsedMessage.parse(text)
+    assert "EUR" in strategy.handle(text, 100, 2, message=message)
+    return lambda: strategy.handle(text, 100, 2, message=message)
+
+
+@case("help_menu.render")
+def _help_menu():
+    from bot.commands.help_menu import HelpMenuStrategy
+    strategy = HelpMenuStrategy()
+    return lambda: strategy.handle("/help", 100, 2)
+
+
+def measure(func: Callable[[], object], min_time: float, repeats: int) -> Dict[str, float]:
+    """ns/op и ops/s (лучший прогон), пик выделений за операцию и оставшиеся блоки."""
+    # Подбираем число вызовов в прогоне так, чтобы он длился не меньше min_time
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - started >= min_time:
+            break
+        number *= 2
+
+    best = float("inf")
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            best = min(best, (time.perf_counter() - started) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Память замеряется отдельно: tracemalloc замедляет код в разы
+    tracemalloc.start()
+    peaks = []
+    for _ in range(20):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    # Оставшиеся блоки шумят у случаев с логированием: записи ещё лежат в очереди фонового потока
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    for _ in range(1000):
+        func()
+    gc.collect()
+    retained = (sys.getallocatedblocks() - blocks_before) / 1000
+
+    return {
+        "ns_per_op": round(best * 1e9, 1),
+        "ops_per_s": round(1 / best),
+        "peak_alloc_bytes": min(peaks),
+        "retained_blocks_per_op": round(retained, 3),
+        "loops": number,
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float) -> List[Tuple[str, float, float]]:
+    """Случаи, ставшие медленнее базовых больше чем на tolerance: (имя, базовое, текущее ns/op)."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base and result["ns_per_op"] > base["ns_per_op"] * (1 + tolerance):
+            regressions.append((name, base["ns_per_op"], result["ns_per_op"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки горячего пути обработки сообщения")
+    parser.add_argument("--filter", default="", help="запускать только случаи, имя которых содержит строку")
+    parser.add_argument("--quick", action="store_true", help="короткие прогоны (для проверки, не для замеров)")
+    parser.add_argument("--output", help="куда записать результаты в JSON")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument("--tolerance", type=float, default=0.3, help="допустимое замедление, доля (0.3 = 30%%)")
+    parser.add_argument("--update-baseline", action="store_true", help="сохранить результаты как базовые")
+    args = parser.parse_args()
+
+    min_time, repeats = (0.02, 3) if args.quick else (0.2, 5)
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'случай':<42} {'ns/op':>10} {'ops/s':>12} {'пик, Б':>8} {'блоков/op':>10}")
+    for name, factory in CASES.items():
+        if args.filter not in name:
+            continue
+        result = measure(factory(), min_time, repeats)
+        results[name] = result
+        print(f"{name:<42} {result['ns_per_op']:>10.0f} {result['ops_per_s']:>12.0f} "
+              f"{result['peak_alloc_bytes']:>8} {result['retained_blocks_per_op']:>10.3f}")
+
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        # Обновляем только замеренные случаи, остальные базовые значения сохраняются
+        stored = json.loads(baseline_path.read_text(encoding="utf-8")) if baseline_path.exists() else {}
+        stored.update({key: value for key, value in report.items() if key != "results"})
+        stored["results"] = {**stored.get("results", {}), **results}
+        baseline_path.write_text(json.dumps(stored, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Базовые значения записаны в {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"Базового файла {baseline_path} нет — сравнение пропущено (создать: --update-baseline)")
+        return 0
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline.get("python", "").rsplit(".", 1)[0] != report["python"].rsplit(".", 1)[0]:
+        print(f"Внимание: базовые значения сняты на Python {baseline.get('python')}, сейчас {report['python']}")
+    regressions = compare(results, baseline.get("results", {}), args.tolerance)
+    for name, base_ns, current_ns in regressions:
+        print(f"РЕГРЕССИЯ {name}: {base_ns:.0f} -> {current_ns:.0f} ns/op (+{current_ns / base_ns - 1:.0%})")
+    if regressions:
+        return 1
+    print(f"Регрессий нет (допуск {args.tolerance:.0%}, базовый файл {baseline_path})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# Асинхронный движок бота на asyncio.
+# Что делает:
+# - Получает обновления long-polling'ом (UpdatePoller) и запускает обработку каждого как отдельную задачу.
+# - Синхронные `BotCommand.execute` выполняет в пуле потоков, чтобы медленная команда
+#   (например, /currency с внешним API) не блокировала остальные чаты.
+# - Команды с нативным `async execute` (AsyncBotCommand) выполняет прямо в event loop.
+# - Ограничивает количество одновременно обрабатываемых обновлений семафором.
+
+import asyncio
+import functools
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Dict, Set
+
+from bot.config import config
+from bot.core import TelegramBot
+from bot.decorators import AuthorizationError
+from bot.factories import CommandFactory
+from bot.message import ParsedMessage, message_kwargs
+from bot.metrics import COMMAND_SECONDS, MESSAGE_SECONDS
+from bot.polling import UpdatePoller
+from bot.logger.app_logger import logger
+
+
+class AsyncTelegramBot:
+    """
+    Асинхронный движок поверх TelegramBot.
+    HTTP-запросы, цепочка обработчиков и фабрика команд переиспользуются из TelegramBot,
+    меняется только модель выполнения: каждое обновление — отдельная asyncio-задача.
+    """
+
+    def __init__(self, bot: TelegramBot,
+                 max_concurrency: Optional[int] = None,
+                 executor_workers: Optional[int] = None):
+        """
+        :param bot: Экземпляр TelegramBot (HTTP-транспорт, цепочка обработчиков, команды).
+        :param max_concurrency: Максимум одновременно обрабатываемых обновлений.
+        :param executor_workers: Размер пула потоков для синхронных команд и HTTP-запросов.
+        """
+        self.bot = bot
+        self.max_concurrency = max_concurrency or config.ASYNC_MAX_CONCURRENCY
+        self.executor = ThreadPoolExecutor(
+            max_workers=executor_workers or config.ASYNC_EXECUTOR_WORKERS,
+            thread_name_prefix="bot-exec",
+        )
+        self._tasks: Set[asyncio.Task] = set()
+        self._stop_requested = False
+
+    async def _in_executor(self, func, *args):
+        """Выполняет блокирующую функцию в пуле потоков движка."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def handle_message(self, text: str, chat_id: int, user_id: int,
+                             message: Optional[ParsedMessage] = None) -> Optional[str]:
+        """
+        Асинхронный аналог TelegramBot.handle_message, в том же порядке, что и route_message:
+        логирование и авторизация, конвейер middleware, фабрика команд.
+        Асинхронные этапы конвейера ожидаются прямо в event loop; первое создание команды
+        (импорт модуля и конструктор) и сама синхронная команда — в пуле потоков.
+        """
+        started = time.perf_counter()
+        if message is None:
+            message = ParsedMessage.parse(text)
+        self.bot.authorize(text, chat_id, user_id, message=message)
+        blocked = await self.bot.pipeline.run_async(message, chat_id, user_id)
+        command = None
+        if not blocked:
+            command = CommandFactory.command_instances.get(message.command)
+            if command is None:
+                command = await self._in_executor(CommandFactory.create_command, message.command)
+        if command is None:
+            MESSAGE_SECONDS.labels("none").observe(time.perf_counter() - started)
+            return blocked or TelegramBot.UNKNOWN_COMMAND_REPLY
+        executed = time.perf_counter()
+        kwargs = message_kwargs(command.execute, message)
+        if inspect.iscoroutinefunction(command.execute):
+            result = await command.execute(text, chat_id, user_id, **kwargs)
+        else:
+            result = await self._in_executor(functools.partial(command.execute, text, chat_id, user_id, **kwargs))
+        finished = time.perf_counter()
+        COMMAND_SECONDS.labels(message.command).observe(finished - executed)
+        MESSAGE_SECONDS.labels(message.command).observe(finished - started)
+        return result
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        """Отправляет сообщение, не блокируя event loop."""
+        await self._in_executor(self.bot.send_message, chat_id, text)
+
+    async def process_update(self, update: Dict[str, Any]) -> None:
+        """Обрабатывает одно обновление; ошибки логируются и не роняют движок."""
+        if "message" not in update or "text" not in update["message"]:
+            return
+
+        chat_id = self.bot.get_chat_id(update)
+        user_id = self.bot.get_user_id(update)
+        message_text = self.bot.get_message_text(update)
+        self.bot.record_activity(update)
+        try:
+            reply = await self.handle_message(message_text, chat_id, user_id)
+        except AuthorizationError as e:
+            reply = str(e)
+        except Exception as e:
+            logger.exception(f"Ошибка при обработке обновления {update.get('update_id')}: {e}")
+            return
+
+        if reply == TelegramBot.SHUTDOWN_COMMAND_REPLY:
+            await self.send_message(chat_id, "Бот вимикається…")
+            self.stop()
+        elif reply:
+            await self.send_message(chat_id, reply)
+
+    def stop(self) -> None:
+        """Просит цикл run() завершиться; уже запущенные задачи будут завершены."""
+        self._stop_requested = True
+
+    async def _run_limited(self, update: Dict[str, Any], semaphore: asyncio.Semaphore) -> None:
+        try:
+            await self.process_update(update)
+        finally:
+            semaphore.release()
+
+    async def run(self) -> None:
+        """
+        Главный цикл: long-polling в пуле потоков и запуск задачи на каждое обновление.
+        Когда достигнут лимит конкурентности, приём новых обновлений приостанавливается.
+        """
+        self._stop_requested = False
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        poller = UpdatePoller(
+            self.bot.get_updates,
+            timeout=config.POLL_TIMEOUT,
+            batch_size=config.POLL_BATCH_SIZE,
+            interval=config.POLL_INTERVAL,
+            max_backoff=config.POLL_MAX_BACKOFF,
+        )
+        if self.bot.last_update_id is not None:
+            poller.acknowledge(self.bot.last_update_id)
+        await self._in_executor(self.bot.prepare_polling)
+
+        logger.info(f"Запуск асинхронного long-polling (конкурентность {self.max_concurrency}).")
+        while not self._stop_requested:
+            updates = await self._in_executor(poller.poll)
+            for update in updates:
+                await semaphore.acquire()
+                task = asyncio.create_task(self._run_limited(update, semaphore))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                poller.acknowledge(update["update_id"])
+                self.bot.last_update_id = update["update_id"]
+            # Даём запущенным задачам шанс выполниться (и, возможно, запросить остановку)
+            await asyncio.sleep(0)
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.bot.outbound is not None:
+            await self._in_executor(self.bot.outbound.join, config.SEND_DRAIN_TIMEOUT)
+        await self._in_executor(poller.commit)
+        self.executor.shutdown(wait=True)
+        logger.info("Асинхронный long-polling остановлен.")
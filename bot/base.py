@@ -23,7 +23,8 @@ class BotCommand(ABC):
         :param text: Полный текст сообщения от пользователя.
         :param chat_id: ID чата, из которого пришла команда.
         :param user_id: ID пользователя, отправившего команду.
-        :param kwargs: Дополнительные именованные аргументы для гибкости.
+        :param kwargs: Дополнительные именованные аргументы для гибкости
+                       (`message` — ParsedMessage, уже разобранный текст сообщения).
         :return: Строка с ответом для пользователя или None, если ответ не требуется.
         """
         pass
@@ -43,7 +44,30 @@ class CommandStrategy(ABC):
         :param text: Полный текст сообщения от пользователя.
         :param chat_id: ID чата.
         :param user_id: ID пользователя.
-        :param kwargs: Дополнительные именованные аргументы.
+        :param kwargs: Дополнительные именованные аргументы
+                       (`message` — ParsedMessage, уже разобранный текст сообщения).
         :return: Строка с результатом выполнения или None.
         """
         pass
+
+
+# Command pattern: асинхронний варіант команди для AsyncTelegramBot
+class AsyncBotCommand(BotCommand):
+    """
+    Базовый класс для команд с нативным `async execute`.
+    AsyncTelegramBot выполняет такие команды прямо в event loop,
+    а обычные синхронные команды — в пуле потоков.
+    """
+    @abstractmethod
+    async def execute(self, text: str, chat_id: int, user_id: int, **kwargs) -> Optional[str]:
+        """
+        Асинхронно выполняет логику команды.
+        Не должен блокировать event loop (сетевые вызовы — через await).
+
+        :param text: Полный текст сообщения от пользователя.
+        :param chat_id: ID чата, из которого пришла команда.
+        :param user_id: ID пользователя, отправившего команду.
+        :param kwargs: Дополнительные именованные аргументы для гибкости.
+        :return: Строка с ответом для пользователя или None, если ответ не требуется.
+        """
+        pass
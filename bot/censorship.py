@@ -0,0 +1,182 @@
+# Фильтр нецензурной лексики на автомате Ахо-Корасик.
+# Что делает:
+# - Нормализует текст: casefold, снятие диакритики, замена похожих символов (кириллица/латиница,
+#   "leet": 0→o, @→a ...), удаление разделителей между буквами ("b.a.d", "b a d" → "bad").
+# - Компилирует все запрещённые слова в один автомат Ахо-Корасик: проверка сообщения
+#   занимает время, пропорциональное длине текста, а не размеру словаря.
+# - Загружает слова из файлов `*.txt` в папке (по слову на строку, `#` — комментарий,
+#   префикс `=` — только целое слово) и перечитывает их при изменении:
+#   новый автомат собирается в фоне и подменяется одним присваиванием.
+
+import logging
+import re
+import threading
+import unicodedata
+from collections import deque
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Похожие символы приводятся к одному виду (и в словах, и в тексте — поэтому направление не важно)
+HOMOGLYPHS = str.maketrans({
+    # кириллица, похожая на латиницу
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ї": "i", "є": "e",
+    # "leet"-замены
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "@": "a", "$": "s", "!": "i", "|": "l",
+})
+
+# Всё, что не буква/цифра и не пробел, считается разделителем внутри слова и удаляется
+_SEPARATORS = re.compile(r"[^\w\s]|_")
+# Одиночные буквы через пробел ("b a d") склеиваются в слово
+_SPACED_LETTERS = re.compile(r"(?<!\w)(\w)\s+(?=\w(?!\w))")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Приводит текст к канонической форме для поиска запрещённых слов."""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    # Сначала замены: часть leet-символов ("@", "$") иначе была бы удалена как разделитель
+    text = text.translate(HOMOGLYPHS)
+    text = _SEPARATORS.sub("", text)
+    text = _SPACED_LETTERS.sub(r"\1", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class AhoCorasick:
+    """Скомпилированный автомат для одновременного поиска множества подстрок."""
+
+    def __init__(self, patterns: Iterable[Tuple[str, bool]]):
+        """
+        :param patterns: Пары (нормализованное слово, только целое слово).
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Для каждого состояния: список (длина слова, только целое слово, слово)
+        self._out: List[List[Tuple[int, bool, str]]] = [[]]
+        self.size = 0
+
+        for pattern, whole_word in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append((len(pattern), whole_word, pattern))
+            self.size += 1
+
+        # Суффиксные ссылки обходом в ширину
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, text: str) -> Optional[str]:
+        """Первое найденное слово в нормализованном тексте или None."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, whole_word, pattern in out[state]:
+                if not whole_word or self._is_whole_word(text, end - length + 1, end + 1):
+                    return pattern
+        return None
+
+    @staticmethod
+    def _is_whole_word(text: str, start: int, end: int) -> bool:
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+def load_wordlists(directory: Path) -> List[Tuple[str, bool]]:
+    """Читает все `*.txt` из папки и возвращает нормализованные слова."""
+    patterns = set()
+    for path in sorted(directory.glob("*.txt")):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                whole_word = line.startswith("=")
+                pattern = normalize(line[1:] if whole_word else line)
+                if pattern:
+                    patterns.add((pattern, whole_word))
+    return sorted(patterns)
+
+
+class CensorshipFilter:
+    """Фильтр с горячей перезагрузкой словарей из папки."""
+
+    def __init__(self, directory: str, reload_interval: float = 0.0):
+        """
+        :param directory: Папка со словарями `*.txt`.
+        :param reload_interval: Как часто (в секундах) проверять изменения файлов; 0 — не следить.
+        """
+        self.directory = Path(directory)
+        self.reload_interval = reload_interval
+        self._signature = None
+        self._automaton = AhoCorasick([])
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reload()
+        if reload_interval > 0:
+            self._thread = threading.Thread(target=self._watch, name="censorship-reload", daemon=True)
+            self._thread.start()
+
+    def _files_signature(self):
+        return tuple((path.name, path.stat().st_mtime_ns, path.stat().st_size)
+                     for path in sorted(self.directory.glob("*.txt")))
+
+    def reload(self) -> bool:
+        """
+        Пересобирает автомат, если файлы словарей изменились.
+        :return: True, если автомат был подменён.
+        """
+        try:
+            signature = self._files_signature()
+            if signature == self._signature:
+                return False
+            automaton = AhoCorasick(load_wordlists(self.directory))
+        except OSError as e:
+            logger.error(f"Не удалось загрузить словари цензуры из {self.directory}: {e}")
+            return False
+        # Атомарная подмена: проверки, которые уже идут, доработают со старым автоматом
+        self._automaton = automaton
+        self._signature = signature
+        logger.info(f"Словари цензуры загружены: {automaton.size} слов.")
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            self.reload()
+
+    @property
+    def size(self) -> int:
+        return self._automaton.size
+
+    def find(self, text: str) -> Optional[str]:
+        """Возвращает найденное запрещённое слово (в нормализованном виде) или None."""
+        return self._automaton.find(normalize(text))
+
+    def stop(self) -> None:
+        """Останавливает слежение за файлами."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -38,8 +38,16 @@ from bot.base import BotCommand, CommandStrategy
 
 
 # Импортируем базовые классы из центрального файла bot/base.py
+import time
+
 from bot.base import BotCommand, CommandStrategy
 from bot.helper.currency_helper import CurrencyHelper
+from bot.helper.rate_history import parse_period
+from bot.message import ParsedMessage
+
+# Периоды по умолчанию для подкоманд истории
+DEFAULT_HISTORY_PERIOD = '7d'
+DEFAULT_STATS_PERIOD = '30d'
 
 
 class CurrencyStrategy(CommandStrategy):
@@ -50,10 +58,10 @@ class CurrencyStrategy(CommandStrategy):
 
     def __init__(self):
         """
-        Инициализирует стратегию и создает экземпляр CurrencyHelper.
+        Инициализирует стратегию и получает общий экземпляр CurrencyHelper (один кеш курсов на процесс).
         """
         try:
-            self.currency_helper = CurrencyHelper()
+            self.currency_helper = CurrencyHelper.shared()
         except ValueError as e:
             # Если хелпер не смог создаться (например, нет .env переменных),
             # он будет None, и команда вернет ошибку.
@@ -62,17 +70,23 @@ class CurrencyStrategy(CommandStrategy):
 
     def handle(self, text: str, chat_id: int, user_id: int, **kwargs):
         """
-        Обрабатывает команду. Формат: /currency [КОД_ВАЛЮТЫ].
-        По умолчанию используется USD.
+        Обрабатывает команду. Форматы:
+        /currency [КОД_ВАЛЮТЫ] — текущий курс к UAH (по умолчанию USD);
+        /currency history КОД [ПЕРИОД] — история курса из локального хранилища (например, 30d);
+        /currency stats КОД [ПЕРИОД] — min/max/среднее/волатильность/скользящее среднее.
         """
         if not self.currency_helper:
             return f"Ошибка инициализации команды: {self.initialization_error}"
 
-        # Определяем код валюты из текста команды
-        parts = text.strip().split()
+        # Определяем код валюты из уже разобранного сообщения
+        message = kwargs.get('message') or ParsedMessage.parse(text)
+        args = message.args
+        if args and args[0].lower() in ('history', 'stats'):
+            return self._handle_history(args[0].lower(), list(args[1:]))
+
         valcode = 'USD'  # Валюта по умолчанию
-        if len(parts) > 1:
-            valcode = parts[1].upper()
+        if args:
+            valcode = args[0].upper()
 
         # Шаг 1: Валидация валюты через хелпер
         if not self.currency_helper.is_valid_currency(valcode):
@@ -86,13 +100,47 @@ class CurrencyStrategy(CommandStrategy):
         if result_data and result_data.get('success'):
             rate = result_data.get('result')
             if rate is not None:
-                return f"1 {valcode} = {rate:.2f} UAH"
+                age = self.currency_helper.describe_rate_age(result_data.get('rate_age'))
+                return f"1 {valcode} = {rate:.2f} UAH ({age})"
             else:
                 return f"Не удалось получить результат конвертации для {valcode}."
         else:
             error_info = result_data.get('error', {}).get('info', 'неизвестная ошибка') if result_data else 'ошибка сети'
             return f"Не удалось получить курс для {valcode}. Причина: {error_info}"
 
+    def _handle_history(self, subcommand: str, args: list) -> str:
+        """Отвечает на /currency history и /currency stats по локальной истории курсов (без запросов к API)."""
+        history = self.currency_helper.rate_history
+        if history is None:
+            return "История курсов отключена."
+        valcode = args[0].upper() if args else 'USD'
+        default_period = DEFAULT_HISTORY_PERIOD if subcommand == 'history' else DEFAULT_STATS_PERIOD
+        period_text = args[1] if len(args) > 1 else default_period
+        try:
+            period = parse_period(period_text)
+        except ValueError as e:
+            return str(e)
+
+        stats = history.stats(valcode, 'UAH', period)
+        if stats is None:
+            return f"Нет сохранённой истории курса {valcode}/UAH за {period_text}."
+
+        lines = [f"{valcode}/UAH за {period_text} (точек: {stats['points']}):"]
+        if subcommand == 'history':
+            for timestamp, rate in history.sample(valcode, 'UAH', period):
+                lines.append(f"{time.strftime('%d.%m.%Y %H:%M', time.localtime(timestamp))}  {rate:.4f}")
+            lines.append(f"Изменение: {stats['change_pct']:+.2f}%")
+        else:
+            lines += [
+                f"Мин: {stats['min']:.4f}",
+                f"Макс: {stats['max']:.4f}",
+                f"Среднее: {stats['mean']:.4f}",
+                f"Волатильность: {stats['volatility_pct']:.3f}%",
+                f"Скользящее среднее: {stats['moving_average']:.4f}",
+                f"Последний: {stats['last']:.4f} ({stats['change_pct']:+.2f}%)",
+            ]
+        return "\n".join(lines)
+
 
 class CurrencyCommand(BotCommand):
     """
@@ -111,4 +159,4 @@ class CurrencyCommand(BotCommand):
         Выполняет команду, вызывая обработчик из стратегии.
         Этот метод вызывается из фабрики команд.
         """
-        return self.strategy.handle(text, chat_id, user_id)
\ No newline at end of file
+        return self.strategy.handle(text, chat_id, user_id, **kwargs)
\ No newline at end of file
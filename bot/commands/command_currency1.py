@@ -31,6 +31,10 @@ import requests
 import re
 from bot.base import BotCommand, CommandStrategy
 from bot.helper.currency_helper import CurrencyHelper
+from bot.message import ParsedMessage
+
+# Формат "10 USD to EUR": (число) (3 буквы) "to" (3 буквы); компилируется один раз при импорте
+CONVERSION_PATTERN = re.compile(r'(\d+\.?\d*)\s+([A-Z]{3})\s+to\s+([A-Z]{3})', re.IGNORECASE)
 
 
 class Currency1Strategy(CommandStrategy):
@@ -42,10 +46,10 @@ class Currency1Strategy(CommandStrategy):
 
     def __init__(self):
         """
-        Инициализирует стратегию и создает экземпляр CurrencyHelper.
+        Инициализирует стратегию и получает общий экземпляр CurrencyHelper (один кеш курсов на процесс).
         """
         try:
-            self.currency_helper = CurrencyHelper()
+            self.currency_helper = CurrencyHelper.shared()
             self.initialization_error = None
         except ValueError as e:
             self.currency_helper = None
@@ -58,12 +62,11 @@ class Currency1Strategy(CommandStrategy):
         if not self.currency_helper:
             return f"Ошибка инициализации команды: {self.initialization_error}"
 
-        # Убираем саму команду из текста для удобства парсинга
-        clean_text = text.replace('/currency1', '').strip()
+        # Текст после команды берём из уже разобранного сообщения
+        message = kwargs.get('message') or ParsedMessage.parse(text)
 
-        # Используем регулярное выражение для парсинга формата "10 USD to EUR"
-        # Оно ищет: (число) (3 буквы) "to" (3 буквы)
-        match = re.search(r'(\d+\.?\d*)\s+([A-Z]{3})\s+to\s+([A-Z]{3})', clean_text, re.IGNORECASE)
+        # Разбираем формат "10 USD to EUR" заранее скомпилированным выражением
+        match = CONVERSION_PATTERN.search(message.arg_text)
 
         if not match:
             return ("Неверный формат команды. Используйте: "
@@ -89,7 +92,8 @@ class Currency1Strategy(CommandStrategy):
         if result_data and result_data.get('success'):
             converted_amount = result_data.get('result')
             if converted_amount is not None:
-                return f"{amount:.2f} {from_currency} = {converted_amount:.2f} {to_currency}"
+                age = self.currency_helper.describe_rate_age(result_data.get('rate_age'))
+                return f"{amount:.2f} {from_currency} = {converted_amount:.2f} {to_currency} ({age})"
             else:
                 return f"Не удалось получить результат конвертации для {from_currency} -> {to_currency}."
         else:
@@ -106,4 +110,4 @@ class Currency1Command(BotCommand):
         self.strategy = Currency1Strategy()
 
     def execute(self, text: str, chat_id: int, user_id: int, **kwargs):
-        return self.strategy.handle(text, chat_id, user_id)
\ No newline at end of file
+        return self.strategy.handle(text, chat_id, user_id, **kwargs)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from bot.base import BotCommand, CommandStrategy
+from bot.message import ParsedMessage
 import os
 
 # При вызове команды `/dev` в чате, бот выполняет код из `DevStrategy` и
@@ -26,19 +27,21 @@ class DevStrategy(CommandStrategy):
         self.dev_commands = {
             "get_ids": self._get_ids,
             "help": self._show_help,    # <--- Вот здесь мы связываем подкоманду "help"
+            "stats": self._show_stats,
+            "profile": self._profile,
         }
 
-    def handle(self, text, chat_id, user_id):
+    def handle(self, text, chat_id, user_id, **kwargs):
         # проверка администратора включена и работает с .env
         if user_id not in self.admin_ids:
             return "⛔ У вас нет доступа к этой команде."
 
-        # Разбиваем текст команды на части, чтобы отделить команду от аргументов
-        parts = text.split()
+        # Аргументы берём из уже разобранного сообщения (ParsedMessage)
+        message = kwargs.get("message") or ParsedMessage.parse(text)
 #        sub_command = parts[1] if len(parts) > 1 else None
-        # parts[0] это /dev, parts[1] может быть подкомандой
-        sub_command = parts[1] if len(parts) > 1 else "get_ids"
-        args = parts[2:] if len(parts) > 2 else []
+        # message.args[0] может быть подкомандой
+        sub_command = message.args[0] if message.args else "get_ids"
+        args = list(message.args[1:])
 
         # Выбираем нужный метод из словаря или метод по умолчанию
         handler = self.dev_commands.get(sub_command, self._unknown_command)
@@ -77,6 +80,42 @@ class DevStrategy(CommandStrategy):
         available_commands = "\n".join(f"- `{cmd}`" for cmd in self.dev_commands.keys())
         return f"🛠️ **Доступные команды разработчика:**\n{available_commands}"
 
+    def _show_stats(self, chat_id, user_id, args):
+        """Счётчики и задержки (p50/p95/p99) по командам, этапам конвейера и внешним запросам, глубина очередей шардов."""
+        from bot.metrics import registry
+        return f"📊 **Метрики:**\n{registry.summary()}"
+
+    def _profile(self, chat_id, user_id, args):
+        """
+        Профилирование handle_message:
+        `profile start [N|Ns]` — следующие N сообщений (по умолчанию 100) или N секунд под cProfile;
+        `profile sample [Ns]` — выборка стеков всех потоков (по умолчанию 30 с);
+        `profile stop` — остановить и показать top функций (или последний отчёт).
+        """
+        # Модуль профилирования загружается только при первом обращении
+        from bot.profiling import profiler
+        usage = "Использование: `/dev profile start [N|Ns]`, `/dev profile sample [Ns]`, `/dev profile stop`"
+        action = args[0] if args else "stop"
+        value = args[1] if len(args) > 1 else ""
+        if action == "stop":
+            return f"```\n{profiler.stop()}\n```"
+        # Лимит обязателен и положителен: при 0 профилирование не закончилось бы само
+        try:
+            if action == "start" and value.endswith("s"):
+                seconds = float(value[:-1])
+                if not 0 < seconds < float("inf"):
+                    return usage
+                return profiler.start(seconds=seconds)
+            if action == "start":
+                messages = int(value) if value else 100
+                return profiler.start(messages=messages) if messages > 0 else usage
+            if action == "sample":
+                seconds = float(value.rstrip("s")) if value else 30.0
+                return profiler.sample(seconds=seconds) if 0 < seconds < float("inf") else usage
+        except ValueError:
+            return usage
+        return usage
+
     def _unknown_command(self, **kwargs):
         """Вызывается, если подкоманда не найдена."""
         return f"❓ Неизвестная подкоманда. Используйте `/dev help` для справки."
@@ -85,5 +124,5 @@ class DevCommand(BotCommand):
     def __init__(self):
         self.strategy = DevStrategy()
 
-    def execute(self, text, chat_id, user_id):
-        return self.strategy.handle(text, chat_id, user_id)
+    def execute(self, text, chat_id, user_id, **kwargs):
+        return self.strategy.handle(text, chat_id, user_id, **kwargs)
@@ -18,21 +18,14 @@ class HelpMenuStrategy(CommandStrategy):
         from bot.factories import CommandFactory
         help_text = "Здравствуйте! Я бот. Доступные команды:\n"
 
-        # Получаем словарь { 'имя_команды': КлассКоманды } из фабрики
-        commands_map = CommandFactory.command_map
+        # Получаем описания команд из фабрики: они берутся из манифеста,
+        # поэтому /help не импортирует модули остальных команд.
+        descriptions = CommandFactory.describe_commands()
 
         # Сортируем команды по имени для красивого вывода
-        for command_name in sorted(commands_map.keys()):
-            # Получаем класс команды, например, DevCommand
-            CommandClass = commands_map[command_name]
-
-            # Используем docstring класса как описание. Это стандартный подход в Python.
-            # Если docstring нет, используем запасной текст.
-            description = CommandClass.__doc__ or "Описание отсутствует."
-
-            # Убираем лишние пробелы из многострочных docstrings
-            description = " ".join(description.strip().split())
-
+        for command_name in sorted(descriptions.keys()):
+            # Описание — это docstring класса команды. Если его нет, используем запасной текст.
+            description = descriptions[command_name] or "Описание отсутствует."
             help_text += f"{command_name} - {description}\n"
 
         return help_text
@@ -66,4 +59,4 @@ class HelpMenuCommand(BotCommand):
         self.strategy = HelpMenuStrategy()
 
     def execute(self, text: str, chat_id: int, user_id: int, **kwargs) -> Optional[str]:
-        return self.strategy.handle(text, chat_id, user_id)
+        return self.strategy.handle(text, chat_id, user_id, **kwargs)
@@ -12,6 +12,7 @@ from bot.base import BotCommand
 # Імпортуємо глобальні словники
 from bot.roles.commands import commands_dict
 from bot.roles.users import users_dict
+from bot.roles.role_helper import permission_index
 
 load_dotenv()
 ADMIN_ID = os.getenv("ADMIN_ID")
@@ -25,6 +26,7 @@ class RoleDeleteStrategy(RoleStrategy):
         # /role <role> delete
         role = parts[1]
         if role in users_dict:
+            permission_index.remove_role(role, users_dict[role])
             del users_dict[role]
             return f"Роль '{role}' видалена з users_dict."
         return f"Роль '{role}' не знайдена в users_dict."
@@ -36,6 +38,7 @@ class RoleAddStrategy(RoleStrategy):
         if role in users_dict:
             return f"Роль '{role}' вже існує в users_dict."
         users_dict[role] = []
+        permission_index.add_role(role)
         return f"Роль '{role}' додана в users_dict."
 
 class RoleRemoveStrategy(RoleStrategy):
@@ -43,6 +46,7 @@ class RoleRemoveStrategy(RoleStrategy):
         # /role remove <role>
         role = parts[2]
         if role in users_dict:
+            permission_index.remove_role(role, users_dict[role])
             del users_dict[role]
             return f"Роль '{role}' видалена з users_dict."
         return f"Роль '{role}' не знайдена в users_dict."
@@ -57,6 +61,7 @@ class RoleAddToStrategy(RoleStrategy):
         if uid in users_dict[role]:
             return f"ID {uid} вже у ролі '{role}'."
         users_dict[role].append(uid)
+        permission_index.add_user_role(uid, role)
         return f"ID {uid} додано до ролі '{role}'."
 
 class RoleRemoveFromStrategy(RoleStrategy):
@@ -67,6 +72,7 @@ class RoleRemoveFromStrategy(RoleStrategy):
         if role not in users_dict or uid not in users_dict[role]:
             return f"ID {uid} немає у ролі '{role}'."
         users_dict[role].remove(uid)
+        permission_index.remove_user_role(uid, role)
         return f"ID {uid} видалено з ролі '{role}'."
 
 class RoleShowStrategy(RoleStrategy):
@@ -3,7 +3,7 @@
 from bot.base import BotCommand, CommandStrategy
 
 class ShutdownStrategy(CommandStrategy):
-    def handle(self, text, chat_id, user_id):
+    def handle(self, text, chat_id, user_id, **kwargs):
         # Можна тут повертати спец. маркер
         return "__SHUTDOWN__"
 
@@ -16,7 +16,7 @@ class ShutdownCommand(BotCommand):
     # он получит вежливый отказ, а бот продолжит работать.
     # Сигнал `__SHUTDOWN__` будет отправлен только в том случае,
     # если команду вызовет администратор
-    def execute(self, text, chat_id, user_id):
+    def execute(self, text, chat_id, user_id, **kwargs):
         # Импортируем ID администратора из конфига сюда, чтоб исключить циклическую ошибку
         from bot.config import ADMIN_ID
         # Добавляем проверку прав доступа
@@ -27,4 +27,4 @@ class ShutdownCommand(BotCommand):
             return "У вас нет прав для выполнения этой команды."
 
         # Если проверка пройдена, выполняем основную логику
-        return self.strategy.handle(text, chat_id, user_id)
+        return self.strategy.handle(text, chat_id, user_id, **kwargs)
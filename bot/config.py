@@ -29,6 +29,119 @@ class Config:
 
     # Администратор
     ADMIN_ID = int(os.getenv("ADMIN_ID", ""))
+
+    # Базовый URL Bot API (можно направить на локальный stub-сервер)
+    TELEGRAM_API_URL = os.getenv("URL", "https://api.telegram.org/bot")
+
+    # HTTP-транспорт (общий пул keep-alive соединений)
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+    HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+
+    # Способ получения обновлений: "polling" (getUpdates) или "webhook"
+    UPDATE_MODE = os.getenv("UPDATE_MODE", "polling").lower()
+
+    # Webhook: встроенный HTTP-сервер
+    WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+    WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+    # Значение заголовка X-Telegram-Bot-Api-Secret-Token; без него webhook-режим не стартует,
+    # если WEBHOOK_URL не задан (с WEBHOOK_URL секрет генерируется при запуске)
+    WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+    # Публичный URL для setWebhook (пусто — webhook регистрируется вручную)
+    WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+
+    # Long-polling (getUpdates)
+    # Максимальное время ожидания обновлений на стороне Telegram, секунды
+    POLL_TIMEOUT = int(os.getenv("POLL_TIMEOUT", "25"))
+    # Максимальное количество обновлений в одном ответе (1..100)
+    POLL_BATCH_SIZE = int(os.getenv("POLL_BATCH_SIZE", "100"))
+    # Минимальная пауза между запросами getUpdates, секунды (0 — без паузы)
+    POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "0"))
+    # Верхняя граница паузы при ошибках сети, секунды
+    POLL_MAX_BACKOFF = float(os.getenv("POLL_MAX_BACKOFF", "30"))
+
+    # Диспетчер по чатам (ChatDispatcher): 0 или 1 — обработка в потоке поллера
+    DISPATCH_WORKERS = int(os.getenv("DISPATCH_WORKERS", "0"))
+    # Максимальная длина очереди одного шарда
+    DISPATCH_QUEUE_SIZE = int(os.getenv("DISPATCH_QUEUE_SIZE", "1000"))
+
+    # Очередь исходящих сообщений (OutboundQueue)
+    SEND_QUEUE_ENABLED = os.getenv("SEND_QUEUE_ENABLED", "true").lower() == "true"
+    # Общий лимит Telegram: ~30 сообщений в секунду
+    SEND_GLOBAL_RATE = float(os.getenv("SEND_GLOBAL_RATE", "30"))
+    # Лимит на личный чат: ~1 сообщение в секунду
+    SEND_CHAT_RATE = float(os.getenv("SEND_CHAT_RATE", "1"))
+    # Лимит на группу: ~20 сообщений в минуту
+    SEND_GROUP_RATE = float(os.getenv("SEND_GROUP_RATE", str(20 / 60)))
+    # Количество потоков отправки
+    SEND_WORKERS = int(os.getenv("SEND_WORKERS", "8"))
+    # Сколько раз повторять сообщение после ответа 429
+    SEND_MAX_RETRIES = int(os.getenv("SEND_MAX_RETRIES", "5"))
+    # Сколько секунд ждать отправки оставшихся сообщений при остановке
+    SEND_DRAIN_TIMEOUT = float(os.getenv("SEND_DRAIN_TIMEOUT", "10"))
+
+    # Пользователи (UserService) и отложенная запись их активности
+    USERS_DB_PATH = os.getenv("USERS_DB_PATH", "users.db")
+    # LRU-кеш get_user: максимум записей и TTL в секундах (0 — без TTL)
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "100000"))
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "0"))
+    TRACK_USER_ACTIVITY = os.getenv("TRACK_USER_ACTIVITY", "false").lower() == "true"
+    ACTIVITY_BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", "500"))
+    ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "1.0"))
+
+    # Команды, которые создаются в фоне сразу после старта (через запятую),
+    # чтобы первый пользователь не ждал импорта модуля и инициализации команды
+    COMMAND_WARMUP = [name.strip() for name in os.getenv("COMMAND_WARMUP", "/currency,/currency1").split(",")
+                      if name.strip()]
+
+    # Цензура: папка со словарями *.txt и период проверки их изменений (0 — без перезагрузки)
+    CENSORSHIP_WORDLIST_DIR = os.getenv("CENSORSHIP_WORDLIST_DIR",
+                                        os.path.join(os.path.dirname(__file__), "wordlists"))
+    CENSORSHIP_RELOAD_INTERVAL = float(os.getenv("CENSORSHIP_RELOAD_INTERVAL", "5"))
+
+    # Рассылки (BroadcastService)
+    BROADCAST_CHECKPOINT_DIR = os.getenv("BROADCAST_CHECKPOINT_DIR", "broadcasts")
+    BROADCAST_CHUNK_SIZE = int(os.getenv("BROADCAST_CHUNK_SIZE", "500"))
+
+    # Логирование (bot/logger): запись в файл и консоль идёт в фоновом потоке
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    LOG_FILE = os.getenv("LOG_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                  "bot.log"))
+    LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", "1000000"))
+    LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    # Структурированные логи: одна JSON-строка на запись
+    LOG_JSON = os.getenv("LOG_JSON", "false").lower() == "true"
+    LOG_CONSOLE = os.getenv("LOG_CONSOLE", "true").lower() == "true"
+    # Выборка для шумных логгеров: "bot.handlers=0.1,bot.decorators=0.5" — доля записей
+    # ниже WARNING, которые попадут в лог (предупреждения и ошибки пишутся всегда)
+    LOG_SAMPLING = {
+        name.strip(): float(rate)
+        for name, _, rate in (item.partition("=") for item in os.getenv("LOG_SAMPLING", "").split(","))
+        if name.strip() and rate
+    }
+
+    # Метрики (bot/metrics.py): HTTP-эндпоинт /metrics в формате Prometheus
+    # Порт 0 — эндпоинт выключен (метрики всё равно собираются и доступны через /dev stats)
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+    # Профилирование по запросу (/dev profile, bot/profiling.py)
+    PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+    # Сколько функций показывать в отчёте
+    PROFILE_TOP = int(os.getenv("PROFILE_TOP", "15"))
+    # Период выборки стеков в режиме `/dev profile sample`, секунды
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.01"))
+
+    # Асинхронный движок (AsyncTelegramBot)
+    # Движок обработки обновлений: "sync" (TelegramBot.run) или "async" (AsyncTelegramBot.run)
+    BOT_ENGINE = os.getenv("BOT_ENGINE", "sync").lower()
+    # Максимальное количество одновременно обрабатываемых обновлений
+    ASYNC_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", "100"))
+    # Размер пула потоков для синхронных команд и HTTP-запросов
+    ASYNC_EXECUTOR_WORKERS = int(os.getenv("ASYNC_EXECUTOR_WORKERS", "16"))
 ADMIN_ID = int(os.getenv("ADMIN_ID", ""))
 # Экземпляр конфигурации
 config = Config()
@@ -1,13 +1,26 @@
 import os
-import sys
-import requests
 import time
-from typing import Optional, Any, Dict
+import inspect
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Optional, Any, Dict, Tuple
+from bot.base import BotCommand
+from bot.config import config
+from bot.transport import HttpTransport, get_transport
 from bot.factories import CommandFactory
-from bot.decorators import log_command, require_auth
+from bot.decorators import log_command, require_auth, AuthorizationError
+from bot.message import ParsedMessage, message_kwargs
+from bot.polling import UpdatePoller
+from bot.dispatcher import ChatDispatcher
+from bot.outbound import OutboundQueue, TelegramAPIError
 from bot.handlers import CensorshipHandler, LoggingHandler
+from bot.middleware import MiddlewarePipeline
+from bot.metrics import COMMAND_SECONDS, MESSAGE_SECONDS, SEND_SECONDS
 from bot.logger.app_logger import logger
 
+if TYPE_CHECKING:
+    # Буфер (и sqlite3 за ним) создаётся в main.py только при TRACK_USER_ACTIVITY
+    from bot.services.user_activity_buffer import UserActivityBuffer
+
 
 # Singleton pattern: тільки один екземпляр TelegramBot
 class TelegramBot:
@@ -19,6 +32,8 @@ class TelegramBot:
     _instance: Optional['TelegramBot'] = None
     # Константа для команды выключения, чтобы избежать "магических строк"
     SHUTDOWN_COMMAND_REPLY = "__SHUTDOWN__"
+    # Ответ на сообщение без известной команды (общий для обоих движков)
+    UNKNOWN_COMMAND_REPLY = "Unknown command. Type /help."
 
 #    def __new__(cls, token):
     def __new__(cls, *args, **kwargs):
@@ -27,54 +42,158 @@ class TelegramBot:
         return cls._instance
 
 #    def __init__(self, token):
-    def __init__(self, token: str):
+    def __init__(self, token: str, transport: Optional[HttpTransport] = None, api_url: Optional[str] = None):
         # Предотвращаем повторную инициализацию
         if hasattr(self, 'is_initialized'):
             return
 
         self.token: str = token
-        self.url = f"https://api.telegram.org/bot{self.token}/"
+        self.url = f"{(api_url or config.TELEGRAM_API_URL).rstrip('/')}{self.token}/"
+        # Общий keep-alive транспорт; в тестах можно передать свой
+        self.transport: HttpTransport = transport or get_transport()
         self.last_update_id: Optional[int] = None
-        self.handler_chain = self.build_handler_chain()
+        self._stop_requested: bool = False
+        self.dispatcher: Optional[ChatDispatcher] = None
+        # Буфер активности пользователей (подключается в main.py, если TRACK_USER_ACTIVITY=true)
+        self.activity_buffer: Optional["UserActivityBuffer"] = None
+        # Очередь исходящих сообщений с лимитами Telegram
+        self.outbound: Optional[OutboundQueue] = None
+        if config.SEND_QUEUE_ENABLED:
+            self.outbound = OutboundQueue(
+                self.post_message,
+                global_rate=config.SEND_GLOBAL_RATE,
+                chat_rate=config.SEND_CHAT_RATE,
+                group_rate=config.SEND_GROUP_RATE,
+                workers=config.SEND_WORKERS,
+                max_retries=config.SEND_MAX_RETRIES,
+            )
+        self.pipeline = self.build_pipeline()
         self.is_initialized: bool = True
         logger.info("Экземпляр TelegramBot инициализирован.")
 
 #    def build_handler_chain(self):
-    def build_handler_chain(self) -> CensorshipHandler:
-        """Собирает и возвращает цепочку обработчиков."""
-        # Chain of Responsibility: censorship -> logging -> команда
-        censorship = CensorshipHandler()
-        logging = LoggingHandler()
-        censorship.set_next(logging)
-        return censorship
+    def build_pipeline(self) -> MiddlewarePipeline:
+        """Собирает и компилирует конвейер middleware (один раз при старте)."""
+        # censorship -> logging -> команда
+        return MiddlewarePipeline([CensorshipHandler(), LoggingHandler()])
 
     @log_command
     @require_auth
     # def handle_message(self, text, chat_id, user_id):
     #     # Chain of Responsibility: запускаємо ланцюг
-    def handle_message(self, text: str, chat_id: int, user_id: int) -> Optional[str]:
+    def route_message(self, text: str, chat_id: int, user_id: int,
+                      message: Optional[ParsedMessage] = None,
+                      run_pipeline: bool = True) -> Tuple[Optional[str], Optional[BotCommand]]:
         """
-        Обрабатывает входящее текстовое сообщение, прогоняя его через
-        цепочку обязанностей и фабрику команд.
+        Прогоняет сообщение через конвейер middleware и находит команду,
+        но не выполняет её. Общая часть синхронного и асинхронного движков.
+        :param message: Уже разобранное сообщение (если None — разбирается здесь).
+        :param run_pipeline: False — не запускать конвейер (для замеров декораторов и фабрики отдельно).
+        :return: Пара (готовый ответ, команда): заполнен ровно один из элементов.
         """
-        # 1. Цепочка обязанностей (цензура, логирование)
-        result = self.handler_chain.handle(text, chat_id, user_id)
-        if result:
-            return result
+        if message is None:
+            message = ParsedMessage.parse(text)
+        # 1. Конвейер middleware (цензура, логирование)
+        if run_pipeline:
+            result = self.pipeline.run(message, chat_id, user_id)
+            if result:
+                return result, None
         # Factory pattern: створюємо команду
-        command_name = text.split()[0]
-        command = CommandFactory.create_command(command_name)
+        command = CommandFactory.create_command(message.command)
         if command:
-            return command.execute(text, chat_id, user_id)
-        return "Unknown command. Type /help."
+            return None, command
+        return self.UNKNOWN_COMMAND_REPLY, None
+
+    @log_command
+    @require_auth
+    def authorize(self, text: str, chat_id: int, user_id: int,
+                  message: Optional[ParsedMessage] = None) -> None:
+        """
+        Логирование и проверка доступа — те же декораторы, что у route_message, без конвейера и фабрики.
+        Асинхронный движок вызывает это первым, а конвейер и фабрику — сам, в том же порядке.
+        :raises AuthorizationError: Если доступ запрещён.
+        """
+
+    def handle_message(self, text: str, chat_id: int, user_id: int,
+                       message: Optional[ParsedMessage] = None) -> Optional[str]:
+        """
+        Обрабатывает входящее текстовое сообщение, прогоняя его через
+        цепочку обязанностей и фабрику команд.
+        Текст разбирается один раз (ParsedMessage) и передаётся дальше как `message=`.
+        """
+        started = time.perf_counter()
+        if message is None:
+            message = ParsedMessage.parse(text)
+        reply, command = self.route_message(text, chat_id, user_id, message=message)
+        if command is None:
+            # Метка "none" вместо текста сообщения: произвольные строки не должны плодить серии метрик
+            MESSAGE_SECONDS.labels("none").observe(time.perf_counter() - started)
+            return reply
+        executed = time.perf_counter()
+        result = command.execute(text, chat_id, user_id, **message_kwargs(command.execute, message))
+        # Команда с нативным `async execute` в синхронном движке выполняется до конца здесь же
+        if inspect.isawaitable(result):
+            # asyncio импортируется только здесь: синхронному движку он нужен редко, а стоит ~50 мс на старте
+            import asyncio
+            result = asyncio.run(result)
+        finished = time.perf_counter()
+        COMMAND_SECONDS.labels(message.command).observe(finished - executed)
+        MESSAGE_SECONDS.labels(message.command).observe(finished - started)
+        return result
+
+    def get_updates(self, offset: Optional[int] = None, limit: int = 100, timeout: int = 0) -> list:
+        """
+        Запрашивает батч обновлений через getUpdates.
+        :param offset: ID первого обновления, которое нужно получить (last_update_id + 1).
+        :param limit: Максимальное количество обновлений в ответе.
+        :param timeout: Таймаут long-polling на стороне Telegram, секунды.
+        :return: Список обновлений (может быть пустым).
+        """
+        params: Dict[str, Any] = {"limit": limit, "timeout": timeout}
+        if offset is not None:
+            params["offset"] = offset
+        # Таймаут чтения должен быть больше таймаута long-polling
+        response = self.transport.get(self.url + "getUpdates", params=params,
+                                      read_timeout=timeout + self.transport.read_timeout)
+        data = response.json()
+        if not data.get("ok"):
+            raise RuntimeError(f"getUpdates вернул ошибку: {data.get('description')}")
+        return data["result"]
+
+    def set_webhook(self, url: str, secret_token: str = "") -> None:
+        """Регистрирует webhook в Telegram (после этого getUpdates перестаёт работать)."""
+        payload: Dict[str, Any] = {"url": url}
+        if secret_token:
+            payload["secret_token"] = secret_token
+        data = self.transport.post(self.url + "setWebhook", json=payload).json()
+        if not data.get("ok"):
+            raise TelegramAPIError.from_response(data)
 
-    def get_last_update(self):
-        url = self.url + "getUpdates?timeout=10"
-        response = requests.get(url)
-        result = response.json()["result"]
-        if result:
-            return result[-1]
-        return None
+    def delete_webhook(self) -> None:
+        """Удаляет webhook, чтобы снова можно было получать обновления через getUpdates."""
+        data = self.transport.post(self.url + "deleteWebhook", json={}).json()
+        if not data.get("ok"):
+            raise TelegramAPIError.from_response(data)
+
+    def prepare_polling(self) -> None:
+        """
+        Снимает webhook перед long-polling: пока webhook зарегистрирован (например, после запуска
+        с UPDATE_MODE=webhook), Telegram отвечает 409 на каждый getUpdates.
+        Ошибка не фатальна — опрос всё равно стартует и уйдёт в backoff.
+        """
+        try:
+            self.delete_webhook()
+        except Exception as e:
+            logger.warning(f"Не удалось снять webhook перед long-polling: {e}")
+
+    def record_activity(self, update: Dict[str, Any]) -> None:
+        """Запоминает отправителя в буфере активности (только память, без SQLite)."""
+        if self.activity_buffer is None:
+            return
+        sender = update["message"]["from"]
+        name = " ".join(filter(None, (sender.get("first_name"), sender.get("last_name")))) \
+            or sender.get("username") or str(sender["id"])
+        self.activity_buffer.record(sender["id"], name, update["message"].get("date"))
 
     def get_chat_id(self, update):
         return update["message"]["chat"]["id"]
@@ -85,35 +204,162 @@ class TelegramBot:
     def get_message_text(self, update):
         return update["message"]["text"]
 
-    def send_message(self, chat_id, text):
+    def post_message(self, chat_id: int, text: str) -> Dict[str, Any]:
+        """
+        Немедленно отправляет сообщение через sendMessage, минуя очередь.
+        :return: Поле `result` ответа Bot API.
+        :raises TelegramAPIError: Если Bot API вернул ошибку (в т.ч. 429 с retry_after).
+        """
         url = self.url + "sendMessage"
         payload = {"chat_id": chat_id, "text": text}
-        requests.post(url, json=payload)
+        started = time.perf_counter()
+        try:
+            data = self.transport.post(url, json=payload).json()
+        except Exception:
+            SEND_SECONDS.labels("error").observe(time.perf_counter() - started)
+            raise
+        if not data.get("ok"):
+            SEND_SECONDS.labels("error").observe(time.perf_counter() - started)
+            raise TelegramAPIError.from_response(data)
+        SEND_SECONDS.labels("ok").observe(time.perf_counter() - started)
+        return data["result"]
+
+    def send_message(self, chat_id: int, text: str) -> Future:
+        """
+        Отправляет сообщение с соблюдением лимитов Telegram через очередь OutboundQueue.
+        Если очередь выключена (SEND_QUEUE_ENABLED=false), отправляет сразу.
+        :return: Future с результатом отправки.
+        """
+        if self.outbound is not None:
+            return self.outbound.submit(chat_id, text)
+        future: Future = Future()
+        try:
+            future.set_result(self.post_message(chat_id, text))
+        except Exception as e:
+            logger.error(f"Не удалось отправить сообщение в chat={chat_id}: {e}")
+            future.set_exception(e)
+        return future
+
+    def process_update(self, update: Dict[str, Any]) -> None:
+        """
+        Обрабатывает одно обновление: достаёт текстовое сообщение,
+        прогоняет его через handle_message и отправляет ответ.
+        Обновления без текста пропускаются.
+        """
+        # Проверяем, есть ли в обновлении текстовое сообщение
+        if "message" not in update or "text" not in update["message"]:
+            return
+
+        chat_id = self.get_chat_id(update)
+        user_id = self.get_user_id(update)
+        message_text = self.get_message_text(update)
+        self.record_activity(update)
+        try:
+            reply = self.handle_message(message_text, chat_id, user_id)
+        except AuthorizationError as e:
+            reply = str(e)
+
+        if reply == self.SHUTDOWN_COMMAND_REPLY:
+            self.send_message(chat_id, "Бот вимикається…")
+            self.stop()
+        elif reply:
+            self.send_message(chat_id, reply)
+
+    def stop(self) -> None:
+        """Просит цикл run() завершиться после текущего обновления."""
+        self._stop_requested = True
 
     def run(self):
-        update = self.get_last_update()
-        if update:
-            self.last_update_id = update['update_id']
-        else:
-            self.last_update_id = None
-        while True:
-            time.sleep(1.5)
-            update = self.get_last_update()
-            if update and update["update_id"] != self.last_update_id:
-                # Проверяем, есть ли в обновлении текстовое сообщение
-                if "message" in update and "text" in update["message"]:
-
-                    chat_id = self.get_chat_id(update)
-                    user_id = self.get_user_id(update)
-                    message_text = self.get_message_text(update)
-                    reply = self.handle_message(message_text, chat_id, user_id)
-                    if reply == "__SHUTDOWN__":
-                        self.send_message(chat_id, "Бот вимикається…")
-                        import sys
-                        sys.exit(0)
-                    else:
-                        self.send_message(chat_id, reply)
-
-                # ВАЖНО: обновляем ID последнего обновления в любом случае,
+        """
+        Главный цикл long-polling: получает обновления батчами с offset
+        и обрабатывает каждое по порядку. При DISPATCH_WORKERS > 1 обновления
+        передаются в ChatDispatcher: порядок сохраняется внутри чата, чаты идут параллельно.
+        """
+        self._stop_requested = False
+        if config.DISPATCH_WORKERS > 1:
+            self.dispatcher = ChatDispatcher(
+                self.process_update,
+                workers=config.DISPATCH_WORKERS,
+                queue_size=config.DISPATCH_QUEUE_SIZE,
+            )
+        poller = UpdatePoller(
+            self.get_updates,
+            timeout=config.POLL_TIMEOUT,
+            batch_size=config.POLL_BATCH_SIZE,
+            interval=config.POLL_INTERVAL,
+            max_backoff=config.POLL_MAX_BACKOFF,
+        )
+        if self.last_update_id is not None:
+            poller.acknowledge(self.last_update_id)
+        self.prepare_polling()
+        logger.info("Запуск long-polling.")
+        while not self._stop_requested:
+            for update in poller.poll():
+                if self.dispatcher:
+                    self.dispatcher.submit(update)
+                else:
+                    self.process_update(update)
+                # ВАЖНО: подтверждаем обновление в любом случае,
                 # чтобы не зацикливаться на обработке нетекстовых сообщений.
+                poller.acknowledge(update["update_id"])
                 self.last_update_id = update["update_id"]
+                if self._stop_requested:
+                    break
+
+        if self.dispatcher:
+            # Дорабатываем уже принятые обновления
+            self.dispatcher.shutdown(wait=True)
+            self.dispatcher = None
+
+        if self.outbound is not None:
+            # Дожидаемся отправки последних ответов (в том числе "Бот вимикається…")
+            self.outbound.join(timeout=config.SEND_DRAIN_TIMEOUT)
+
+        # Подтверждаем последний батч, чтобы после рестарта не получить /shutdown повторно
+        poller.commit()
+        logger.info("Long-polling остановлен.")
+
+    def run_webhook(self):
+        """
+        Режим webhook: встроенный HTTP-сервер принимает обновления от Telegram,
+        сразу отвечает и передаёт их в ChatDispatcher для фоновой обработки.
+        Без проверки секрета любой, кто достучится до порта, сможет прислать обновление
+        от имени администратора, поэтому без WEBHOOK_SECRET режим не запускается,
+        если только бот сам не регистрирует webhook (тогда секрет генерируется случайно).
+        :raises ValueError: Если не заданы ни WEBHOOK_SECRET, ни WEBHOOK_URL.
+        """
+        secret = config.WEBHOOK_SECRET
+        if not secret:
+            if not config.WEBHOOK_URL:
+                raise ValueError("Для UPDATE_MODE=webhook задайте WEBHOOK_SECRET "
+                                 "(или WEBHOOK_URL, чтобы бот сам зарегистрировал webhook со случайным секретом)")
+            import secrets
+            secret = secrets.token_urlsafe(32)
+            logger.info("WEBHOOK_SECRET не задан: для setWebhook сгенерирован случайный секрет.")
+        self._stop_requested = False
+        self.dispatcher = ChatDispatcher(
+            self.process_update,
+            workers=max(1, config.DISPATCH_WORKERS),
+            queue_size=config.DISPATCH_QUEUE_SIZE,
+        )
+        from bot.webhook import WebhookServer
+        server = WebhookServer(
+            self.dispatcher.submit,
+            host=config.WEBHOOK_HOST,
+            port=config.WEBHOOK_PORT,
+            path=config.WEBHOOK_PATH,
+            secret_token=secret,
+        )
+        server.start()
+        if config.WEBHOOK_URL:
+            self.set_webhook(config.WEBHOOK_URL, secret)
+
+        while not self._stop_requested:
+            time.sleep(0.2)
+
+        server.stop()
+        self.dispatcher.shutdown(wait=True)
+        self.dispatcher = None
+        if self.outbound is not None:
+            self.outbound.join(timeout=config.SEND_DRAIN_TIMEOUT)
+        logger.info("Webhook-режим остановлен.")
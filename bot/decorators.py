@@ -59,8 +59,9 @@ def require_auth(func):
         if user_id == config.ADMIN_ID:
             return func(self, text, chat_id, user_id, *args, **kwargs)
 
-        # 5. Получаем команду из текста сообщения, а не по индексу
-        command = text.split()[0]
+        # 5. Получаем команду из уже разобранного сообщения (ParsedMessage), если оно передано
+        message = kwargs.get("message")
+        command = message.command if message is not None else text.split()[0]
 
         access_result = check_command_access(command, user_id)
 
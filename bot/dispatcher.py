@@ -0,0 +1,110 @@
+# Диспетчер обновлений между поллером и TelegramBot.handle_message.
+# Что делает:
+# - Распределяет обновления по шардам по `chat_id`: все сообщения одного чата
+#   попадают в одну очередь и обрабатываются строго по порядку.
+# - Разные чаты обрабатываются параллельно пулом потоков-воркеров (по одному на шард).
+# - Очереди шардов ограничены: когда воркер не успевает, `submit` блокирует поллер (backpressure).
+# - Отдаёт статистику по глубине очередей и количеству обработанных обновлений; текущая и
+#   максимальная глубина очереди каждого шарда видны в метриках (bot/metrics.py, `/dev stats`).
+
+import queue
+import threading
+from typing import Callable, Any, Dict, List, Optional
+
+from bot.logger.app_logger import logger
+from bot.metrics import MetricsRegistry, registry
+
+# Маркер остановки воркера
+_STOP = object()
+
+
+class ChatDispatcher:
+    """
+    Пул воркеров с шардированием по chat_id.
+    Используются потоки, а не процессы: команды, роли и кеши — общие объекты процесса,
+    а основное время обработки уходит на сетевой ввод-вывод, при котором GIL отпускается.
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], None],
+                 workers: int = 4, queue_size: int = 1000, metrics: MetricsRegistry = registry):
+        """
+        :param handler: Функция обработки одного обновления (например, TelegramBot.process_update).
+        :param workers: Количество шардов (потоков-воркеров).
+        :param queue_size: Максимальная длина очереди одного шарда.
+        :param metrics: Реестр, в котором публикуется глубина очередей шардов.
+        """
+        self.handler = handler
+        self.workers = max(1, workers)
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=queue_size) for _ in range(self.workers)]
+        self._processed: List[int] = [0] * self.workers
+        self._max_depth: List[int] = [0] * self.workers
+        # Глубина читается из очереди при выводе метрик — на submit это ничего не стоит
+        depth = metrics.gauge("bot_dispatch_queue_depth", "Обновления в очереди шарда диспетчера", "shard")
+        max_depth = metrics.gauge("bot_dispatch_queue_max_depth", "Максимальная глубина очереди шарда", "shard")
+        for i, q in enumerate(self._queues):
+            depth.labels(str(i)).set_function(q.qsize)
+            max_depth.labels(str(i)).set_function(lambda i=i: self._max_depth[i])
+        self._threads = [
+            threading.Thread(target=self._worker, args=(i,), name=f"chat-shard-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @staticmethod
+    def chat_id_of(update: Dict[str, Any]) -> int:
+        """Достаёт chat_id из обновления (0 для обновлений без чата)."""
+        return update.get("message", {}).get("chat", {}).get("id", 0)
+
+    def shard_for(self, chat_id: int) -> int:
+        """Номер шарда для чата: один и тот же чат всегда попадает в один шард."""
+        return hash(chat_id) % self.workers
+
+    def submit(self, update: Dict[str, Any], timeout: Optional[float] = None) -> int:
+        """
+        Ставит обновление в очередь шарда его чата.
+        Блокируется, если очередь шарда заполнена.
+        :return: Номер шарда.
+        """
+        shard = self.shard_for(self.chat_id_of(update))
+        q = self._queues[shard]
+        q.put(update, timeout=timeout)
+        depth = q.qsize()
+        if depth > self._max_depth[shard]:
+            self._max_depth[shard] = depth
+        return shard
+
+    def _worker(self, shard: int) -> None:
+        q = self._queues[shard]
+        while True:
+            update = q.get()
+            try:
+                if update is _STOP:
+                    return
+                self.handler(update)
+                self._processed[shard] += 1
+            except Exception as e:
+                # Ошибка в одном обновлении не должна останавливать шард
+                logger.exception(f"Ошибка обработки обновления {update.get('update_id')} в шарде {shard}: {e}")
+            finally:
+                q.task_done()
+
+    def stats(self) -> List[Dict[str, int]]:
+        """Статистика по шардам: текущая и максимальная глубина очереди, обработано обновлений."""
+        return [
+            {"shard": i, "depth": q.qsize(), "max_depth": self._max_depth[i], "processed": self._processed[i]}
+            for i, q in enumerate(self._queues)
+        ]
+
+    def join(self) -> None:
+        """Ждёт, пока все поставленные в очередь обновления будут обработаны."""
+        for q in self._queues:
+            q.join()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Останавливает воркеры после обработки уже поставленных обновлений."""
+        for q in self._queues:
+            q.put(_STOP)
+        if wait:
+            for thread in self._threads:
+                thread.join()
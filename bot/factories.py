@@ -1,12 +1,12 @@
 # Factories.py является центральным "диспетчером" команд
 
-from typing import Optional, Dict
+import logging
+import threading
+from typing import Optional, Dict, Iterable
 from bot.base import BotCommand  # Импортируем базовый класс для type hinting
-from bot.commands.help_menu import HelpMenuCommand
-from bot.commands.command_currency import CurrencyCommand
-from bot.commands.shutdown import ShutdownCommand
-from bot.commands.command_dev import DevCommand
-from bot.commands.command_currency1 import Currency1Command
+from bot.registry import CommandRegistry
+
+logger = logging.getLogger(__name__)
 
 
 # Factory pattern: фабрика для створення команд за ключовим словом
@@ -15,15 +15,13 @@ class CommandFactory:
     Фабрика для управления экземплярами команд.
     Использует словарь для хранения единственного экземпляра каждой команды (Singleton-like),
     чтобы избежать их пересоздания при каждом вызове.
+    Модули команд импортируются лениво — по манифесту bot/commands/manifest.json.
     """
-    # Явно определяем все команды в одном месте для ясности и удобства поддержки.
-    command_map: Dict[str, type[BotCommand]] = {
-        "/help": HelpMenuCommand,
-        "/shutdown": ShutdownCommand,
-        "/currency": CurrencyCommand,
-        "/dev": DevCommand,
-        "/currency1": Currency1Command,
-    }
+    # Все штатные команды описаны в манифесте; модуль команды импортируется при первом вызове.
+    registry = CommandRegistry()
+
+    # Команды, зарегистрированные напрямую классом (имеют приоритет над манифестом).
+    command_map: Dict[str, type[BotCommand]] = {}
 
     # 2. Словарь для хранения ЕДИНСТВЕННЫХ экземпляров команд.
     # Он будет лениво заполняться при первом запросе команды.
@@ -38,24 +36,52 @@ class CommandFactory:
         и сохранен для последующего переиспользования.
         """
         base_command = command_name.split(' ')[0]
-        # CommandClass = CommandFactory.commands_map.get(base_command)
-        # if CommandClass:
-        #     return CommandClass()
 
         # Проверяем, есть ли у нас уже готовый экземпляр.
-        if base_command in CommandFactory.command_instances:
-            return CommandFactory.command_instances[base_command]
+        instance = CommandFactory.command_instances.get(base_command)
+        if instance is not None:
+            return instance
 
-        # 4. Если экземпляра нет, ищем класс команды.
-        CommandClass = CommandFactory.command_map.get(base_command)
+        # 4. Если экземпляра нет, ищем класс команды (при необходимости импортируя модуль).
+        CommandClass = CommandFactory.command_map.get(base_command) or CommandFactory.registry.get_class(base_command)
         if CommandClass:
-            # 5. Создаем экземпляр ОДИН РАЗ и сохраняем его.
-            instance = CommandClass()
-            CommandFactory.command_instances[base_command] = instance
-            return instance
+            # 5. Создаем экземпляр и сохраняем его. При гонке с фоновым прогревом
+            # остаётся тот экземпляр, который был сохранён первым.
+            return CommandFactory.command_instances.setdefault(base_command, CommandClass())
 
         return None
 
+    @staticmethod
+    def describe_commands() -> Dict[str, str]:
+        """
+        Описания всех доступных команд для /help: из манифеста (без импорта модулей)
+        и из docstring классов, зарегистрированных напрямую.
+        """
+        descriptions = {name: spec.doc for name, spec in CommandFactory.registry.specs.items()}
+        for name, CommandClass in CommandFactory.command_map.items():
+            descriptions[name] = " ".join((CommandClass.__doc__ or "").split())
+        return descriptions
+
+    @staticmethod
+    def warm(command_names: Iterable[str]) -> threading.Thread:
+        """
+        Создаёт указанные команды в фоновом потоке, чтобы первый пользователь
+        не ждал импорта модулей и инициализации (например, CurrencyHelper).
+        """
+        names = [name for name in command_names if name]
+
+        def _warm():
+            for name in names:
+                try:
+                    if CommandFactory.create_command(name) is None:
+                        logger.warning(f"Прогрев: команда {name} не найдена.")
+                except Exception as e:
+                    logger.error(f"Прогрев команды {name} не удался: {e}")
+
+        thread = threading.Thread(target=_warm, name="command-warmup", daemon=True)
+        thread.start()
+        return thread
+
     @staticmethod
     def get_available_commands() -> dict[str, BotCommand]:
         """
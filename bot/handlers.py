@@ -1,26 +1,34 @@
-# Chain of Responsibility pattern: Ланцюг обробників
+# Middleware конвейера сообщений (раньше — Chain of Responsibility: Ланцюг обробників).
+# Порядок и применимость этапов задаются в MiddlewarePipeline (bot/middleware.py).
 
+import logging
+from typing import Optional
+
+from bot.censorship import CensorshipFilter
+from bot.config import config
 from bot.logger.app_logger import logger # Импортируем настроенный логгер `app_logger.py`
+from bot.message import ParsedMessage
+from bot.middleware import Middleware
 
-class Handler:
-    def __init__(self):
-        self._next_handler = None
+# Отдельный логгер для записей о каждом запросе: его можно проредить через LOG_SAMPLING=bot.requests=0.1
+request_logger = logging.getLogger("bot.requests")
 
-    def set_next(self, handler):
-        self._next_handler = handler
-        return handler
+# Конкретний обробник — фільтрування мату
+class CensorshipHandler(Middleware):
+    """Блокирует сообщения со словами из словарей цензуры (см. bot/censorship.py)."""
 
-    def handle(self, text, chat_id, user_id):
-        if self._next_handler:
-            return self._next_handler.handle(text, chat_id, user_id)
-        return None
+    def __init__(self, censor: Optional[CensorshipFilter] = None):
+        self.censor = censor or CensorshipFilter(
+            config.CENSORSHIP_WORDLIST_DIR,
+            reload_interval=config.CENSORSHIP_RELOAD_INTERVAL,
+        )
 
-# Конкретний обробник — для прикладу: фільтрування мату
-class CensorshipHandler(Handler):
-    def handle(self, text, chat_id, user_id):
-        if "badword" in text:
+    def process(self, message: ParsedMessage, chat_id: int, user_id: int) -> Optional[str]:
+        term = self.censor.find(message.text)
+        if term is not None:
+            logger.info(f"[Censorship] user={user_id}, chat={chat_id}: сообщение заблокировано ('{term}')")
             return "Message blocked due to bad language!"
-        return super().handle(text, chat_id, user_id)
+        return None
 
 # # Ще один — логування
 # class LoggingHandler(Handler):
@@ -28,9 +36,9 @@ class CensorshipHandler(Handler):
 #         print(f"[Handler LOG] user={user_id}, chat={chat_id}, text={text}")
 #         return super().handle(text, chat_id, user_id)
 
-    # Класс `LoggingHandler` - это "клей" между цепочкой обработки запросов и системой логирования.
+    # Класс `LoggingHandler` - это "клей" между конвейером обработки запросов и системой логирования.
     # Он должен оставаться вместе с другими обработчиками.
-class LoggingHandler(Handler):
-    def handle(self, text, chat_id, user_id):
-        logger.info(f"[Request] user={user_id}, chat={chat_id}, text={text}")
-        return super().handle(text, chat_id, user_id)
+class LoggingHandler(Middleware):
+    def process(self, message: ParsedMessage, chat_id: int, user_id: int) -> Optional[str]:
+        request_logger.info(f"[Request] user={user_id}, chat={chat_id}, text={message.text}")
+        return None
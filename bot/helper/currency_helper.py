@@ -18,7 +18,22 @@ import os
 import requests
 from dotenv import load_dotenv
 import json
+import logging
+import tempfile
+import threading
+import time
 from pathlib import Path
+from typing import Optional
+
+from bot.helper.lru_cache import LRUCache, MISSING
+from bot.helper.rate_history import RateHistory
+from bot.helper.rate_matrix import RateMatrix, RateSnapshot
+from bot.helper.currency_refresher import CurrencyRefresher
+from bot.helper.single_flight import SingleFlight
+from bot.metrics import UPSTREAM_DEDUPLICATED, UPSTREAM_SECONDS
+from bot.transport import HttpTransport, get_transport
+
+logger = logging.getLogger(__name__)
 
 
 class CurrencyHelper:
@@ -28,9 +43,33 @@ class CurrencyHelper:
     методы для получения информации о курсах и доступных валютах.
     """
 
-    def __init__(self):
+    # Общий экземпляр для всех команд, чтобы кеш курсов был один на процесс
+    _shared: Optional['CurrencyHelper'] = None
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'CurrencyHelper':
+        """
+        Возвращает общий экземпляр хелпера, создавая его при первом вызове.
+        :raises ValueError: Если не заданы переменные окружения API (как и конструктор).
+        """
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def __init__(self, transport: Optional[HttpTransport] = None, rate_ttl: Optional[float] = None,
+                 background_refresh: Optional[bool] = None, history_dir: Optional[str] = None):
         """
         Инициализирует хелпер, загружая конфигурацию из .env файла.
+        :param transport: HTTP-транспорт; по умолчанию общий keep-alive пул бота.
+        :param rate_ttl: Сколько секунд курс пары считается свежим (по умолчанию CURRENCY_RATE_TTL или 60).
+        :param background_refresh: Обновлять курсы и список валют в фоновом потоке
+                                   (по умолчанию CURRENCY_BACKGROUND_REFRESH или True).
+                                   Поток запускается явно через start_background_refresh().
+        :param history_dir: Папка локальной истории курсов (по умолчанию CURRENCY_HISTORY_DIR
+                            или 'rate_history'; пустая строка отключает историю).
         """
         load_dotenv()
         self.base_url = os.getenv("CURRENCY_API_URL")
@@ -39,32 +78,100 @@ class CurrencyHelper:
         if not self.base_url or not self.api_key:
             raise ValueError("Переменные CURRENCY_API_URL и CURRENCY_API_KEY должны быть установлены в .env файле")
 
+        self.transport = transport or get_transport()
+
+        # Кеш курсов по паре валют: (FROM, TO) -> курс за 1 единицу FROM.
+        # Любая сумма пересчитывается локально, поэтому кеш не зависит от amount.
+        if rate_ttl is None:
+            rate_ttl = float(os.getenv("CURRENCY_RATE_TTL", "60"))
+        self.rate_ttl = rate_ttl
+        self.rate_cache = LRUCache(maxsize=4096, ttl=rate_ttl)
+        self.upstream_calls = 0
+        self.single_flight = SingleFlight(on_deduplicated=lambda key: UPSTREAM_DEDUPLICATED.labels(key[0]).inc())
+
+        # Матрица кросс-курсов из одного снимка котировок к базовой валюте.
+        # Если снимок получить не удалось (например, тариф API без `live`),
+        # используется кеш отдельных пар выше.
+        self.base_currency = os.getenv("CURRENCY_BASE", "USD").upper()
+        self.rate_matrix = RateMatrix()
+        self._snapshot_retry_at = 0.0
+
+        # Каждый полученный снимок дописывается в локальную историю курсов
+        if history_dir is None:
+            history_dir = os.getenv("CURRENCY_HISTORY_DIR", "rate_history")
+        self.rate_history: Optional[RateHistory] = RateHistory(history_dir) if history_dir else None
+
+        # Фоновое обновление: пользовательские запросы не ждут обновления кеша
+        if background_refresh is None:
+            background_refresh = os.getenv("CURRENCY_BACKGROUND_REFRESH", "true").lower() == "true"
+        self.background_refresh = background_refresh
+        self.refresher: Optional[CurrencyRefresher] = None
+
         # Используем существующий currency.json как локальный кеш для списка валют
+        # (файл читается лениво — при первой проверке валюты, а не при создании хелпера)
         self.currencies_cache_path = Path(__file__).parent / 'currency.json'
-        self.currencies = self._load_currencies_from_cache()
+        self._currencies: Optional[dict] = None
+
+    def start_background_refresh(self) -> None:
+        """
+        Запускает фоновое обновление, если оно включено (вызывается из main.py при старте бота).
+        Период обновления курсов — CURRENCY_REFRESH_INTERVAL (по умолчанию 3600 с).
+        """
+        if not self.background_refresh or self.refresher is not None:
+            return
+        self.refresher = CurrencyRefresher(
+            self, rates_interval=float(os.getenv("CURRENCY_REFRESH_INTERVAL", "3600")))
+        self.refresher.start()
+
+    def stop_background_refresh(self) -> None:
+        """Останавливает фоновое обновление; дальше курсы обновляются синхронно по запросу."""
+        refresher, self.refresher = self.refresher, None
+        if refresher is not None:
+            refresher.stop()
 
     def _make_request(self, endpoint, params=None):
         """
         Внутренний метод для выполнения запросов к API.
+        Одинаковые одновременные запросы (тот же endpoint и параметры) схлопываются:
+        к API уходит один запрос, остальные ждут и получают его результат.
+        Возвращаемый словарь общий для всех ожидающих — его нельзя изменять.
         :param endpoint: Конечная точка API (например, 'convert', 'list').
         :param params: Словарь с параметрами запроса.
         :return: JSON-ответ от API в виде словаря или None при ошибке.
         """
         if params is None:
             params = {}
+        key = (endpoint, tuple(sorted(params.items())))
+        return self.single_flight.do(key, lambda: self._fetch(endpoint, params))
 
+    def _fetch(self, endpoint, params):
+        """Выполняет один запрос к API (без схлопывания)."""
         # Добавляем ключ API к каждому запросу
-        params['access_key'] = self.api_key
+        params = {**params, 'access_key': self.api_key}
         url = f"{self.base_url}/{endpoint}"
 
+        started = time.perf_counter()
         try:
-            response = requests.get(url, params=params)
+            self.upstream_calls += 1
+            response = self.transport.get(url, params=params)
             response.raise_for_status()  # Вызовет исключение для кодов ошибок 4xx/5xx
             return response.json()
         except requests.exceptions.RequestException as e:
-            # В реальном приложении здесь стоит добавить логирование
-            print(f"Ошибка при запросе к API: {e}")
+            logger.error(f"Ошибка при запросе к API: {e}")
             return None
+        finally:
+            UPSTREAM_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
+
+    @property
+    def currencies(self) -> dict:
+        """Словарь { "USD": "United States Dollar", ... }; загружается из currency.json при первом обращении."""
+        if self._currencies is None:
+            self._currencies = self._load_currencies_from_cache()
+        return self._currencies
+
+    @currencies.setter
+    def currencies(self, value: dict) -> None:
+        self._currencies = value
 
     def _load_currencies_from_cache(self):
         """Загружает список кодов валют из локального файла currency.json."""
@@ -79,41 +186,163 @@ class CurrencyHelper:
     def is_valid_currency(self, currency_code: str) -> bool:
         """
         Проверяет, является ли код валюты валидным, используя локальный кеш.
-        Если кеш пуст, пытается его обновить через API.
+        Если кеш пуст, просит фоновый поток обновить его, а пока сверяется
+        с валютами из снимка курсов. При выключенном фоновом обновлении обновляет кеш сразу.
         :param currency_code: Трехбуквенный код валюты (например, 'USD').
         :return: True, если валюта существует, иначе False.
         """
+        code = currency_code.upper()
         if not self.currencies:
-            self.update_currencies_cache()
-        return currency_code.upper() in self.currencies
+            if self.refresher is None:
+                self.update_currencies_cache()
+            else:
+                self.refresher.request_refresh(currencies=True)
+                snapshot = self.rate_matrix.snapshot
+                return snapshot is not None and code in snapshot.index
+        return code in self.currencies
+
+    def refresh_rate_snapshot(self) -> bool:
+        """
+        Запрашивает котировки всех валют к базовой одним вызовом `live`,
+        атомарно подменяет матрицу кросс-курсов и дописывает снимок в историю.
+        :return: True, если снимок обновлён.
+        """
+        data = self._make_request('live', params={'source': self.base_currency})
+        if not data or not data.get('success') or not data.get('quotes'):
+            return False
+        snapshot = RateSnapshot.from_quotes(data.get('source', self.base_currency), data['quotes'],
+                                            data.get('timestamp'))
+        self.rate_matrix.update(snapshot)
+        if self.rate_history is not None:
+            try:
+                self.rate_history.append(snapshot)
+            except OSError as e:
+                logger.error(f"Не удалось записать снимок в историю курсов: {e}")
+        return True
+
+    def _fresh_snapshot(self) -> Optional[RateSnapshot]:
+        """
+        Снимок курсов для ответа пользователю.
+        С фоновым обновлением — stale-while-revalidate: устаревший снимок отдаётся сразу,
+        а фоновый поток просится его обновить. Без фонового обновления снимок обновляется
+        синхронно (не чаще раза в TTL при сбоях).
+        """
+        snapshot = self.rate_matrix.snapshot
+        if snapshot is not None and snapshot.age() <= self.rate_ttl:
+            return snapshot
+        if self.refresher is not None:
+            self.refresher.request_refresh()
+            return snapshot
+        now = time.monotonic()
+        if now >= self._snapshot_retry_at:
+            if not self.refresh_rate_snapshot():
+                self._snapshot_retry_at = now + self.rate_ttl
+            snapshot = self.rate_matrix.snapshot
+        if snapshot is not None and snapshot.age() <= self.rate_ttl:
+            return snapshot
+        return None
+
+    def get_rate(self, from_currency: str, to_currency: str):
+        """
+        Возвращает курс пары: O(1) поиск в матрице кросс-курсов,
+        а если валюты в снимке нет — из кеша пар или одним запросом к API.
+        :return: Пара (курс, возраст курса в секундах) или (None, ответ API с ошибкой).
+        """
+        pair = (from_currency.upper(), to_currency.upper())
+        if pair[0] == pair[1]:
+            return 1.0, 0.0
+
+        snapshot = self._fresh_snapshot()
+        if snapshot is not None:
+            rate = snapshot.rate(*pair)
+            if rate is not None:
+                return rate, snapshot.age()
+
+        rate, age = self.rate_cache.get_with_age(pair)
+        if rate is not MISSING:
+            return rate, age
+
+        data = self._make_request('convert', params={'from': pair[0], 'to': pair[1], 'amount': 1})
+        if not data or not data.get('success') or data.get('result') is None:
+            return None, data
+        rate = float(data['result'])
+        self.rate_cache.set(pair, rate)
+        # Обратный курс получаем бесплатно
+        if rate:
+            self.rate_cache.set((pair[1], pair[0]), 1 / rate)
+        return rate, 0.0
 
     def convert(self, from_currency: str, to_currency: str, amount: float = 1.0):
         """
         Конвертирует сумму из одной валюты в другую.
+        Курс берётся из кеша (или один раз запрашивается у API), сумма считается локально.
         :param from_currency: Код исходной валюты.
         :param to_currency: Код целевой валюты.
         :param amount: Сумма для конвертации.
-        :return: Словарь с результатом конвертации или None в случае ошибки.
+        :return: Словарь в формате ответа API ('success', 'result', 'info.rate')
+                 с дополнительным полем 'rate_age' (возраст курса в секундах),
+                 либо ответ API с ошибкой / None при ошибке сети.
+        """
+        rate, age_or_error = self.get_rate(from_currency, to_currency)
+        if rate is None:
+            return age_or_error
+        return {
+            'success': True,
+            'result': rate * amount,
+            'info': {'rate': rate},
+            'rate_age': age_or_error,
+        }
+
+    def convert_many(self, from_codes, to_codes, amounts):
         """
-        params = {
-            'from': from_currency.upper(),
-            'to': to_currency.upper(),
-            'amount': amount
+        Векторизованная конвертация пачки сумм по текущему снимку курсов.
+        :return: NumPy-массив результатов (NaN для неизвестных валют) или None, если снимка нет.
+        """
+        snapshot = self._fresh_snapshot()
+        if snapshot is None:
+            return None
+        return snapshot.convert_many(from_codes, to_codes, amounts)
+
+    @staticmethod
+    def describe_rate_age(age: Optional[float]) -> str:
+        """Человекочитаемый возраст курса для ответа пользователю."""
+        if not age or age < 1:
+            return "курс только что обновлён"
+        if age < 60:
+            return f"курс обновлён {int(age)} с назад"
+        return f"курс обновлён {int(age // 60)} мин назад"
+
+    def cache_stats(self) -> dict:
+        """Статистика кеша курсов и количество запросов к внешнему API."""
+        snapshot = self.rate_matrix.snapshot
+        return {
+            **self.rate_cache.stats(),
+            'upstream_calls': self.upstream_calls,
+            'deduplicated_calls': self.single_flight.deduplicated,
+            'snapshot_currencies': len(snapshot.codes) if snapshot else 0,
+            'snapshot_age': snapshot.age() if snapshot else None,
         }
-        return self._make_request('convert', params=params)
 
     def update_currencies_cache(self):
         """
         Обновляет локальный кеш списка валют (currency.json), запрашивая данные из API.
+        Файл записывается атомарно: во временный файл рядом и затем rename,
+        поэтому читатель никогда не увидит наполовину записанный JSON.
         """
-        print("Обновление кеша валют из API...")
+        logger.info("Обновление кеша валют из API...")
         data = self._make_request('list')
         if data and data.get('success'):
-            # Записываем полный ответ API в файл
-            with open(self.currencies_cache_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # Записываем полный ответ API во временный файл и подменяем им кеш
+            fd, tmp_path = tempfile.mkstemp(dir=self.currencies_cache_path.parent, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.currencies_cache_path)
+            except OSError as e:
+                os.unlink(tmp_path)
+                logger.error(f"Не удалось записать кеш валют: {e}")
             self.currencies = data.get('currencies', {})
-            print("Кеш валют успешно обновлен.")
+            logger.info("Кеш валют успешно обновлен.")
             return True
-        print("Не удалось обновить кеш валют.")
+        logger.warning("Не удалось обновить кеш валют.")
         return False
\ No newline at end of file
@@ -0,0 +1,124 @@
+# Фоновое обновление курсов и списка валют (stale-while-revalidate).
+# Что делает:
+# - В отдельном потоке по расписанию обновляет снимок курсов (CurrencyHelper.refresh_rate_snapshot)
+#   и список валют (CurrencyHelper.update_currencies_cache).
+# - Пользовательские запросы никогда не ждут обновления: они получают текущие (возможно, устаревшие)
+#   данные и лишь будят поток через `request_refresh()`.
+# - Бережёт квоту внешнего API: курсы запрашиваются не чаще раза в `rates_interval`,
+#   а без пользовательских запросов за прошедший интервал плановое обновление курсов
+#   не выполняется вовсе, пока его не попросят снова.
+# - При сбоях внешнего API увеличивает паузу между попытками экспоненциально.
+
+import logging
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Task:
+    """Периодическая задача с экспоненциальной паузой после ошибок."""
+
+    def __init__(self, name: str, func, interval: float, base_backoff: float, max_backoff: float):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.next_run = 0.0
+        self.last_success = float("-inf")
+        self.failures = 0
+
+    def run(self, now: float) -> None:
+        try:
+            ok = bool(self.func())
+        except Exception as e:
+            logger.error(f"Фоновое обновление '{self.name}' упало: {e}")
+            ok = False
+        if ok:
+            self.failures = 0
+            self.last_success = now
+            self.next_run = now + self.interval
+        else:
+            self.failures += 1
+            delay = min(self.max_backoff, self.base_backoff * 2 ** (self.failures - 1))
+            self.next_run = now + delay
+            logger.warning(f"Фоновое обновление '{self.name}' не удалось, повтор через {delay:.0f} с.")
+
+
+class CurrencyRefresher:
+    """Поток, поддерживающий курсы и список валют CurrencyHelper в актуальном состоянии."""
+
+    def __init__(self, helper, rates_interval: float = 3600.0, currencies_interval: float = 24 * 3600,
+                 base_backoff: float = 5.0, max_backoff: float = 600.0):
+        """
+        :param helper: CurrencyHelper, данные которого обновляются.
+        :param rates_interval: Минимальный период обновления снимка курсов, секунды
+                               (по умолчанию час: не больше 24 вызовов `live` в сутки).
+        :param currencies_interval: Период обновления списка валют, секунды.
+        :param base_backoff: Пауза после первой ошибки, секунды.
+        :param max_backoff: Максимальная пауза между попытками после ошибок, секунды.
+        """
+        self.helper = helper
+        self.rates = _Task("rates", helper.refresh_rate_snapshot, rates_interval, base_backoff, max_backoff)
+        self.currencies = _Task("currencies", helper.update_currencies_cache, currencies_interval,
+                                base_backoff, max_backoff)
+        # Если список валют уже есть в currency.json, не запрашиваем его сразу при старте
+        if helper.currencies_cache_path.exists():
+            self.currencies.next_run = time.monotonic() + currencies_interval
+        # Были ли запросы курсов с прошлого обновления; первое обновление при старте — всегда
+        self._rates_wanted = True
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Запускает фоновый поток (повторный вызов ничего не делает)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="currency-refresher", daemon=True)
+        self._thread.start()
+
+    def request_refresh(self, rates: bool = True, currencies: bool = False) -> None:
+        """
+        Просит обновить данные как можно скорее и сразу возвращается.
+        Курсы обновляются не раньше, чем через `rates_interval` после прошлого успешного
+        обновления; пауза после ошибок не сокращается, чтобы не долбить упавший API.
+        :param rates: Обновить снимок курсов.
+        :param currencies: Обновить список валют (нужно только если его кеш пуст).
+        """
+        if rates:
+            self._rates_wanted = True
+            if self.rates.failures == 0:
+                self.rates.next_run = min(self.rates.next_run, self.rates.last_success + self.rates.interval)
+        if currencies and self.currencies.failures == 0:
+            self.currencies.next_run = 0.0
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now >= self.rates.next_run:
+                if self._rates_wanted:
+                    self._rates_wanted = False
+                    self.rates.run(now)
+                    if self.rates.failures:
+                        # Повтор после ошибки не требует нового запроса пользователя
+                        self._rates_wanted = True
+                else:
+                    # Курсы никто не спрашивал — ждём request_refresh вместо планового вызова
+                    self.rates.next_run = float("inf")
+            if now >= self.currencies.next_run:
+                self.currencies.run(now)
+            wait = min(self.rates.next_run, self.currencies.next_run) - time.monotonic()
+            self._wake.wait(max(0.0, wait))
+            self._wake.clear()
+
+    def stop(self) -> None:
+        """Останавливает фоновый поток."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
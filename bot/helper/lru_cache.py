@@ -0,0 +1,95 @@
+# Ограниченный LRU-кеш с необязательным TTL.
+# Что делает:
+# - Хранит не больше `maxsize` записей; при переполнении вытесняет самую давно использованную.
+# - Если задан `ttl`, запись считается устаревшей через `ttl` секунд после записи.
+# - Считает попадания, промахи, вытеснения и устаревания для наблюдаемости.
+# - Потокобезопасен: все операции выполняются под одной блокировкой.
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Маркер отсутствия значения (None может быть валидным закешированным значением)
+MISSING = object()
+
+
+class LRUCache:
+    """LRU-кеш фиксированного размера с необязательным временем жизни записей."""
+
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None):
+        """
+        :param maxsize: Максимальное количество записей (ограничивает потребление памяти).
+        :param ttl: Время жизни записи в секундах (None — без ограничения).
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (value, stored_at)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """Возвращает значение и отмечает запись как недавно использованную."""
+        value, _ = self.get_with_age(key)
+        return default if value is MISSING else value
+
+    def get_with_age(self, key: Hashable) -> tuple:
+        """
+        Как get, но дополнительно возвращает возраст записи в секундах.
+        :return: (значение, возраст) или (MISSING, None).
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING, None
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if self.ttl is not None and age > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING, None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value, age
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Записывает значение, вытесняя самые старые записи при переполнении."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удаляет запись, если она есть."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Полностью очищает кеш (счётчики сохраняются)."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики кеша и доля попаданий."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,214 @@
+# Локальная история курсов валют (временной ряд снимков).
+# Что делает:
+# - Каждый снимок курсов (RateSnapshot) дописывается одной строкой в конец файлов:
+#   `timestamps.i8` (unix time, int64) и `rates.f4` (по колонке float32 на валюту —
+#   сколько единиц валюты стоит 1 единица базовой). Список колонок хранится в `columns.json`.
+# - Дозапись — это один write() в конец файла, без перезаписи старых данных.
+# - Чтение идёт через np.memmap: поиск диапазона по времени — двоичный поиск (searchsorted),
+#   поэтому запросы остаются быстрыми и на годах поминутных данных.
+# - Статистика (min/max/среднее/волатильность/скользящее среднее) считается векторно в NumPy.
+
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bot.helper.rate_matrix import RateSnapshot
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_DTYPE = np.dtype("<i8")
+RATE_DTYPE = np.dtype("<f4")
+
+# Единицы для периодов вида "30d", "12h"
+PERIOD_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400, "y": 365 * 86400}
+
+
+def parse_period(text: str) -> int:
+    """
+    Переводит период вида '90m', '12h', '30d', '2w', '1y' в секунды.
+    :raises ValueError: Если формат периода не распознан.
+    """
+    text = text.strip().lower()
+    if len(text) < 2 or text[-1] not in PERIOD_UNITS or not text[:-1].isdigit() or int(text[:-1]) <= 0:
+        raise ValueError(f"Неверный период '{text}'. Примеры: 90m, 12h, 30d, 2w, 1y.")
+    return int(text[:-1]) * PERIOD_UNITS[text[-1]]
+
+
+class RateHistory:
+    """Append-only хранилище снимков курсов с колонкой на каждую валюту."""
+
+    def __init__(self, directory: str):
+        """
+        :param directory: Папка с файлами истории (создаётся при первой записи).
+        """
+        self.directory = Path(directory)
+        self._timestamps_path = self.directory / "timestamps.i8"
+        self._rates_path = self.directory / "rates.f4"
+        self._columns_path = self.directory / "columns.json"
+        self._lock = threading.Lock()
+        self.columns: Tuple[str, ...] = ()
+        self.column_index: Dict[str, int] = {}
+        self._rows = 0
+        self._last_timestamp: Optional[int] = None
+        # Валюты из снимков, для которых нет колонки (о каждой предупреждаем один раз)
+        self._dropped: set = set()
+        self._load()
+
+    def _load(self) -> None:
+        """Читает список колонок и отбрасывает недописанный хвост после сбоя."""
+        try:
+            with open(self._columns_path, 'r', encoding='utf-8') as f:
+                self._set_columns(json.load(f)["columns"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return
+        if not self.columns:
+            # Пустой список колонок — истории нет, данные перезапишутся при первой записи
+            logger.warning(f"История курсов: пустой список колонок в '{self._columns_path}', история не читается.")
+            return
+        row_bytes = len(self.columns) * RATE_DTYPE.itemsize
+        ts_rows = self._file_size(self._timestamps_path) // TIMESTAMP_DTYPE.itemsize
+        rate_rows = self._file_size(self._rates_path) // row_bytes
+        rows = min(ts_rows, rate_rows)
+        if rows != ts_rows or rows != rate_rows or self._file_size(self._rates_path) % row_bytes:
+            logger.warning(f"История курсов: отброшен недописанный хвост, осталось {rows} строк.")
+            os.truncate(self._timestamps_path, rows * TIMESTAMP_DTYPE.itemsize)
+            os.truncate(self._rates_path, rows * row_bytes)
+        self._rows = rows
+        if rows:
+            self._last_timestamp = int(self._timestamps()[-1])
+
+    @staticmethod
+    def _file_size(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _set_columns(self, columns: Sequence[str]) -> None:
+        self.columns = tuple(columns)
+        self.column_index = {code: i for i, code in enumerate(self.columns)}
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def append(self, snapshot: RateSnapshot, timestamp: Optional[int] = None) -> bool:
+        """
+        Дописывает снимок в конец истории.
+        Колонки фиксируются по первому снимку; валюты, которых нет в снимке, пишутся как NaN,
+        новые валюты (которых нет в колонках) не сохраняются — о каждой пишется предупреждение в лог.
+        :param timestamp: Время снимка; по умолчанию время котировок из API или текущее.
+        :return: False, если снимок не новее последней строки (повторные котировки не пишутся).
+        """
+        if timestamp is None:
+            timestamp = snapshot.timestamp or time.time()
+        timestamp = int(timestamp)
+        # Сколько единиц каждой валюты стоит 1 единица базовой валюты снимка
+        units = snapshot.matrix[snapshot.index[snapshot.base]]
+
+        with self._lock:
+            if self._last_timestamp is not None and timestamp <= self._last_timestamp:
+                return False
+            if not self.columns:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                # Строки без колонок прочитать нельзя: начинаем файлы данных заново
+                for path in (self._rates_path, self._timestamps_path):
+                    if path.exists():
+                        os.truncate(path, 0)
+                self._set_columns(snapshot.codes)
+                tmp_path = self._columns_path.with_suffix(".tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({"columns": list(self.columns)}, f)
+                os.replace(tmp_path, self._columns_path)
+
+            dropped = [code for code in snapshot.index if code not in self.column_index
+                       and code not in self._dropped]
+            if dropped:
+                self._dropped.update(dropped)
+                logger.warning(f"История курсов: валют {', '.join(sorted(dropped))} нет в колонках "
+                               f"истории, их курсы не сохраняются.")
+
+            row = np.full(len(self.columns), np.nan, dtype=RATE_DTYPE)
+            for code, i in snapshot.index.items():
+                column = self.column_index.get(code)
+                if column is not None:
+                    row[column] = units[i]
+
+            # Сначала строка курсов, потом время: при сбое между записями хвост отбрасывается в _load
+            with open(self._rates_path, 'ab') as f:
+                f.write(row.tobytes())
+            with open(self._timestamps_path, 'ab') as f:
+                f.write(np.array([timestamp], dtype=TIMESTAMP_DTYPE).tobytes())
+            self._rows += 1
+            self._last_timestamp = timestamp
+        return True
+
+    def _timestamps(self) -> np.ndarray:
+        return np.memmap(self._timestamps_path, dtype=TIMESTAMP_DTYPE, mode='r', shape=(self._rows,))
+
+    def _rates(self) -> np.ndarray:
+        return np.memmap(self._rates_path, dtype=RATE_DTYPE, mode='r', shape=(self._rows, len(self.columns)))
+
+    def series(self, from_currency: str, to_currency: str, start: Optional[float] = None,
+               end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ряд курса пары за период [start, end].
+        :return: (времена, курсы) — массивы NumPy; пустые, если данных или валют нет.
+        """
+        with self._lock:
+            rows = self._rows
+        i = self.column_index.get(from_currency.upper())
+        j = self.column_index.get(to_currency.upper())
+        if not rows or i is None or j is None:
+            return np.empty(0, dtype=TIMESTAMP_DTYPE), np.empty(0, dtype=np.float64)
+
+        timestamps = self._timestamps()[:rows]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = rows if end is None else int(np.searchsorted(timestamps, end, side='right'))
+        window = self._rates()[lo:hi]
+        # Кросс-курс: units[to] / units[from]
+        values = window[:, j].astype(np.float64) / window[:, i].astype(np.float64)
+        times = np.array(timestamps[lo:hi])
+        valid = np.isfinite(values)
+        return times[valid], values[valid]
+
+    def stats(self, from_currency: str, to_currency: str, period: float,
+              moving_window: int = 24, now: Optional[float] = None) -> Optional[Dict[str, float]]:
+        """
+        Статистика курса пары за последние `period` секунд.
+        Волатильность — стандартное отклонение логарифмических доходностей между соседними точками.
+        :param moving_window: Количество последних точек для скользящего среднего.
+        :return: Словарь показателей или None, если данных нет.
+        """
+        end = time.time() if now is None else now
+        times, values = self.series(from_currency, to_currency, end - period, end)
+        if not len(values):
+            return None
+        returns = np.diff(np.log(values))
+        return {
+            "points": int(len(values)),
+            "first": float(values[0]),
+            "last": float(values[-1]),
+            "min": float(values.min()),
+            "max": float(values.max()),
+            "mean": float(values.mean()),
+            "change_pct": float((values[-1] / values[0] - 1) * 100),
+            "volatility_pct": float(returns.std() * 100) if len(returns) else 0.0,
+            "moving_average": float(values[-moving_window:].mean()),
+            "since": int(times[0]),
+        }
+
+    def sample(self, from_currency: str, to_currency: str, period: float, points: int = 10,
+               now: Optional[float] = None) -> List[Tuple[int, float]]:
+        """Равномерно прореженный ряд курса пары за период (для вывода в чат)."""
+        end = time.time() if now is None else now
+        times, values = self.series(from_currency, to_currency, end - period, end)
+        if not len(values):
+            return []
+        picks = np.unique(np.linspace(0, len(values) - 1, num=min(points, len(values))).astype(np.intp))
+        return [(int(times[k]), float(values[k])) for k in picks]
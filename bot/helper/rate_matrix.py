@@ -0,0 +1,89 @@
+# Матрица кросс-курсов, построенная из одного снимка котировок.
+# Что делает:
+# - Берёт котировки всех валют к одной базовой (ответ `live`: {"USDEUR": 0.92, ...})
+#   и строит NumPy-матрицу M, где M[i, j] — сколько единиц валюты j стоит 1 единица валюты i.
+# - Любая пара from→to — это O(1) поиск по индексу, без запросов к API.
+# - Пакетная конвертация векторизована (fancy indexing по массивам индексов).
+# - Новый снимок подменяет старый атомарно: читатели всегда видят целую матрицу.
+
+import time
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+
+class RateSnapshot:
+    """Неизменяемый снимок курсов: коды валют, их индексы и матрица кросс-курсов."""
+
+    __slots__ = ("base", "codes", "index", "matrix", "fetched_at", "timestamp")
+
+    def __init__(self, base: str, units: Dict[str, float], timestamp: Optional[int] = None):
+        """
+        :param base: Базовая валюта снимка.
+        :param units: Сколько единиц каждой валюты стоит 1 единица базовой (для base — 1.0).
+        :param timestamp: Время котировок по данным API (unix time).
+        """
+        self.base = base
+        units = {code: value for code, value in units.items() if value and value > 0}
+        units[base] = 1.0
+        self.codes = tuple(sorted(units))
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        vector = np.array([units[code] for code in self.codes], dtype=np.float64)
+        # M[i, j] = units[j] / units[i]
+        self.matrix = np.outer(1.0 / vector, vector)
+        self.matrix.setflags(write=False)
+        self.fetched_at = time.monotonic()
+        self.timestamp = timestamp
+
+    @classmethod
+    def from_quotes(cls, base: str, quotes: Dict[str, float], timestamp: Optional[int] = None) -> 'RateSnapshot':
+        """Строит снимок из котировок вида {"USDEUR": 0.92} (ключ = база + код)."""
+        base = base.upper()
+        units = {key[len(base):]: float(value) for key, value in quotes.items() if key.startswith(base)}
+        return cls(base, units, timestamp)
+
+    def age(self) -> float:
+        """Возраст снимка в секундах."""
+        return time.monotonic() - self.fetched_at
+
+    def rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """Курс пары или None, если одной из валют нет в снимке."""
+        i = self.index.get(from_currency.upper())
+        j = self.index.get(to_currency.upper())
+        if i is None or j is None:
+            return None
+        return float(self.matrix[i, j])
+
+    def _indices(self, codes: Iterable[str]) -> np.ndarray:
+        index = self.index
+        return np.fromiter((index.get(code.upper(), -1) for code in codes), dtype=np.intp)
+
+    def convert_many(self, from_codes: Sequence[str], to_codes: Sequence[str],
+                     amounts: Sequence[float]) -> np.ndarray:
+        """
+        Векторизованная конвертация пачки сумм.
+        Для неизвестных валют в результате NaN.
+        """
+        rows = self._indices(from_codes)
+        cols = self._indices(to_codes)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        result = self.matrix[rows, cols] * amounts
+        result[(rows < 0) | (cols < 0)] = np.nan
+        return result
+
+
+class RateMatrix:
+    """Держатель текущего снимка курсов с атомарной подменой."""
+
+    def __init__(self):
+        self._snapshot: Optional[RateSnapshot] = None
+        self.updates = 0
+
+    @property
+    def snapshot(self) -> Optional[RateSnapshot]:
+        return self._snapshot
+
+    def update(self, snapshot: RateSnapshot) -> None:
+        """Подменяет снимок одним присваиванием ссылки (атомарно для читателей)."""
+        self._snapshot = snapshot
+        self.updates += 1
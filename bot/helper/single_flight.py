@@ -0,0 +1,59 @@
+# Схлопывание одинаковых одновременных запросов (single-flight).
+# Что делает:
+# - Для каждого ключа одновременно выполняется не больше одного вызова функции.
+# - Все, кто пришёл с тем же ключом, пока вызов идёт, ждут его и получают тот же результат
+#   (или то же исключение), не создавая своих запросов к внешнему API.
+# - Считает, сколько вызовов было выполнено и сколько схлопнуто.
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """Потокобезопасное схлопывание одинаковых одновременных вызовов."""
+
+    def __init__(self, on_deduplicated: Optional[Callable[[Hashable], None]] = None):
+        """
+        :param on_deduplicated: Вызывается с ключом каждый раз, когда вызов присоединился к уже идущему.
+        """
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+        self.calls = 0
+        self.deduplicated = 0
+        self.on_deduplicated = on_deduplicated
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        """
+        Выполняет `func()` или присоединяется к уже идущему вызову с тем же ключом.
+        :return: Результат вызова; исключение вызова пробрасывается всем ожидающим.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.deduplicated += 1
+                leader = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                self.calls += 1
+                leader = True
+
+        if not leader:
+            if self.on_deduplicated is not None:
+                self.on_deduplicated(key)
+            return future.result()
+
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return future.result()
+
+    def stats(self) -> Dict[str, int]:
+        """Количество выполненных и схлопнутых вызовов."""
+        with self._lock:
+            return {"calls": self.calls, "deduplicated": self.deduplicated, "in_flight": len(self._in_flight)}
@@ -1,36 +1,153 @@
 # Что делает:
-# - Создаёт логгер с ротацией файлов (`bot.log`).
-# - Подключает форматирование и уровни логов.
+# - Настраивает единую систему логирования проекта (один раз на процесс).
+# - Код бота только кладёт записи в очередь (QueueHandler); форматирование и запись
+#   в `bot.log` с ротацией и в консоль выполняет фоновый поток (QueueListener).
+# - Опционально пишет структурированные JSON-строки (LOG_JSON=true).
+# - Поддерживает выборку для шумных логгеров (LOG_SAMPLING): в лог попадает только
+#   доля записей ниже WARNING, счётчики отброшенного доступны через `sampling_stats()`.
 # - Можно импортировать `logger` и использовать в любом модуле проекта.
 
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+from bot.config import config
 
 # Настройка форматирования
 LOG_FORMAT = "%(asctime)s - [%(levelname)s] - %(name)s - %(message)s"
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
-# Общая конфигурация
-logging.basicConfig(
-    level=logging.DEBUG,  # Уровень логирования (по умолчанию DEBUG)
-    format=LOG_FORMAT,
-    datefmt=DATE_FORMAT,
-)
 
-# Устанавливаем для логгера urllib3 уровень WARNING,
-# чтобы скрыть его подробные DEBUG-сообщения
-logging.getLogger("urllib3").setLevel(logging.WARNING)
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись как одну JSON-строку."""
 
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
 
-# Ротация логов с сохранением 5 файлов по 1MB
-file_handler = RotatingFileHandler(
-    "bot.log", maxBytes=1_000_000, backupCount=5, encoding="utf-8"
-)
-file_handler.setFormatter(logging.Formatter(LOG_FORMAT, DATE_FORMAT))
 
-# Добавляем обработчик в главный логгер
-logger = logging.getLogger("bot")
-logger.addHandler(file_handler)
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает только долю записей ниже WARNING для указанных логгеров (и их потомков).
+    Выборка детерминированная: из каждых 1/rate записей логгера проходит одна.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = {name: max(0.0, min(1.0, rate)) for name, rate in rates.items()}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.dropped: Dict[str, int] = {}
+
+    def _rate_for(self, name: str) -> Optional[float]:
+        while name:
+            rate = self.rates.get(name)
+            if rate is not None:
+                return rate
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate_for(record.name)
+        if rate is None or rate >= 1.0:
+            return True
+        with self._lock:
+            # Накопитель: каждая запись добавляет rate, запись проходит, когда набралась единица
+            credit = self._counters.get(record.name, 1.0 - rate) + rate
+            keep = credit >= 1.0
+            self._counters[record.name] = credit - 1.0 if keep else credit
+            if not keep:
+                self.dropped[record.name] = self.dropped.get(record.name, 0) + 1
+        return keep
+
+
+class _FastQueueHandler(QueueHandler):
+    """
+    QueueHandler без форматирования в вызывающем потоке: стандартный prepare()
+    форматирует запись целиком, здесь только подставляются аргументы сообщения.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
+_sampling: Optional[SamplingFilter] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging() -> None:
+    """Подключает к корневому логгеру очередь и запускает фоновый поток записи (идемпотентно)."""
+    global _listener, _queue_handler, _sampling
+    with _setup_lock:
+        if _listener is not None:
+            return
+        formatter = JsonFormatter() if config.LOG_JSON else logging.Formatter(LOG_FORMAT, DATE_FORMAT)
 
-# Пример использования
-logger.info("Логгер успешно настроен")
\ No newline at end of file
+        # Ротация логов с сохранением LOG_BACKUP_COUNT файлов по LOG_MAX_BYTES
+        handlers = [RotatingFileHandler(config.LOG_FILE, maxBytes=config.LOG_MAX_BYTES,
+                                        backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8")]
+        # Также выводим логи в консоль для удобства отладки
+        if config.LOG_CONSOLE:
+            handlers.append(logging.StreamHandler())
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        queue_handler = _FastQueueHandler(log_queue)
+        _sampling = SamplingFilter(config.LOG_SAMPLING)
+        queue_handler.addFilter(_sampling)
+
+        root = logging.getLogger()
+        root.setLevel(config.LOG_LEVEL)
+        root.addHandler(queue_handler)
+        _queue_handler = queue_handler
+
+        # Устанавливаем для логгера urllib3 уровень WARNING,
+        # чтобы скрыть его подробные DEBUG-сообщения
+        logging.getLogger("urllib3").setLevel(logging.WARNING)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        # Дописываем очередь до конца при выходе из процесса
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging() -> None:
+    """Останавливает фоновый поток, предварительно записав всё из очереди."""
+    global _listener, _queue_handler
+    with _setup_lock:
+        if _queue_handler is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+            _queue_handler = None
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def sampling_stats() -> Dict[str, int]:
+    """Сколько записей отброшено выборкой, по логгерам."""
+    return dict(_sampling.dropped) if _sampling is not None else {}
+
+
+setup_logging()
+
+# Главный логгер проекта
+logger = logging.getLogger("bot")
@@ -0,0 +1,75 @@
+# Разобранное входящее сообщение.
+# Что делает:
+# - Текст сообщения разбирается один раз на обновление: команда (без @упоминания бота),
+#   аргументы, упоминание и исходный текст.
+# - Объект передаётся дальше по конвейеру (декораторы, цепочка обработчиков, фабрика,
+#   BotCommand.execute / CommandStrategy.handle) именованным аргументом `message=`,
+#   поэтому никто больше не делает `text.split()` повторно.
+# - Команды со старой сигнатурой `execute(text, chat_id, user_id)` продолжают работать:
+#   `message=` передаётся только тем, кто его принимает.
+
+import inspect
+from typing import Dict, Optional, Tuple
+
+
+class ParsedMessage:
+    """Текст сообщения, разобранный на команду и аргументы."""
+
+    __slots__ = ("text", "command", "args", "arg_text", "mention")
+
+    def __init__(self, text: str, command: str, args: Tuple[str, ...], arg_text: str, mention: Optional[str]):
+        """
+        :param text: Исходный текст сообщения.
+        :param command: Первое слово ('/currency'), без '@имя_бота'.
+        :param args: Остальные слова.
+        :param arg_text: Текст после команды как есть (без начальных пробелов).
+        :param mention: Имя бота из '/команда@имя_бота' или None.
+        """
+        self.text = text
+        self.command = command
+        self.args = args
+        self.arg_text = arg_text
+        self.mention = mention
+
+    @classmethod
+    def parse(cls, text: str) -> 'ParsedMessage':
+        """Разбирает текст сообщения."""
+        parts = text.split(None, 1)
+        head = parts[0] if parts else ""
+        rest = parts[1] if len(parts) > 1 else ""
+        mention = None
+        if head.startswith("/") and "@" in head:
+            head, _, mention = head.partition("@")
+        return cls(text, head, tuple(rest.split()), rest.strip(), mention)
+
+    @property
+    def is_command(self) -> bool:
+        return self.command.startswith("/")
+
+    def __repr__(self) -> str:
+        return f"ParsedMessage(command={self.command!r}, args={self.args!r}, mention={self.mention!r})"
+
+
+# Принимает ли execute/handle именованный аргумент message (кеш по функции)
+_ACCEPTS_MESSAGE: Dict[object, bool] = {}
+
+
+def accepts_message(func) -> bool:
+    """True, если функция принимает `message=` (явно или через **kwargs)."""
+    key = getattr(func, "__func__", func)
+    accepts = _ACCEPTS_MESSAGE.get(key)
+    if accepts is None:
+        try:
+            parameters = inspect.signature(func).parameters.values()
+        except (TypeError, ValueError):
+            parameters = ()
+        accepts = any(p.kind is p.VAR_KEYWORD or p.name == "message" for p in parameters)
+        _ACCEPTS_MESSAGE[key] = accepts
+    return accepts
+
+
+def message_kwargs(func, message: Optional[ParsedMessage]) -> dict:
+    """Именованные аргументы для вызова func: `{'message': message}`, если она его принимает."""
+    if message is not None and accepts_message(func):
+        return {"message": message}
+    return {}
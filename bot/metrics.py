@@ -0,0 +1,277 @@
+# Метрики бота: счётчики, датчики и гистограммы задержек с фиксированными корзинами.
+# Что делает:
+# - Считает события и задержки по меткам (например, по команде): наблюдение — это поиск корзины
+#   (bisect) и несколько сложений, без блокировок и выделения памяти (около микросекунды).
+# - Оценивает p50/p95/p99 по корзинам гистограммы.
+# - Отдаёт всё в текстовом формате Prometheus (`render_prometheus()`) и через встроенный
+#   HTTP-сервер (`MetricsServer`), а краткую сводку — в `/dev stats`.
+# Обновления идут без блокировок: при гонке потоков отдельное наблюдение может потеряться,
+# для мониторинга это допустимо.
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from bot.logger.app_logger import logger
+
+# Границы корзин задержек, секунды (последняя корзина — +Inf)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Counter:
+    """Монотонный счётчик."""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        self.value += amount
+
+
+class Gauge:
+    """Датчик текущего значения; значение читается функцией при выводе метрик, а не на горячем пути."""
+
+    __slots__ = ("function",)
+
+    def __init__(self):
+        self.function: Callable[[], float] = lambda: 0
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.function = function
+
+    @property
+    def value(self) -> float:
+        return self.function()
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами."""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """
+        Оценка квантиля q (0..1) линейной интерполяцией внутри корзины.
+        Для последней корзины (+Inf) возвращается максимум наблюдений.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                if i == len(self.buckets):
+                    return self.max
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = min(self.buckets[i], self.max)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+
+class _Family:
+    """Семейство метрик одного имени с одной меткой (например, command)."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label: Optional[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self.children: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _new(self):
+        raise NotImplementedError
+
+    def labels(self, value: str = ""):
+        """Метрика для значения метки (создаётся при первом обращении)."""
+        child = self.children.get(value)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(value, self._new())
+        return child
+
+    def _label_text(self, value: str, extra: str = "") -> str:
+        parts = [f'{self.label}="{_escape(value)}"'] if self.label else []
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class CounterFamily(_Family):
+    kind = "counter"
+
+    def _new(self) -> Counter:
+        return Counter()
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{self._label_text(value)} {child.value}"
+                for value, child in sorted(self.children.items())]
+
+
+class GaugeFamily(CounterFamily):
+    kind = "gauge"
+
+    def _new(self) -> Gauge:
+        return Gauge()
+
+
+class HistogramFamily(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label: Optional[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, label)
+        self.buckets = tuple(buckets)
+
+    def _new(self) -> Histogram:
+        return Histogram(self.buckets)
+
+    def render(self) -> List[str]:
+        lines = []
+        for value, child in sorted(self.children.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{self._label_text(value, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(value)} {child.sum}")
+            lines.append(f"{self.name}_count{self._label_text(value)} {child.count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class MetricsRegistry:
+    """Набор семейств метрик процесса."""
+
+    def __init__(self):
+        self.families: Dict[str, _Family] = {}
+
+    def counter(self, name: str, documentation: str, label: Optional[str] = None) -> CounterFamily:
+        return self.families.setdefault(name, CounterFamily(name, documentation, label))
+
+    def gauge(self, name: str, documentation: str, label: Optional[str] = None) -> GaugeFamily:
+        return self.families.setdefault(name, GaugeFamily(name, documentation, label))
+
+    def histogram(self, name: str, documentation: str, label: Optional[str] = None,
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> HistogramFamily:
+        return self.families.setdefault(name, HistogramFamily(name, documentation, label, buckets))
+
+    def render_prometheus(self) -> str:
+        """Все метрики в текстовом формате Prometheus (version 0.0.4)."""
+        lines = []
+        for family in self.families.values():
+            lines.append(f"# HELP {family.name} {family.documentation}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        """Краткая сводка для чата: количество и p50/p95/p99 (мс) по гистограммам, значения счётчиков."""
+        lines = []
+        for family in self.families.values():
+            if not family.children:
+                continue
+            lines.append(f"{family.name}:")
+            for value, child in sorted(family.children.items()):
+                label = value or "-"
+                if isinstance(child, Histogram):
+                    lines.append(
+                        f"  {label}: n={child.count} p50={child.percentile(0.5) * 1000:.1f} "
+                        f"p95={child.percentile(0.95) * 1000:.1f} p99={child.percentile(0.99) * 1000:.1f} мс"
+                    )
+                else:
+                    lines.append(f"  {label}: {child.value}")
+        return "\n".join(lines) if lines else "Метрик пока нет."
+
+
+# Общий реестр процесса и инструментированные точки
+registry = MetricsRegistry()
+
+MESSAGE_SECONDS = registry.histogram(
+    "bot_message_seconds", "Полная обработка входящего сообщения (handle_message)", "command")
+COMMAND_SECONDS = registry.histogram(
+    "bot_command_execute_seconds", "Выполнение BotCommand.execute", "command")
+SEND_SECONDS = registry.histogram(
+    "bot_send_message_seconds", "Запрос sendMessage к Bot API", "status")
+UPSTREAM_SECONDS = registry.histogram(
+    "currency_upstream_seconds", "Запрос к внешнему API курсов валют", "endpoint")
+UPSTREAM_DEDUPLICATED = registry.counter(
+    "currency_upstream_deduplicated_total", "Запросы к API курсов, схлопнутые с уже идущими", "endpoint")
+
+
+class MetricsServer:
+    """Локальный HTTP-сервер, отдающий метрики по GET /metrics."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9100, metrics: MetricsRegistry = registry):
+        """
+        :param host: Адрес (по умолчанию только локальный).
+        :param port: Порт (0 — выбрать свободный, удобно для тестов).
+        """
+        # http.server импортируется только если сервер метрик включён
+        from http.server import ThreadingHTTPServer
+        self.metrics = metrics
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_port
+
+    def _make_handler(self):
+        from http.server import BaseHTTPRequestHandler
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Запросы Prometheus не засоряют лог
+                pass
+
+        return Handler
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Метрики доступны на http://{self._server.server_address[0]}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
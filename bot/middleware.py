@@ -0,0 +1,134 @@
+# Плоский конвейер middleware (замена рекурсивной цепочки Handler).
+# Что делает:
+# - Список middleware один раз компилируется в плоские кортежи этапов: отдельный кортеж для
+#   каждой команды, к которой привязаны middleware, и общий — для всех остальных сообщений.
+#   Сообщение проходит этапы обычным циклом, без рекурсии и лишних кадров стека.
+# - Короткое замыкание: первый этап, вернувший ответ, останавливает конвейер.
+# - Middleware может быть синхронным (`def process`) или асинхронным (`async def process`)
+#   и может ограничить себя набором команд (`commands`), чтобы остальные сообщения его пропускали.
+# - Время каждого этапа пишется в гистограмму bot_pipeline_stage_seconds реестра метрик
+#   (по умолчанию общего, bot/metrics.py), краткая статистика доступна через `stats()`.
+#   Метка этапа — "<позиция>:<имя>", поэтому два экземпляра одного класса не сливаются.
+
+import inspect
+import time
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from bot.message import ParsedMessage
+from bot.metrics import Counter, Histogram, MetricsRegistry, registry
+
+
+class Middleware:
+    """
+    Базовый класс middleware.
+    Подкласс переопределяет `process` (обычный или `async def`) и при необходимости `commands`.
+    """
+
+    # Команды, к которым применяется middleware; None — ко всем сообщениям
+    commands: Optional[FrozenSet[str]] = None
+
+    @property
+    def name(self) -> str:
+        """Имя этапа в метриках (можно переопределить); по умолчанию — имя класса."""
+        return type(self).__name__
+
+    @property
+    def is_async(self) -> bool:
+        return inspect.iscoroutinefunction(self.process)
+
+    def process(self, message: ParsedMessage, chat_id: int, user_id: int) -> Optional[str]:
+        """
+        Обрабатывает сообщение.
+        :return: Ответ пользователю (конвейер останавливается) или None (дальше по конвейеру).
+        """
+        return None
+
+
+# Этап конвейера: (middleware, его process, асинхронный ли он, гистограмма времени, счётчик остановок)
+Stage = Tuple[Middleware, object, bool, Histogram, Counter]
+
+
+class MiddlewarePipeline:
+    """Скомпилированный конвейер middleware."""
+
+    def __init__(self, middlewares: Iterable[Middleware], metrics: MetricsRegistry = registry):
+        """
+        :param middlewares: Middleware в порядке выполнения.
+        :param metrics: Реестр, в который пишется время этапов.
+        """
+        self.middlewares: List[Middleware] = list(middlewares)
+        stage_seconds = metrics.histogram("bot_pipeline_stage_seconds", "Этап конвейера middleware", "stage")
+        short_circuits = metrics.counter(
+            "bot_pipeline_short_circuits_total", "Сообщения, остановленные этапом конвейера", "stage")
+        # Метка этапа уникальна в пределах конвейера: позиция + имя
+        self.labels: List[str] = [f"{index}:{middleware.name}" for index, middleware in enumerate(self.middlewares)]
+        stages: List[Stage] = []
+        for middleware, label in zip(self.middlewares, self.labels):
+            stages.append((middleware, middleware.process, middleware.is_async,
+                           stage_seconds.labels(label), short_circuits.labels(label)))
+        self._stages: Tuple[Stage, ...] = tuple(stages)
+
+        # Плоские кортежи этапов: общий и по одному на каждую упомянутую команду
+        self._default: Tuple[Stage, ...] = tuple(stage for stage in stages if stage[0].commands is None)
+        commands = set()
+        for middleware in self.middlewares:
+            commands.update(middleware.commands or ())
+        self._by_command: Dict[str, Tuple[Stage, ...]] = {
+            command: tuple(stage for stage in stages
+                           if stage[0].commands is None or command in stage[0].commands)
+            for command in commands
+        }
+        self.has_async = any(stage[2] for stage in stages)
+
+    def stages_for(self, command: str) -> Tuple[Stage, ...]:
+        """Этапы, которые проходит сообщение с данной командой."""
+        return self._by_command.get(command, self._default)
+
+    def run(self, message: ParsedMessage, chat_id: int, user_id: int) -> Optional[str]:
+        """
+        Прогоняет сообщение через конвейер в текущем потоке.
+        Асинхронные этапы выполняются через asyncio.run (в синхронном движке нет event loop).
+        """
+        clock = time.perf_counter
+        for middleware, process, is_async, seconds, stopped in self.stages_for(message.command):
+            started = clock()
+            if is_async:
+                import asyncio
+                result = asyncio.run(process(message, chat_id, user_id))
+            else:
+                result = process(message, chat_id, user_id)
+            seconds.observe(clock() - started)
+            if result:
+                stopped.inc()
+                return result
+        return None
+
+    async def run_async(self, message: ParsedMessage, chat_id: int, user_id: int) -> Optional[str]:
+        """Асинхронный вариант run: асинхронные этапы ожидаются в текущем event loop."""
+        clock = time.perf_counter
+        for middleware, process, is_async, seconds, stopped in self.stages_for(message.command):
+            started = clock()
+            result = process(message, chat_id, user_id)
+            if is_async:
+                result = await result
+            seconds.observe(clock() - started)
+            if result:
+                stopped.inc()
+                return result
+        return None
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Время этапов по меткам "<позиция>:<имя>":
+        вызовы, остановки конвейера, суммарное (мс), среднее (мкс) и максимум (мс).
+        """
+        return {
+            label: {
+                "calls": seconds.count,
+                "stopped": stopped.value,
+                "total_ms": seconds.sum * 1000,
+                "avg_us": seconds.sum / seconds.count * 1e6 if seconds.count else 0.0,
+                "max_ms": seconds.max * 1000,
+            }
+            for label, (_, _, _, seconds, stopped) in zip(self.labels, self._stages)
+        }
@@ -0,0 +1,304 @@
+# Очередь исходящих сообщений с ограничением скорости.
+# Что делает:
+# - Соблюдает лимиты Telegram: общий token bucket (~30 сообщений/с на бота)
+#   и отдельный bucket на каждый чат (строже для групп: ~20 сообщений/мин).
+# - Отправляет параллельно несколькими потоками в пределах лимитов, сохраняя порядок внутри чата.
+# - При ответе 429 ставит всю отправку на паузу на `retry_after` секунд и повторяет сообщение.
+# - Возвращает Future на каждое сообщение и собирает метрики задержки в очереди:
+#   время ожидания в очереди (гистограмма bot_outbound_wait_seconds) и глубина очереди
+#   (датчик bot_outbound_queue_depth) публикуются в реестре метрик (`/metrics`, `/dev stats`).
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional, List
+
+from bot.logger.app_logger import logger
+from bot.metrics import MetricsRegistry, registry
+
+
+class TelegramAPIError(Exception):
+    """Ошибка, которую вернул Bot API (`ok: false`)."""
+
+    def __init__(self, error_code: int, description: str, retry_after: Optional[float] = None):
+        super().__init__(f"[{error_code}] {description}")
+        self.error_code = error_code
+        self.description = description
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_response(cls, data: Dict[str, Any]) -> 'TelegramAPIError':
+        """Создаёт исключение из JSON-ответа Bot API."""
+        parameters = data.get("parameters") or {}
+        return cls(
+            error_code=data.get("error_code", 0),
+            description=data.get("description", "unknown error"),
+            retry_after=parameters.get("retry_after"),
+        )
+
+
+class TokenBucket:
+    """
+    Классический token bucket: `rate` токенов в секунду, не более `capacity` в запасе.
+    Не потокобезопасен — используется под блокировкой OutboundQueue.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Сколько секунд ждать до появления токена (0 — токен есть сейчас)."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float) -> None:
+        """Забирает один токен (вызывать после `delay(now) == 0`)."""
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class _Outgoing:
+    """Одно сообщение в очереди."""
+    __slots__ = ("chat_id", "text", "future", "enqueued_at", "attempts")
+
+    def __init__(self, chat_id: int, text: str):
+        self.chat_id = chat_id
+        self.text = text
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+class OutboundQueue:
+    """
+    Планировщик исходящих сообщений.
+    Один поток-планировщик выбирает чат, для которого есть токены в общем и в его bucket,
+    и передаёт сообщение в пул потоков отправки. Для каждого чата одновременно отправляется
+    не больше одного сообщения, поэтому порядок ответов в чате сохраняется.
+    """
+
+    def __init__(self, send_func: Callable[[int, str], Dict[str, Any]],
+                 global_rate: float = 30.0,
+                 chat_rate: float = 1.0,
+                 group_rate: float = 20 / 60,
+                 workers: int = 8,
+                 max_retries: int = 5,
+                 metrics: MetricsRegistry = registry):
+        """
+        :param send_func: Функция фактической отправки `send_func(chat_id, text)`;
+                          при ошибке Bot API должна выбрасывать TelegramAPIError.
+        :param global_rate: Общий лимит сообщений в секунду.
+        :param chat_rate: Лимит сообщений в секунду для личного чата.
+        :param group_rate: Лимит сообщений в секунду для группы (chat_id < 0).
+        :param workers: Количество потоков отправки.
+        :param max_retries: Сколько раз повторять сообщение после 429.
+        :param metrics: Реестр, в котором публикуются метрики очереди.
+        """
+        self.send_func = send_func
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.max_retries = max_retries
+
+        self._cond = threading.Condition()
+        self._global = TokenBucket(global_rate)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._chats: Dict[int, deque] = {}
+        self._ready: List[tuple] = []
+        self._scheduled: set = set()
+        self._in_flight: set = set()
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._closed = False
+        self._last_prune = time.monotonic()
+
+        # Метрики
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._latencies: deque = deque(maxlen=1000)
+        self._wait_seconds = metrics.histogram(
+            "bot_outbound_wait_seconds", "Ожидание сообщения в очереди отправки до передачи в отправку").labels()
+        # Глубина читается при выводе метрик — на submit это ничего не стоит
+        depth = metrics.gauge("bot_outbound_queue_depth", "Сообщения в очереди отправки", "state")
+        depth.labels("pending").set_function(self._queued)
+        depth.labels("in_flight").set_function(lambda: len(self._in_flight))
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bot-send")
+        self._scheduler = threading.Thread(target=self._schedule_loop, name="bot-send-scheduler", daemon=True)
+        self._scheduler.start()
+
+    def _bucket_for(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            # Отрицательный chat_id — группа или канал
+            bucket = TokenBucket(self.group_rate if chat_id < 0 else self.chat_rate, capacity=1.0)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    def _push_ready(self, chat_id: int, ready_at: float) -> None:
+        heapq.heappush(self._ready, (ready_at, next(self._seq), chat_id))
+        self._scheduled.add(chat_id)
+
+    def submit(self, chat_id: int, text: str) -> Future:
+        """
+        Ставит сообщение в очередь.
+        :return: Future, который завершится JSON-ответом Bot API или исключением.
+        """
+        item = _Outgoing(chat_id, text)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Очередь отправки закрыта")
+            self._chats.setdefault(chat_id, deque()).append(item)
+            if chat_id not in self._scheduled and chat_id not in self._in_flight:
+                self._push_ready(chat_id, item.enqueued_at)
+            self._cond.notify()
+        return item.future
+
+    def _schedule_loop(self) -> None:
+        with self._cond:
+            while not (self._closed and not self._chats):
+                now = time.monotonic()
+                self._prune(now)
+                if not self._ready:
+                    self._cond.wait(1.0)
+                    continue
+
+                ready_at, _, chat_id = self._ready[0]
+                wait = max(ready_at - now, self._paused_until - now, self._global.delay(now))
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+
+                heapq.heappop(self._ready)
+                self._scheduled.discard(chat_id)
+                bucket = self._bucket_for(chat_id)
+                chat_delay = bucket.delay(now)
+                if chat_delay > 0:
+                    self._push_ready(chat_id, now + chat_delay)
+                    continue
+
+                self._global.consume(now)
+                bucket.consume(now)
+                item = self._chats[chat_id].popleft()
+                self._wait_seconds.observe(now - item.enqueued_at)
+                self._in_flight.add(chat_id)
+                self._executor.submit(self._send, item)
+
+    def _prune(self, now: float) -> None:
+        """Раз в минуту удаляет bucket'ы простаивающих чатов, чтобы память не росла."""
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        for chat_id in [c for c, b in self._chat_buckets.items() if c not in self._chats and b.is_full(now)]:
+            del self._chat_buckets[chat_id]
+
+    def _send(self, item: _Outgoing) -> None:
+        item.attempts += 1
+        retry = False
+        try:
+            result = self.send_func(item.chat_id, item.text)
+        except TelegramAPIError as e:
+            if e.retry_after is not None and item.attempts <= self.max_retries:
+                retry = True
+                with self._cond:
+                    self.retried += 1
+                    self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                logger.warning(f"Telegram 429 для chat={item.chat_id}, пауза {e.retry_after} с.")
+            else:
+                self._finish(item, error=e)
+        except Exception as e:
+            self._finish(item, error=e)
+        else:
+            self._finish(item, result=result)
+        finally:
+            with self._cond:
+                self._in_flight.discard(item.chat_id)
+                pending = self._chats[item.chat_id]
+                if retry:
+                    pending.appendleft(item)
+                if pending:
+                    self._push_ready(item.chat_id, time.monotonic())
+                else:
+                    del self._chats[item.chat_id]
+                self._cond.notify_all()
+
+    def _finish(self, item: _Outgoing, result: Any = None, error: Optional[BaseException] = None) -> None:
+        latency = time.monotonic() - item.enqueued_at
+        with self._cond:
+            if error is None:
+                self.sent += 1
+            else:
+                self.failed += 1
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+            self._latencies.append(latency)
+        if error is None:
+            item.future.set_result(result)
+        else:
+            logger.error(f"Не удалось отправить сообщение в chat={item.chat_id}: {error}")
+            item.future.set_exception(error)
+
+    def _queued(self) -> int:
+        """Сообщения, ожидающие отправки (без отправляемых сейчас)."""
+        with self._cond:
+            return sum(len(q) for q in self._chats.values())
+
+    def pending(self) -> int:
+        """Количество сообщений, ожидающих отправки или отправляемых сейчас."""
+        with self._cond:
+            return sum(len(q) for q in self._chats.values()) + len(self._in_flight)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Ждёт, пока очередь опустеет. :return: True, если всё отправлено."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._chats:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, wait: bool = True) -> None:
+        """Перестаёт принимать сообщения; при wait=True дожидается отправки оставшихся."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            self._scheduler.join()
+        self._executor.shutdown(wait=wait)
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики очереди: счётчики и задержка от постановки в очередь до отправки (мс)."""
+        with self._cond:
+            latencies = sorted(self._latencies)
+            done = self.sent + self.failed
+            return {
+                "pending": sum(len(q) for q in self._chats.values()),
+                "in_flight": len(self._in_flight),
+                "sent": self.sent,
+                "failed": self.failed,
+                "retried": self.retried,
+                "latency_avg_ms": self._latency_total / done * 1000 if done else 0.0,
+                "latency_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+                "latency_max_ms": self._latency_max * 1000,
+            }
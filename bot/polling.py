@@ -0,0 +1,91 @@
+# Движок long-polling для getUpdates.
+# Что делает:
+# - Передаёт `offset=last_update_id + 1`, поэтому Telegram отдаёт каждое обновление ровно один раз.
+# - Возвращает весь батч обновлений, а не только последнее.
+# - Адаптирует таймаут: пока очередь на стороне Telegram не разобрана (батч заполнен),
+#   следующий запрос делается с `timeout=0`; когда очередь пуста — обычный long-polling.
+# - При ошибках сети делает экспоненциальную паузу вместо фиксированного `sleep`.
+
+import time
+from typing import Callable, Optional, List, Dict, Any
+
+from bot.logger.app_logger import logger
+
+
+class UpdatePoller:
+    """
+    Итератор обновлений Telegram на основе long-polling с учётом offset.
+    Сам не выполняет HTTP-запросы: получает функцию `fetch(offset, limit, timeout)`,
+    которая возвращает список обновлений (например, `TelegramBot.get_updates`).
+    """
+
+    def __init__(self,
+                 fetch: Callable[[Optional[int], int, int], List[Dict[str, Any]]],
+                 timeout: int = 25,
+                 batch_size: int = 100,
+                 interval: float = 0.0,
+                 max_backoff: float = 30.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        :param fetch: Функция запроса обновлений `fetch(offset, limit, timeout)`.
+        :param timeout: Таймаут long-polling на стороне Telegram, секунды.
+        :param batch_size: Максимальный размер батча (параметр `limit`, 1..100).
+        :param interval: Минимальная пауза между запросами, когда очередь разобрана.
+        :param max_backoff: Максимальная пауза после ошибок подряд.
+        :param sleep: Функция ожидания (подменяется в тестах).
+        """
+        self.fetch = fetch
+        self.timeout = timeout
+        self.batch_size = max(1, min(batch_size, 100))
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self._sleep = sleep
+
+        self.offset: Optional[int] = None
+        self._backlog = False
+        self._backoff = 0.0
+        self._last_poll_at = 0.0
+
+    def next_timeout(self) -> int:
+        """Таймаут следующего запроса: 0 пока разбираем накопившиеся обновления."""
+        return 0 if self._backlog else self.timeout
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """
+        Выполняет один запрос getUpdates и возвращает батч обновлений по порядку.
+        Offset не сдвигается, пока вызывающий код не подтвердит обработку через `acknowledge`.
+        При ошибке возвращает пустой список после паузы с экспоненциальным ростом.
+        """
+        if not self._backlog and self.interval > 0:
+            remaining = self.interval - (time.monotonic() - self._last_poll_at)
+            if remaining > 0:
+                self._sleep(remaining)
+
+        self._last_poll_at = time.monotonic()
+        try:
+            updates = self.fetch(self.offset, self.batch_size, self.next_timeout())
+        except Exception as e:
+            self._backoff = min(self.max_backoff, self._backoff * 2 if self._backoff else 1.0)
+            logger.warning(f"Ошибка getUpdates: {e}. Повтор через {self._backoff:.1f} с.")
+            self._sleep(self._backoff)
+            return []
+
+        self._backoff = 0.0
+        self._backlog = len(updates) >= self.batch_size
+        return updates
+
+    def acknowledge(self, update_id: int) -> None:
+        """Отмечает обновление как обработанное: следующий запрос начнётся после него."""
+        self.offset = update_id + 1
+
+    def commit(self) -> None:
+        """
+        Подтверждает обработанные обновления на стороне Telegram.
+        Нужен перед остановкой, иначе при следующем старте последний батч придёт повторно.
+        """
+        if self.offset is None:
+            return
+        try:
+            self.fetch(self.offset, 1, 0)
+        except Exception as e:
+            logger.warning(f"Не удалось подтвердить offset {self.offset}: {e}")
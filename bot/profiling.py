@@ -0,0 +1,298 @@
+# Профилирование работающего бота по запросу (`/dev profile ...`).
+# Что делает:
+# - `start(messages=N)` / `start(seconds=S)`: следующие N вызовов handle_message (или все вызовы
+#   за S секунд) выполняются под cProfile. Профиль сохраняется в PROFILE_DIR (.prof, читается pstats
+#   и snakeviz), в ответ отдаются top-K функций по накопленному времени.
+# - `sample(seconds)`: периодическая выборка стеков всех потоков с низкой частотой
+#   (sys._current_frames), без трассировки каждого вызова. Результат — файл в формате
+#   collapsed stacks (для flamegraph.pl / speedscope) и top-K функций по доле выборок.
+# - Пока профилирование выключено, накладных расходов нет: обёртка ставится на
+#   TelegramBot.handle_message (и AsyncTelegramBot.handle_message) только на время профилирования,
+#   затем исходный метод возвращается на место.
+# - Под cProfile одновременно выполняется только одно сообщение (cProfile не рассчитан на
+#   несколько потоков); параллельные сообщения в это время проходят без профилирования.
+
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter as Tally
+from typing import Dict, List, Optional, Tuple
+
+from bot.config import config
+from bot.logger.app_logger import logger
+
+# (файл, строка, функция) — ключ функции в pstats
+FunctionKey = Tuple[str, int, str]
+
+
+def _describe(key: FunctionKey) -> str:
+    filename, line, name = key
+    if filename == "~":
+        return name  # встроенные функции: "<built-in method ...>"
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+class MessageProfiler:
+    """Профилировщик обработки сообщений; одновременно активен не больше одного режима."""
+
+    def __init__(self, directory: str = config.PROFILE_DIR, top: int = config.PROFILE_TOP):
+        """
+        :param directory: Куда сохранять профили.
+        :param top: Сколько функций включать в отчёт.
+        """
+        self.directory = directory
+        self.top = top
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()  # одно сообщение под cProfile за раз
+        self._profile: Optional[cProfile.Profile] = None
+        # Остановленный профиль, отчёт по которому допишет сообщение, профилируемое в момент stop()
+        self._deferred: Optional[cProfile.Profile] = None
+        # Флаг "этот поток сейчас выполняет профилируемое сообщение" (stop() изнутри сообщения)
+        self._local = threading.local()
+        self._remaining: Optional[int] = None
+        self._timer: Optional[threading.Timer] = None
+        self._originals: List[Tuple[type, object]] = []
+        self._sampler: Optional[threading.Thread] = None
+        self._sampler_stop = threading.Event()
+        self._samples: Tally = Tally()
+        self.profiled = 0
+        self.last_report: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None or self._sampler is not None
+
+    # --- cProfile для следующих N сообщений ---
+
+    def start(self, messages: Optional[int] = None, seconds: Optional[float] = None) -> str:
+        """
+        Включает cProfile для следующих `messages` сообщений и/или на `seconds` секунд.
+        Профилирование заканчивается по первому из условий или по `stop()`.
+        """
+        with self._lock:
+            if self.active:
+                return "Профилирование уже идёт, сначала `/dev profile stop`."
+            self._profile = cProfile.Profile()
+            self._remaining = messages
+            self.profiled = 0
+            self._install()
+            if seconds:
+                self._timer = threading.Timer(seconds, self.stop)
+                self._timer.daemon = True
+                self._timer.start()
+        limits = [f"{messages} сообщ." if messages else "", f"{seconds:g} с" if seconds else ""]
+        logger.info(f"Профилирование handle_message включено ({', '.join(filter(None, limits)) or 'до stop'})")
+        return f"Профилирование включено: {' или '.join(filter(None, limits)) or 'до `/dev profile stop`'}"
+
+    def stop(self) -> str:
+        """Останавливает профилирование, сохраняет профиль и возвращает отчёт."""
+        with self._lock:
+            sampler, self._sampler = self._sampler, None
+            if sampler is not None:
+                self._sampler_stop.set()
+        if sampler is not None:
+            # Ждём поток выборки вне блокировки: по истечении времени он сам вызывает stop()
+            if sampler is not threading.current_thread():
+                sampler.join()
+            return self._sampling_report()
+
+        with self._lock:
+            if self._profile is None:
+                return self.last_report or "Профилирование не запущено."
+            self._uninstall()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            profile, self._profile = self._profile, None
+            self._deferred = profile
+
+        # stop() вызван из профилируемого сообщения (например, `/dev profile stop`):
+        # ждать его окончания нельзя — это и есть текущий вызов, поэтому отчёт строится сразу
+        if getattr(self._local, "profiling", False):
+            profile.disable()
+            return self._finish(self._take_deferred(profile)) or self.last_report
+
+        # Сообщение в другом потоке ещё под профилем: отчёт допишет оно само, когда закончится
+        if not self._busy.acquire(blocking=False):
+            return ("Профилирование остановлено, отчёт будет готов после текущего сообщения "
+                    "(повторите `/dev profile stop`).")
+        try:
+            deferred = self._take_deferred(profile)
+        finally:
+            self._busy.release()
+        return self._finish(deferred) or self.last_report or "Отчёт формируется, повторите `/dev profile stop`."
+
+    def _take_deferred(self, profile: cProfile.Profile) -> Optional[cProfile.Profile]:
+        """Забирает отложенный профиль, если отчёт по нему ещё никто не строит."""
+        with self._lock:
+            if self._deferred is not profile:
+                return None
+            self._deferred = None
+            return profile
+
+    def _finish(self, profile: Optional[cProfile.Profile]) -> Optional[str]:
+        if profile is None:
+            return None
+        self.last_report = self._report(profile)
+        return self.last_report
+
+    def _finish_deferred(self, profile: cProfile.Profile) -> None:
+        """Вызывается профилируемым сообщением после выхода: достраивает отчёт за stop()."""
+        report = self._finish(self._take_deferred(profile))
+        if report is not None:
+            logger.info(f"Профилирование остановлено\n{report}")
+
+    def _install(self) -> None:
+        """Подменяет handle_message обёртками (только на время профилирования)."""
+        from bot.core import TelegramBot
+        targets = [(TelegramBot, self._wrap_sync)]
+        # Асинхронный движок оборачиваем, только если он уже используется
+        async_core = sys.modules.get("bot.async_core")
+        if async_core is not None:
+            targets.append((async_core.AsyncTelegramBot, self._wrap_async))
+        for cls, wrap in targets:
+            original = cls.__dict__["handle_message"]
+            self._originals.append((cls, original))
+            cls.handle_message = wrap(original)
+
+    def _uninstall(self) -> None:
+        for cls, original in self._originals:
+            cls.handle_message = original
+        self._originals.clear()
+
+    def _wrap_sync(self, original):
+        @functools.wraps(original)
+        def handle_message(*args, **kwargs):
+            profile = self._profile
+            if profile is None or not self._busy.acquire(blocking=False):
+                return original(*args, **kwargs)
+            self._local.profiling = True
+            try:
+                profile.enable()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    profile.disable()
+            finally:
+                self._local.profiling = False
+                self._busy.release()
+                self._finish_deferred(profile)
+                self._count(profile)
+        return handle_message
+
+    def _wrap_async(self, original):
+        # Профилируется поток event loop: пока сообщение ждёт await, в профиль попадают и другие
+        # корутины, а синхронные команды из пула потоков — нет
+        @functools.wraps(original)
+        async def handle_message(*args, **kwargs):
+            profile = self._profile
+            if profile is None or not self._busy.acquire(blocking=False):
+                return await original(*args, **kwargs)
+            self._local.profiling = True
+            try:
+                profile.enable()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    profile.disable()
+            finally:
+                self._local.profiling = False
+                self._busy.release()
+                self._finish_deferred(profile)
+                self._count(profile)
+        return handle_message
+
+    def _count(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            if self._profile is not profile:
+                return  # профилирование уже остановлено
+            self.profiled += 1
+            if self._remaining is None:
+                return
+            self._remaining -= 1
+            done = self._remaining == 0
+        if done:
+            report = self.stop()
+            logger.info(f"Профилирование завершено после {self.profiled} сообщ.\n{report}")
+
+    def _report(self, profile: cProfile.Profile) -> str:
+        profile.create_stats()
+        if not profile.stats:
+            return "Профиль пуст: за время профилирования не было сообщений."
+        path = self._path("prof")
+        profile.dump_stats(path)
+        stats = pstats.Stats(profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.top]
+        lines = [f"Сообщений: {self.profiled}, файл: {path}",
+                 f"{'cum, мс':>9} {'own, мс':>9} {'вызовы':>7}  функция"]
+        for key, (_, ncalls, tottime, cumtime, _) in rows:
+            lines.append(f"{cumtime * 1000:>9.1f} {tottime * 1000:>9.1f} {ncalls:>7}  {_describe(key)}")
+        return "\n".join(lines)
+
+    # --- Выборка стеков с низкой частотой ---
+
+    def sample(self, seconds: float, interval: float = config.PROFILE_SAMPLE_INTERVAL) -> str:
+        """
+        Запускает фоновую выборку стеков всех потоков каждые `interval` секунд на `seconds` секунд.
+        Отчёт пишется в лог по окончании и возвращается `stop()`.
+        """
+        with self._lock:
+            if self.active:
+                return "Профилирование уже идёт, сначала `/dev profile stop`."
+            self._samples = Tally()
+            self._sampler_stop.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, args=(seconds, interval),
+                                             name="profile-sampler", daemon=True)
+            self._sampler.start()
+        return f"Выборка стеков включена на {seconds:g} с (раз в {interval * 1000:g} мс)."
+
+    def _sample_loop(self, seconds: float, interval: float) -> None:
+        own = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while not self._sampler_stop.wait(interval) and time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                self._samples[tuple(reversed(stack))] += 1
+        if not self._sampler_stop.is_set():
+            report = self.stop()
+            logger.info(f"Выборка стеков завершена\n{report}")
+
+    def _sampling_report(self) -> str:
+        """Сохраняет собранные стеки и строит отчёт (поток выборки уже остановлен)."""
+        path = self._path("collapsed")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self._samples.items():
+                f.write(";".join(_describe(key) for key in stack) + f" {count}\n")
+
+        total = sum(self._samples.values())
+        if not total:
+            self.last_report = f"Выборок нет. Файл: {path}"
+            return self.last_report
+        # Включительная доля: функция учитывается один раз на выборку, где она есть в стеке
+        inclusive: Dict[FunctionKey, int] = {}
+        for stack, count in self._samples.items():
+            for key in set(stack):
+                inclusive[key] = inclusive.get(key, 0) + count
+        lines = [f"Выборок: {total}, файл: {path}", f"{'доля':>6}  функция"]
+        for key, count in sorted(inclusive.items(), key=lambda item: item[1], reverse=True)[:self.top]:
+            lines.append(f"{count / total:>6.1%}  {_describe(key)}")
+        self.last_report = "\n".join(lines)
+        return self.last_report
+
+    def _path(self, extension: str) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"profile-{time.strftime('%Y%m%d-%H%M%S')}.{extension}")
+
+
+# Общий профилировщик процесса (используется `/dev profile`)
+profiler = MessageProfiler()
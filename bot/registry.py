@@ -0,0 +1,113 @@
+# Ленивый реестр команд на основе готового манифеста.
+# Что делает:
+# - Читает `bot/commands/manifest.json`: имя команды -> модуль, класс, описание и роли.
+# - Импортирует модуль команды только при первом обращении к ней, поэтому старт бота
+#   не тянет за собой numpy, CurrencyHelper и прочие тяжёлые зависимости команд.
+# - /help строится по описаниям из манифеста без импорта команд.
+# - Манифест пересобирается командой `python -m bot.registry` (импортирует все команды,
+#   берёт описания из docstring классов и роли из bot/roles/commands.py).
+
+import importlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from bot.base import BotCommand
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH = Path(__file__).parent / "commands" / "manifest.json"
+
+
+class CommandSpec:
+    """Описание команды из манифеста."""
+
+    __slots__ = ("name", "module", "cls", "doc", "roles")
+
+    def __init__(self, name: str, module: str, cls: str, doc: str = "", roles: Optional[List[str]] = None):
+        self.name = name
+        self.module = module
+        self.cls = cls
+        self.doc = doc
+        self.roles = list(roles or [])
+
+    def to_dict(self) -> Dict[str, object]:
+        return {"module": self.module, "class": self.cls, "doc": self.doc, "roles": self.roles}
+
+
+class CommandRegistry:
+    """Реестр команд: описания из манифеста, классы — по первому требованию."""
+
+    def __init__(self, manifest_path: Path = MANIFEST_PATH):
+        """
+        :param manifest_path: Путь к JSON-манифесту команд.
+        """
+        self.manifest_path = Path(manifest_path)
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self.specs: Dict[str, CommandSpec] = {
+            name: CommandSpec(name, entry["module"], entry["class"], entry.get("doc", ""), entry.get("roles"))
+            for name, entry in data["commands"].items()
+        }
+        self._classes: Dict[str, type] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.specs
+
+    def names(self) -> List[str]:
+        return sorted(self.specs)
+
+    def get_class(self, name: str) -> Optional[type]:
+        """Возвращает класс команды, импортируя её модуль при первом обращении."""
+        command_class = self._classes.get(name)
+        if command_class is not None:
+            return command_class
+        spec = self.specs.get(name)
+        if spec is None:
+            return None
+        # Импорт под блокировкой: параллельный прогрев не должен импортировать модуль дважды
+        with self._lock:
+            command_class = self._classes.get(name)
+            if command_class is None:
+                module = importlib.import_module(spec.module)
+                command_class = getattr(module, spec.cls)
+                self._classes[name] = command_class
+        return command_class
+
+    def is_loaded(self, name: str) -> bool:
+        """Импортирован ли уже модуль команды."""
+        return name in self._classes
+
+
+def build_manifest(entries: Iterable[CommandSpec], manifest_path: Path = MANIFEST_PATH) -> Dict[str, CommandSpec]:
+    """
+    Пересобирает манифест: импортирует каждую команду, проверяет, что это BotCommand,
+    и обновляет описание и роли. Записывает файл атомарно.
+    """
+    from bot.roles.commands import commands_dict
+
+    specs = {}
+    for entry in entries:
+        command_class = getattr(importlib.import_module(entry.module), entry.cls)
+        if not issubclass(command_class, BotCommand):
+            raise TypeError(f"{entry.module}.{entry.cls} не является BotCommand")
+        doc = " ".join((command_class.__doc__ or "").split())
+        specs[entry.name] = CommandSpec(entry.name, entry.module, entry.cls, doc,
+                                        commands_dict.get(entry.name, []))
+
+    tmp_path = Path(manifest_path).with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"commands": {name: spec.to_dict() for name, spec in specs.items()}},
+                  f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    tmp_path.replace(manifest_path)
+    return specs
+
+
+if __name__ == "__main__":
+    registry = CommandRegistry()
+    build_manifest(registry.specs.values())
+    print(f"Манифест обновлён: {len(registry.specs)} команд -> {MANIFEST_PATH}")
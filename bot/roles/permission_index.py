@@ -0,0 +1,119 @@
+# Индекс прав доступа для check_command_access.
+# Что делает:
+# - Каждой роли назначается бит; пользователю соответствует маска его ролей
+#   (user_id -> маска), команде — маска разрешённых ролей (команда -> маска).
+# - Проверка доступа — два поиска в словаре и одно побитовое И, независимо от числа ролей
+#   и участников. Пользователь может состоять в нескольких ролях.
+# - Индекс строится из users_dict/commands_dict и обновляется стратегиями /role
+#   (bot/commands/role.py) вместе с изменением users_dict.
+
+import threading
+from typing import Dict, Iterable, List, Union
+
+
+class PermissionIndex:
+    """Инвертированный индекс: пользователь -> маска ролей, команда -> маска разрешённых ролей."""
+
+    def __init__(self):
+        self._role_bits: Dict[str, int] = {}
+        self._user_roles: Dict[int, int] = {}
+        self._command_roles: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dicts(cls, users: Dict[str, Iterable[int]], commands: Dict[str, Iterable[str]]) -> 'PermissionIndex':
+        index = cls()
+        index.rebuild(users, commands)
+        return index
+
+    def rebuild(self, users: Dict[str, Iterable[int]], commands: Dict[str, Iterable[str]]) -> None:
+        """Полностью перестраивает индекс по словарям ролей и команд."""
+        with self._lock:
+            self._user_roles = {}
+            self._command_roles = {}
+            for role, members in users.items():
+                bit = self._bit(role)
+                for uid in members:
+                    uid = int(uid)
+                    self._user_roles[uid] = self._user_roles.get(uid, 0) | bit
+            for command, roles in commands.items():
+                mask = 0
+                for role in roles:
+                    mask |= self._bit(role)
+                self._command_roles[command] = mask
+
+    def _bit(self, role: str) -> int:
+        """Бит роли; новые роли получают следующий свободный бит (вызывать под блокировкой)."""
+        bit = self._role_bits.get(role)
+        if bit is None:
+            bit = 1 << len(self._role_bits)
+            self._role_bits[role] = bit
+        return bit
+
+    def _role_names(self, mask: int) -> List[str]:
+        return [role for role, bit in self._role_bits.items() if mask & bit]
+
+    # --- Изменения (вызываются стратегиями /role) ---
+
+    def add_role(self, role: str) -> None:
+        with self._lock:
+            self._bit(role)
+
+    def remove_role(self, role: str, members: Iterable[int]) -> None:
+        """Снимает роль со всех её участников. Бит роли не переиспользуется."""
+        with self._lock:
+            bit = self._role_bits.get(role)
+            if bit is None:
+                return
+            for uid in members:
+                uid = int(uid)
+                mask = self._user_roles.get(uid, 0) & ~bit
+                if mask:
+                    self._user_roles[uid] = mask
+                else:
+                    self._user_roles.pop(uid, None)
+
+    def add_user_role(self, user_id: int, role: str) -> None:
+        with self._lock:
+            self._user_roles[int(user_id)] = self._user_roles.get(int(user_id), 0) | self._bit(role)
+
+    def remove_user_role(self, user_id: int, role: str) -> None:
+        with self._lock:
+            bit = self._role_bits.get(role)
+            if bit is None:
+                return
+            mask = self._user_roles.get(int(user_id), 0) & ~bit
+            if mask:
+                self._user_roles[int(user_id)] = mask
+            else:
+                self._user_roles.pop(int(user_id), None)
+
+    def set_command_roles(self, command: str, roles: Iterable[str]) -> None:
+        with self._lock:
+            mask = 0
+            for role in roles:
+                mask |= self._bit(role)
+            self._command_roles[command] = mask
+
+    # --- Проверка ---
+
+    def roles_of(self, user_id: int) -> List[str]:
+        """Имена ролей пользователя."""
+        return self._role_names(self._user_roles.get(int(user_id), 0))
+
+    def check(self, command: str, user_id: int) -> Union[bool, str]:
+        """
+        Проверяет доступ пользователя к команде.
+        :return: True или строка с причиной отказа (как check_command_access).
+        """
+        allowed = self._command_roles.get(command)
+        # Якщо команди немає в індексі — дозволяємо всім
+        if allowed is None:
+            return True
+        user_mask = self._user_roles.get(int(user_id), 0)
+        if not user_mask:
+            return "Access denied: your role is not assigned"
+        if user_mask & allowed:
+            return True
+        roles = ", ".join(self._role_names(user_mask))
+        return f"Access denied: role '{roles}' does not have access to '{command}'"
@@ -0,0 +1,201 @@
+# Движок массовой рассылки.
+# Что делает:
+# - Читает ID пользователей из SQLite порциями (keyset-пагинация), а не одним списком.
+# - Отправляет каждую порцию через очередь отправки бота (OutboundQueue): параллельно,
+#   но в пределах лимитов Telegram.
+# - После каждой порции сохраняет прогресс в файл, поэтому прерванную рассылку можно продолжить;
+#   после завершения рассылки файл удаляется.
+# - Считает скорость и оставшееся время, классифицирует ошибки отправки:
+#   пользователи, заблокировавшие бота, помечаются неактивными.
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import wait
+from pathlib import Path
+from typing import Callable, Dict, Optional, Any
+
+from bot.outbound import TelegramAPIError
+from bot.services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+# Типы ошибок отправки
+FAILURE_BLOCKED = "blocked"
+FAILURE_DEACTIVATED = "deactivated"
+FAILURE_NOT_FOUND = "not_found"
+FAILURE_RATE_LIMITED = "rate_limited"
+FAILURE_ERROR = "error"
+
+# После этих ошибок писать пользователю бессмысленно — помечаем его неактивным
+INACTIVE_FAILURES = {FAILURE_BLOCKED, FAILURE_DEACTIVATED, FAILURE_NOT_FOUND}
+
+
+def classify_failure(error: BaseException) -> str:
+    """Определяет тип ошибки отправки по ответу Bot API."""
+    if not isinstance(error, TelegramAPIError):
+        return FAILURE_ERROR
+    description = error.description.lower()
+    if error.error_code == 429:
+        return FAILURE_RATE_LIMITED
+    if error.error_code == 403 and "blocked" in description:
+        return FAILURE_BLOCKED
+    if error.error_code == 403 and "deactivated" in description:
+        return FAILURE_DEACTIVATED
+    if error.error_code in (400, 403) and ("chat not found" in description or "user not found" in description):
+        return FAILURE_NOT_FOUND
+    return FAILURE_ERROR
+
+
+class BroadcastProgress:
+    """Состояние рассылки; сериализуется в файл контрольной точки."""
+
+    def __init__(self, broadcast_id: str, total: int = 0):
+        self.broadcast_id = broadcast_id
+        self.total = total
+        self.sent = 0
+        self.failures: Dict[str, int] = {}
+        self.last_user_id: Optional[int] = None
+        self.done = False
+        self.started_at = time.monotonic()
+        # Сколько сообщений обработано в этом запуске (для расчёта скорости)
+        self.processed_this_run = 0
+
+    @property
+    def failed(self) -> int:
+        return sum(self.failures.values())
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed
+
+    def throughput(self) -> float:
+        """Сообщений в секунду в текущем запуске."""
+        elapsed = time.monotonic() - self.started_at
+        return self.processed_this_run / elapsed if elapsed > 0 else 0.0
+
+    def eta(self) -> Optional[float]:
+        """Оценка оставшегося времени в секундах (None, пока скорость неизвестна)."""
+        rate = self.throughput()
+        if rate <= 0:
+            return None
+        return max(0, self.total - self.processed) / rate
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "broadcast_id": self.broadcast_id,
+            "total": self.total,
+            "sent": self.sent,
+            "failures": self.failures,
+            "last_user_id": self.last_user_id,
+            "done": self.done,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BroadcastProgress':
+        progress = cls(data["broadcast_id"], data.get("total", 0))
+        progress.sent = data.get("sent", 0)
+        progress.failures = dict(data.get("failures", {}))
+        progress.last_user_id = data.get("last_user_id")
+        progress.done = data.get("done", False)
+        return progress
+
+
+class BroadcastService:
+    """
+    Потоковая, параллельная и возобновляемая рассылка сообщения всем активным пользователям.
+    Доставка "как минимум один раз": при сбое посреди порции после возобновления
+    эта порция будет отправлена повторно.
+    """
+
+    def __init__(self, bot, user_service: UserService,
+                 checkpoint_dir: str = "broadcasts", chunk_size: int = 500):
+        """
+        :param bot: Объект с методом `send_message(chat_id, text) -> Future` (TelegramBot).
+        :param user_service: Сервис пользователей (источник ID и отметка неактивных).
+        :param checkpoint_dir: Папка для файлов контрольных точек.
+        :param chunk_size: Сколько пользователей читать и отправлять за одну порцию.
+        """
+        self.bot = bot
+        self.user_service = user_service
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.chunk_size = chunk_size
+
+    def _checkpoint_path(self, broadcast_id: str) -> Path:
+        return self.checkpoint_dir / f"{broadcast_id}.json"
+
+    def load_checkpoint(self, broadcast_id: str) -> Optional[BroadcastProgress]:
+        """Загружает сохранённый прогресс рассылки, если он есть."""
+        try:
+            with open(self._checkpoint_path(broadcast_id), 'r', encoding='utf-8') as f:
+                return BroadcastProgress.from_dict(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def _save_checkpoint(self, progress: BroadcastProgress) -> None:
+        """Атомарно записывает прогресс: временный файл + rename."""
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        path = self._checkpoint_path(progress.broadcast_id)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(progress.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    def broadcast(self, broadcast_id: str, message: str, resume: bool = True,
+                  on_progress: Optional[Callable[[BroadcastProgress], None]] = None) -> BroadcastProgress:
+        """
+        Выполняет (или продолжает) рассылку.
+
+        :param broadcast_id: Идентификатор рассылки (имя файла контрольной точки).
+        :param message: Текст сообщения.
+        :param resume: Продолжить с контрольной точки, если она есть.
+        :param on_progress: Функция, вызываемая после каждой порции.
+        :return: Итоговый прогресс рассылки.
+        """
+        progress = self.load_checkpoint(broadcast_id) if resume else None
+        if progress and progress.done:
+            logger.info(f"Рассылка {broadcast_id} уже завершена.")
+            return progress
+        if progress is None:
+            progress = BroadcastProgress(broadcast_id)
+        else:
+            logger.info(f"Рассылка {broadcast_id} продолжается после user_id={progress.last_user_id}.")
+
+        progress.total = progress.processed + self.user_service.count_user_ids(after_id=progress.last_user_id)
+        logger.info(f"Рассылка {broadcast_id}: осталось {progress.total - progress.processed} пользователей.")
+
+        for chunk in self.user_service.iter_user_ids(self.chunk_size, after_id=progress.last_user_id):
+            futures = {self.bot.send_message(user_id, message): user_id for user_id in chunk}
+            wait(futures)
+            for future, user_id in futures.items():
+                error = future.exception()
+                if error is None:
+                    progress.sent += 1
+                    continue
+                kind = classify_failure(error)
+                progress.failures[kind] = progress.failures.get(kind, 0) + 1
+                if kind in INACTIVE_FAILURES:
+                    self.user_service.set_active(user_id, False)
+
+            progress.processed_this_run += len(chunk)
+            progress.last_user_id = chunk[-1]
+            self._save_checkpoint(progress)
+
+            eta = progress.eta()
+            eta_text = f"осталось ~{eta:.0f} с" if eta is not None else "оценка времени недоступна"
+            logger.info(
+                f"Рассылка {broadcast_id}: {progress.processed}/{progress.total}, "
+                f"{progress.throughput():.1f} сообщ./с, {eta_text}."
+            )
+            if on_progress:
+                on_progress(progress)
+
+        progress.done = True
+        # Завершённую рассылку продолжать нечего: контрольная точка больше не нужна
+        try:
+            os.remove(self._checkpoint_path(broadcast_id))
+        except FileNotFoundError:
+            pass
+        logger.info(f"Рассылка {broadcast_id} завершена. Отправлено {progress.sent}, ошибок {progress.failures}.")
+        return progress
@@ -1,10 +1,14 @@
 # Файл, который реализует работу с курсами валют
 
-import requests
+from typing import Optional
+
+from bot.transport import HttpTransport, get_transport
 
 class CurrencyService:
-    def __init__(self, api_url: str):
+    def __init__(self, api_url: str, transport: Optional[HttpTransport] = None):
         self.api_url = api_url
+        # Общий keep-alive транспорт; в тестах можно передать свой
+        self.transport = transport or get_transport()
 
     def get_exchange_rate(self, base: str, target: str) -> float:
         """
@@ -13,7 +17,7 @@ class CurrencyService:
         :param target: Валюта для перевода.
         :return: Курс обмена.
         """
-        response = requests.get(f"{self.api_url}?base={base}&symbols={target}")
+        response = self.transport.get(self.api_url, params={"base": base, "symbols": target})
         if response.status_code != 200:
             raise Exception("Ошибка при получении курсов валют")
         data = response.json()
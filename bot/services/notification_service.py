@@ -16,7 +16,13 @@
 
 
 import logging
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Optional
+from bot.config import config
 from bot.core import TelegramBot
+from bot.services.broadcast_service import BroadcastService, BroadcastProgress
 from bot.services.user_service import UserService
 
 # Настраиваем логирование для этого файла
@@ -35,41 +41,49 @@ class NotificationService:
         self.bot = bot
         self.user_service = user_service
 
-    def send_message_to_user(self, user_id: int, message: str) -> None:
+    def send_message_to_user(self, user_id: int, message: str) -> Future:
         """
         Отправляет личное сообщение конкретному пользователю.
         В Telegram API для личного сообщения chat_id совпадает с user_id.
+        Сообщение уходит через очередь отправки бота, поэтому соблюдает лимиты Telegram.
 
         :param user_id: ID пользователя Telegram.
         :param message: Текст сообщения для отправки.
+        :return: Future с результатом отправки.
         """
-        try:
-            # Используем метод send_message из уже существующего объекта бота
-            self.bot.send_message(chat_id=user_id, text=message)
+        # Используем метод send_message из уже существующего объекта бота
+        future = self.bot.send_message(chat_id=user_id, text=message)
+        future.add_done_callback(lambda f: self._log_result(user_id, f))
+        return future
+
+    @staticmethod
+    def _log_result(user_id: int, future: Future) -> None:
+        """Логирует результат отправки, когда очередь её завершила."""
+        error = future.exception()
+        if error is None:
             logger.info(f"Уведомление для пользователя {user_id} успешно отправлено.")
-        except Exception as e:
+        else:
             # Логируем возможные ошибки (например, если бот заблокирован пользователем)
-            logger.error(f"Не удалось отправить уведомление пользователю {user_id}: {e}")
+            logger.error(f"Не удалось отправить уведомление пользователю {user_id}: {error}")
 
-    def broadcast_to_all_users(self, message: str) -> None:
-        """
-        Выполняет рассылку сообщения всем пользователям, которые есть в базе данных.
+    def broadcast_to_all_users(self, message: str, broadcast_id: Optional[str] = None) -> BroadcastProgress:
         """
-        all_user_ids = self.user_service.get_all_user_ids()
-
-        if not all_user_ids:
-            logger.warning("Рассылка отменена: в базе данных нет ни одного пользователя.")
-            return
+        Выполняет рассылку сообщения всем активным пользователям из базы данных.
+        Пользователи читаются порциями, прогресс сохраняется на диск. Каждый вызов без
+        broadcast_id — новая рассылка (даже с тем же текстом); чтобы продолжить прерванную,
+        передайте её broadcast_id (он пишется в лог при старте).
 
-        logger.info(f"Начало рассылки сообщения для {len(all_user_ids)} пользователей.")
-
-        successful_sends = 0
-        for user_id in all_user_ids:
-            try:
-                self.send_message_to_user(user_id, message)
-                successful_sends += 1
-            except Exception as e:
-                # Ошибка с одним пользователем не должна прерывать всю рассылку
-                logger.error(f"Ошибка при рассылке пользователю {user_id}: {e}")
-
-        logger.info(f"Рассылка завершена. Успешно отправлено {successful_sends} из {len(all_user_ids)} сообщений.")
+        :param message: Текст рассылки.
+        :param broadcast_id: Идентификатор прерванной рассылки, которую нужно продолжить.
+        :return: Итоговый прогресс рассылки.
+        """
+        if broadcast_id is None:
+            broadcast_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+            logger.info(f"Новая рассылка {broadcast_id}.")
+        engine = BroadcastService(
+            self.bot,
+            self.user_service,
+            checkpoint_dir=config.BROADCAST_CHECKPOINT_DIR,
+            chunk_size=config.BROADCAST_CHUNK_SIZE,
+        )
+        return engine.broadcast(broadcast_id, message)
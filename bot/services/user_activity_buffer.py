@@ -0,0 +1,151 @@
+# Отложенная запись (write-behind) активности пользователей.
+# Что делает:
+# - `record()` вызывается на каждое входящее сообщение и трогает только память:
+#   повторные записи одного пользователя схлопываются в одну.
+# - Отдельный поток-писатель сбрасывает накопленное в SQLite пачками
+#   (UserService.upsert_activity) при достижении размера пачки или по таймеру.
+# - `close()` сбрасывает остаток при остановке; `flush_soon()` будит писатель немедленно
+#   (например, из обработчика SIGTERM).
+# - `stats()` отдаёт метрики задержки и размеров пачек; они же публикуются датчиками
+#   bot_activity_buffer{stat=...} в реестре метрик (`/metrics`, `/dev stats`).
+
+import logging
+import threading
+import time
+from typing import Dict, Tuple, Optional, Any
+
+from bot.metrics import MetricsRegistry, registry
+from bot.services.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+
+class UserActivityBuffer:
+    """Буфер upsert'ов активности пользователей с фоновым потоком записи."""
+
+    def __init__(self, user_service: UserService, max_batch: int = 500, flush_interval: float = 1.0,
+                 metrics: MetricsRegistry = registry):
+        """
+        :param user_service: Сервис, в который пишутся пачки.
+        :param max_batch: Сбросить буфер, как только в нём столько разных пользователей.
+        :param flush_interval: Сбросить буфер не позже, чем через столько секунд после первой записи.
+        :param metrics: Реестр, в котором публикуются метрики буфера.
+        """
+        self.user_service = user_service
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+
+        self._pending: Dict[int, Tuple[str, float]] = {}
+        self._first_pending_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._closed = False
+        self._flush_requested = False
+
+        # Метрики
+        self.recorded = 0
+        self.flushed = 0
+        self.flush_count = 0
+        self.last_batch_size = 0
+        self.max_batch_size = 0
+        self.last_flush_lag = 0.0
+        self.max_flush_lag = 0.0
+
+        # Значения читаются из stats() при выводе метрик — запись активности ничего не платит
+        gauge = metrics.gauge("bot_activity_buffer", "Буфер активности пользователей: очередь, пачки, задержка сброса",
+                              "stat")
+        for stat in ("pending", "recorded", "flushed", "flush_count", "last_batch_size", "max_batch_size",
+                     "last_flush_lag_ms", "max_flush_lag_ms"):
+            gauge.labels(stat).set_function(lambda stat=stat: self.stats()[stat])
+
+        self._writer = threading.Thread(target=self._writer_loop, name="user-activity-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, user_id: int, name: str, seen_at: Optional[float] = None) -> None:
+        """Запоминает активность пользователя в памяти (без обращения к базе)."""
+        with self._cond:
+            if self._closed:
+                return
+            self._pending[user_id] = (name, seen_at if seen_at is not None else time.time())
+            self.recorded += 1
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def _take_batch(self) -> Tuple[Dict[int, Tuple[str, float]], float]:
+        """Забирает накопленные записи (вызывать под блокировкой)."""
+        batch, self._pending = self._pending, {}
+        self._flush_requested = False
+        lag = time.monotonic() - self._first_pending_at if self._first_pending_at is not None else 0.0
+        self._first_pending_at = None
+        return batch, lag
+
+    def _write(self, batch: Dict[int, Tuple[str, float]], lag: float) -> None:
+        if not batch:
+            return
+        self.user_service.upsert_activity(
+            (user_id, name, seen_at) for user_id, (name, seen_at) in batch.items()
+        )
+        with self._cond:
+            self.flushed += len(batch)
+            self.flush_count += 1
+            self.last_batch_size = len(batch)
+            self.max_batch_size = max(self.max_batch_size, len(batch))
+            self.last_flush_lag = lag
+            self.max_flush_lag = max(self.max_flush_lag, lag)
+
+    def _writer_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._flush_requested:
+                    if len(self._pending) >= self.max_batch:
+                        break
+                    if self._first_pending_at is not None:
+                        remaining = self.flush_interval - (time.monotonic() - self._first_pending_at)
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                batch, lag = self._take_batch()
+                closing = self._closed
+            try:
+                self._write(batch, lag)
+            except Exception as e:
+                logger.error(f"Ошибка при записи пачки активности ({len(batch)} записей): {e}")
+            if closing:
+                return
+
+    def flush(self) -> None:
+        """Синхронно сбрасывает накопленные записи в текущем потоке."""
+        with self._cond:
+            batch, lag = self._take_batch()
+        self._write(batch, lag)
+
+    def flush_soon(self) -> None:
+        """Просит поток-писатель сбросить накопленное прямо сейчас и сразу возвращается."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Останавливает поток-писатель, предварительно сбросив всё накопленное."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._writer.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики буфера: очередь, объём записей, размеры пачек и задержка сброса (мс)."""
+        with self._cond:
+            return {
+                "pending": len(self._pending),
+                "recorded": self.recorded,
+                "flushed": self.flushed,
+                "coalesced": self.recorded - self.flushed - len(self._pending),
+                "flush_count": self.flush_count,
+                "last_batch_size": self.last_batch_size,
+                "max_batch_size": self.max_batch_size,
+                "last_flush_lag_ms": self.last_flush_lag * 1000,
+                "max_flush_lag_ms": self.max_flush_lag * 1000,
+            }
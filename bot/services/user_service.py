@@ -23,25 +23,124 @@
 
 import sqlite3
 import logging
+import threading
+from typing import Iterable, Iterator, Optional
+
+from bot.helper.lru_cache import LRUCache, MISSING
+from bot.metrics import MetricsRegistry, registry
 
 # Получаем логгер для вывода информации
 logger = logging.getLogger(__name__)
 
 
+# SQL для вставки или обновления пользователя.
+# В отличие от 'INSERT OR REPLACE', upsert не удаляет строку,
+# поэтому created_at и is_active сохраняются.
+UPSERT_USER_SQL = (
+    "INSERT INTO users (user_id, name) VALUES (?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET name = excluded.name"
+)
+
+
+# Ответ get_user для отсутствующего пользователя
+USER_NOT_FOUND = "Пользователь не найден"
+# Маркер негативного кеширования в LRU-кеше
+_NOT_FOUND = object()
+# Число полос счётчиков поколений записи (ключ -> полоса по хешу user_id)
+_GENERATION_STRIPES = 1024
+
+# Колонки, добавленные после первой версии таблицы: имя -> определение для ALTER TABLE
+MIGRATED_COLUMNS = {
+    "is_active": "INTEGER NOT NULL DEFAULT 1",
+    "last_seen": "TIMESTAMP",
+}
+
+# Upsert активности: имя и время последнего сообщения (unix time).
+# Пользователь, написавший боту, снова доступен для рассылок — снимаем отметку неактивного.
+UPSERT_ACTIVITY_SQL = (
+    "INSERT INTO users (user_id, name, last_seen) VALUES (?, ?, ?) "
+    "ON CONFLICT(user_id) DO UPDATE SET name = excluded.name, last_seen = excluded.last_seen, is_active = 1"
+)
+
+
 class UserService:
-    def __init__(self, db_path='users.db'):
+    def __init__(self, db_path='users.db', cache_size_kb: int = 20000, synchronous: str = "NORMAL",
+                 user_cache_size: int = 100_000, user_cache_ttl: Optional[float] = None,
+                 metrics: MetricsRegistry = registry):
         """
         Инициализирует сервис, подключается к базе данных и создает таблицу,
         если она не существует.
 
+        Каждый поток получает одно долгоживущее соединение (вместо connect/close на каждый вызов).
+        Для файловой базы включается WAL: читатели не блокируют писателя.
+        Для ':memory:' у каждого потока была бы своя пустая база, поэтому используйте файл.
+
         :param db_path: Путь к файлу базы данных SQLite.
+        :param cache_size_kb: Размер страничного кеша SQLite на соединение, КБ.
+        :param synchronous: Режим PRAGMA synchronous (NORMAL безопасен в связке с WAL).
+        :param user_cache_size: Сколько имён держать в LRU-кеше get_user (ограничивает память).
+        :param user_cache_ttl: Время жизни записи кеша в секундах (None — без ограничения).
+        :param metrics: Реестр, в котором публикуются счётчики кеша get_user (bot_user_cache{stat=...}).
         """
         self.db_path = db_path
+        self.cache_size_kb = cache_size_kb
+        self.synchronous = synchronous
+        self._local = threading.local()
+        # Соединения по потокам-владельцам; соединения завершившихся потоков закрываются
+        self._connections: dict[threading.Thread, sqlite3.Connection] = {}
+        self._connections_lock = threading.Lock()
+        # Кеш чтения get_user: user_id -> имя или _NOT_FOUND (негативное кеширование)
+        self._user_cache = LRUCache(maxsize=user_cache_size, ttl=user_cache_ttl)
+        gauge = metrics.gauge("bot_user_cache", "Кеш get_user: размер, попадания, промахи, вытеснения", "stat")
+        for stat in ("size", "hits", "misses", "evictions", "expirations", "hit_ratio"):
+            gauge.labels(stat).set_function(lambda stat=stat: self._user_cache.stats()[stat])
+        # Поколения записи по полосам ключей: запись увеличивает поколение своей полосы,
+        # а чтение с промахом кладёт имя в кеш, только если поколение не изменилось за время
+        # запроса к базе. Так медленный читатель не затрёт более новое имя от писателя.
+        self._generations = [0] * _GENERATION_STRIPES
+        self._generations_lock = threading.Lock()
         self._create_table_if_not_exists()
 
-    def _get_connection(self):
-        """Создает и возвращает соединение с базой данных."""
-        return sqlite3.connect(self.db_path)
+    def _get_connection(self) -> sqlite3.Connection:
+        """Возвращает соединение текущего потока, создавая и настраивая его при первом вызове."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._prune_connections()
+                self._connections[threading.current_thread()] = conn
+        return conn
+
+    def _prune_connections(self) -> None:
+        """Закрывает соединения потоков, которые уже завершились (вызывать под _connections_lock)."""
+        for thread in [thread for thread in self._connections if not thread.is_alive()]:
+            self._connections.pop(thread).close()
+
+    def _cache_write(self, pairs: Iterable[tuple[int, object]]) -> None:
+        """Write-through после успешной записи в базу: новое поколение полосы и новое значение в кеше."""
+        with self._generations_lock:
+            for user_id, name in pairs:
+                self._generations[hash(user_id) % _GENERATION_STRIPES] += 1
+                self._user_cache.set(user_id, name)
+
+    def _cache_fill(self, user_id: int, value: object, generation: int) -> None:
+        """Кладёт прочитанное из базы значение, если с начала чтения не было записи этого ключа."""
+        with self._generations_lock:
+            if self._generations[hash(user_id) % _GENERATION_STRIPES] == generation:
+                self._user_cache.set(user_id, value)
+
+    def close(self) -> None:
+        """Закрывает соединения всех потоков (вызывать при остановке приложения)."""
+        with self._connections_lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
 
     def _create_table_if_not_exists(self):
         """
@@ -55,19 +154,24 @@ class UserService:
                      CREATE TABLE IF NOT EXISTS users (
                          user_id INTEGER PRIMARY KEY,
                          name TEXT NOT NULL,
-                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                         is_active INTEGER NOT NULL DEFAULT 1,
+                         last_seen TIMESTAMP
                      )
                 """)
+                # Миграция для баз, созданных до появления новых колонок
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(users)")}
+                for column, definition in MIGRATED_COLUMNS.items():
+                    if column not in columns:
+                        conn.execute(f"ALTER TABLE users ADD COLUMN {column} {definition}")
             logger.info(f"Таблица 'users' в базе данных '{self.db_path}' готова к работе.")
         except sqlite3.Error as e:
             logger.error(f"Ошибка при создании таблицы 'users': {e}")
-        finally:
-            conn.close()
 
     def add_user(self, user_id: int, name: str) -> None:
         """
         Добавляет нового пользователя или обновляет имя существующего.
-        Использует 'INSERT OR REPLACE' для атомарной операции.
+        Использует upsert ('ON CONFLICT DO UPDATE') для атомарной операции.
 
         :param user_id: ID пользователя.
         :param name: Имя пользователя.
@@ -75,15 +179,12 @@ class UserService:
         conn = self._get_connection()
         try:
             with conn:
-                conn.execute(
-                    "INSERT OR REPLACE INTO users (user_id, name) VALUES (?, ?)",
-                    (user_id, name)
-                )
+                conn.execute(UPSERT_USER_SQL, (user_id, name))
+            # Write-through: кеш сразу видит новое имя
+            self._cache_write([(user_id, name)])
             logger.info(f"Пользователь {user_id} ({name}) был добавлен или обновлен.")
         except sqlite3.Error as e:
             logger.error(f"Ошибка при добавлении пользователя {user_id}: {e}")
-        finally:
-            conn.close()
 
     def get_user(self, user_id: int) -> str:
         """
@@ -92,6 +193,13 @@ class UserService:
         :param user_id: ID пользователя.
         :return: Имя пользователя или стандартное сообщение, если он не найден.
         """
+        cached = self._user_cache.get(user_id)
+        if cached is not MISSING:
+            return USER_NOT_FOUND if cached is _NOT_FOUND else cached
+
+        # Поколение фиксируется до запроса: запись, успевшая за время чтения, его изменит
+        with self._generations_lock:
+            generation = self._generations[hash(user_id) % _GENERATION_STRIPES]
         conn = self._get_connection()
         try:
             cursor = conn.cursor()
@@ -99,14 +207,90 @@ class UserService:
             result = cursor.fetchone()  # Получаем одну запись
 
             if result:
+                self._cache_fill(user_id, result[0], generation)
                 return result[0]  # Возвращаем имя пользователя (первый столбец)
             else:
-                return "Пользователь не найден"
+                # Запоминаем и отсутствие пользователя, чтобы не ходить в базу повторно
+                self._cache_fill(user_id, _NOT_FOUND, generation)
+                return USER_NOT_FOUND
         except sqlite3.Error as e:
             logger.error(f"Ошибка при поиске пользователя {user_id}: {e}")
             return "Ошибка при доступе к базе данных"
-        finally:
-            conn.close()
+
+    def add_users(self, users: Iterable[tuple[int, str]]) -> int:
+        """
+        Добавляет или обновляет много пользователей одной транзакцией (executemany).
+        Намного быстрее, чем add_user в цикле: один fsync на всю пачку.
+
+        :param users: Итерируемое пар (user_id, name).
+        :return: Количество обработанных строк.
+        """
+        users = list(users)
+        conn = self._get_connection()
+        try:
+            with conn:
+                cursor = conn.executemany(UPSERT_USER_SQL, users)
+            # Кеш обновляется только после коммита: читатель не увидит незаписанное имя
+            self._cache_write(users)
+            logger.info(f"Пакетно добавлено или обновлено пользователей: {cursor.rowcount}.")
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при пакетном добавлении пользователей: {e}")
+            return 0
+
+    def upsert_activity(self, rows: Iterable[tuple[int, str, float]]) -> int:
+        """
+        Записывает пачку активности пользователей (user_id, name, last_seen) одной транзакцией.
+        Используется UserActivityBuffer для отложенной записи.
+
+        :param rows: Итерируемое троек (user_id, name, last_seen в unix time).
+        :return: Количество обработанных строк.
+        """
+        rows = list(rows)
+        conn = self._get_connection()
+        try:
+            with conn:
+                cursor = conn.executemany(UPSERT_ACTIVITY_SQL, rows)
+            self._cache_write((user_id, name) for user_id, name, _ in rows)
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при записи активности пользователей: {e}")
+            return 0
+
+    def _iter_chunks(self, columns: str, chunk_size: int, after_id: Optional[int],
+                     active_only: bool) -> Iterator[list[tuple]]:
+        """
+        Keyset-пагинация по первичному ключу (`WHERE user_id > ?`): каждая порция — поиск
+        по индексу, а не OFFSET со сканированием. Первая колонка `columns` должна быть user_id.
+        """
+        last_id = after_id if after_id is not None else -2 ** 63
+        query = f"SELECT {columns} FROM users WHERE user_id > ?"
+        if active_only:
+            query += " AND is_active = 1"
+        query += " ORDER BY user_id LIMIT ?"
+        while True:
+            conn = self._get_connection()
+            try:
+                rows = conn.execute(query, (last_id, chunk_size)).fetchall()
+            except sqlite3.Error as e:
+                logger.error(f"Ошибка при чтении порции пользователей после {last_id}: {e}")
+                return
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+
+    def iter_users(self, chunk_size: int = 1000, active_only: bool = False) -> Iterator[tuple[int, str]]:
+        """
+        Итератор по всем пользователям (user_id, name) в порядке user_id.
+        Читает порциями по первичному ключу, поэтому память не зависит от размера таблицы.
+        """
+        for rows in self._iter_chunks("user_id, name", chunk_size, None, active_only):
+            yield from rows
+
+    def cache_stats(self) -> dict:
+        """Счётчики кеша get_user: попадания, промахи, вытеснения."""
+        return self._user_cache.stats()
 
     # получаем ID всех пользователей из базы, чтоб def `broadcast_to_all_users`
     # в файле `notification_service.py` заработала
@@ -126,10 +310,51 @@ class UserService:
             user_ids = [item[0] for item in results]
         except sqlite3.Error as e:
             logger.error(f"Ошибка при получении списка всех пользователей: {e}")
-        finally:
-            conn.close()
         return user_ids
 
+    def iter_user_ids(self, chunk_size: int = 1000, after_id: Optional[int] = None,
+                      active_only: bool = True) -> Iterator[list[int]]:
+        """
+        Потоково отдаёт ID пользователей порциями, не загружая всю таблицу в память.
+        Использует keyset-пагинацию по первичному ключу (`WHERE user_id > ?`),
+        поэтому каждая порция — это поиск по индексу, а не OFFSET со сканированием.
+
+        :param chunk_size: Размер одной порции.
+        :param after_id: Начать после этого ID (для возобновления прерванной рассылки).
+        :param active_only: Пропускать пользователей, помеченных неактивными.
+        :return: Итератор списков ID в порядке возрастания.
+        """
+        for rows in self._iter_chunks("user_id", chunk_size, after_id, active_only):
+            yield [row[0] for row in rows]
+
+    def count_user_ids(self, after_id: Optional[int] = None, active_only: bool = True) -> int:
+        """
+        Считает пользователей (после указанного ID), не загружая их в память.
+        :return: Количество пользователей.
+        """
+        query = "SELECT COUNT(*) FROM users WHERE user_id > ?"
+        if active_only:
+            query += " AND is_active = 1"
+        conn = self._get_connection()
+        try:
+            return conn.execute(query, (after_id if after_id is not None else -2 ** 63,)).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при подсчёте пользователей: {e}")
+            return 0
+
+    def set_active(self, user_id: int, active: bool) -> None:
+        """
+        Помечает пользователя активным или неактивным
+        (например, если он заблокировал бота).
+        """
+        conn = self._get_connection()
+        try:
+            with conn:
+                conn.execute("UPDATE users SET is_active = ? WHERE user_id = ?", (int(active), user_id))
+            logger.info(f"Пользователь {user_id} помечен как {'активный' if active else 'неактивный'}.")
+        except sqlite3.Error as e:
+            logger.error(f"Ошибка при изменении статуса пользователя {user_id}: {e}")
+
 
 # Пример использования
 if __name__ == "__main__":
@@ -0,0 +1,127 @@
+# Общий транспортный слой для всех исходящих HTTP-запросов бота.
+# Что делает:
+# - Держит по одному `requests.Session` на хост, поэтому TCP+TLS соединения переиспользуются (keep-alive).
+# - Настраивает размер пула соединений, таймауты подключения/чтения и повторы с backoff.
+# - Позволяет подменить транспорт (`set_transport`), например, чтобы направить запросы на локальный stub-сервер в тестах.
+
+import threading
+from typing import Optional, Dict, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from bot.config import config
+
+
+class HttpTransport:
+    """
+    Пул keep-alive сессий `requests.Session`, по одной на каждый хост.
+    Потокобезопасен: сессии создаются лениво под блокировкой,
+    а пул соединений urllib3 внутри сессии сам синхронизирован.
+    """
+
+    def __init__(self,
+                 pool_size: int = 10,
+                 connect_timeout: float = 5.0,
+                 read_timeout: float = 30.0,
+                 retries: int = 3,
+                 backoff_factor: float = 0.5):
+        """
+        :param pool_size: Максимальное количество keep-alive соединений на хост.
+        :param connect_timeout: Таймаут установки соединения, секунды.
+        :param read_timeout: Таймаут чтения ответа по умолчанию, секунды.
+        :param retries: Количество повторов при ошибках соединения и 5xx.
+        :param backoff_factor: Коэффициент экспоненциальной паузы между повторами.
+        """
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _build_session(self) -> requests.Session:
+        """Создаёт сессию с пулом соединений и политикой повторов."""
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            # POST (sendMessage) повторяем только при ошибке соединения,
+            # чтобы не отправить одно сообщение дважды
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """Возвращает (и при необходимости создаёт) сессию для хоста из URL."""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(host)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(host)
+                if session is None:
+                    session = self._build_session()
+                    self._sessions[host] = session
+        return session
+
+    def _timeout(self, read_timeout: Optional[float]) -> Tuple[float, float]:
+        return self.connect_timeout, read_timeout if read_timeout is not None else self.read_timeout
+
+    def get(self, url: str, params: Optional[dict] = None,
+            read_timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """GET-запрос через keep-alive сессию хоста."""
+        return self.session_for(url).get(url, params=params, timeout=self._timeout(read_timeout), **kwargs)
+
+    def post(self, url: str, json: Optional[dict] = None,
+             read_timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """POST-запрос через keep-alive сессию хоста."""
+        return self.session_for(url).post(url, json=json, timeout=self._timeout(read_timeout), **kwargs)
+
+    def close(self) -> None:
+        """Закрывает все сессии и их соединения."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# Singleton-like: один общий транспорт на процесс, который можно подменить
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Возвращает общий транспорт, создавая его из настроек при первом вызове."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport(
+                    pool_size=config.HTTP_POOL_SIZE,
+                    connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+                    read_timeout=config.HTTP_READ_TIMEOUT,
+                    retries=config.HTTP_RETRIES,
+                    backoff_factor=config.HTTP_BACKOFF_FACTOR,
+                )
+    return _transport
+
+
+def set_transport(transport: Optional[HttpTransport]) -> None:
+    """Подменяет общий транспорт (None — вернуться к транспорту по умолчанию)."""
+    global _transport
+    with _transport_lock:
+        if _transport is not None and _transport is not transport:
+            _transport.close()
+        _transport = transport
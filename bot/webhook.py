@@ -0,0 +1,114 @@
+# Приём обновлений через webhook вместо long-polling.
+# Что делает:
+# - Поднимает встроенный HTTP-сервер (stdlib `http.server`), который принимает POST с обновлениями Telegram.
+# - Проверяет заголовок `X-Telegram-Bot-Api-Secret-Token`, чтобы отсеять чужие запросы.
+# - Сразу отвечает 200 и передаёт обновление в фоновую очередь (например, ChatDispatcher.submit),
+#   поэтому Telegram не ждёт, пока команда выполнится.
+# - Если фоновая очередь переполнена, отвечает 503 — Telegram повторит доставку позже.
+
+import hmac
+import json
+import queue
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable, Any, Dict, Optional
+
+from bot.logger.app_logger import logger
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """
+    Встроенный HTTP-приёмник обновлений Telegram.
+    Сам обновления не обрабатывает: передаёт их в функцию `submit(update)`.
+    """
+
+    def __init__(self, submit: Callable[..., Any],
+                 host: str = "0.0.0.0",
+                 port: int = 8443,
+                 path: str = "/webhook",
+                 secret_token: str = "",
+                 submit_timeout: float = 1.0):
+        """
+        :param submit: Функция постановки обновления в фоновую очередь `submit(update, timeout=...)`.
+        :param host: Адрес, на котором слушает сервер.
+        :param port: Порт (0 — выбрать свободный, удобно для тестов).
+        :param path: Путь, на который Telegram отправляет обновления.
+        :param secret_token: Ожидаемое значение заголовка секрета (обязательно).
+        :param submit_timeout: Сколько ждать места в очереди, прежде чем ответить 503.
+        :raises ValueError: Если секрет пустой.
+        """
+        if not secret_token:
+            raise ValueError("Webhook-сервер не запускается без secret_token")
+        self.submit = submit
+        self.path = path
+        self.secret_token = secret_token
+        self.submit_timeout = submit_timeout
+        self.received = 0
+        self.rejected = 0
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_port
+
+    def _make_handler(self):
+        webhook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self, status: int, body: bytes = b"") -> None:
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                status = webhook.accept(self.path, self.headers.get(SECRET_HEADER, ""),
+                                        self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                self._respond(status, b"ok" if status == 200 else b"")
+
+            def log_message(self, format, *args):
+                # Не засоряем stderr строкой на каждый запрос
+                pass
+
+        return Handler
+
+    def accept(self, path: str, secret: str, body: bytes) -> int:
+        """
+        Проверяет и принимает одно обновление.
+        :return: HTTP-статус ответа для Telegram.
+        """
+        if path != self.path:
+            return 404
+        if not hmac.compare_digest(secret.encode(), self.secret_token.encode()):
+            self.rejected += 1
+            logger.warning("Webhook: запрос с неверным секретом отклонён.")
+            return 403
+        try:
+            update: Dict[str, Any] = json.loads(body)
+        except ValueError:
+            return 400
+        try:
+            self.submit(update, timeout=self.submit_timeout)
+        except queue.Full:
+            logger.warning(f"Webhook: очередь переполнена, обновление {update.get('update_id')} отклонено.")
+            return 503
+        self.received += 1
+        return 200
+
+    def start(self) -> None:
+        """Запускает сервер в фоновом потоке."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bot-webhook", daemon=True)
+        self._thread.start()
+        logger.info(f"Webhook-сервер слушает порт {self.port}, путь {self.path}.")
+
+    def stop(self) -> None:
+        """Останавливает сервер и освобождает порт."""
+        if self._thread:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
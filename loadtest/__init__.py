@@ -0,0 +1,2 @@
+# Нагрузочное тестирование бота: фейковый Bot API, заглушка API курсов и генератор нагрузки.
+# Запуск: python -m loadtest.run --help
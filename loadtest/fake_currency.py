@@ -0,0 +1,90 @@
+# Заглушка API курсов валют (формат exchangerate.host) для нагрузочного тестирования.
+# Что делает:
+# - Отвечает на /live, /list и /convert по фиксированной таблице котировок к USD.
+# - Может добавлять искусственную задержку (`latency`), чтобы имитировать медленный внешний API.
+# - Считает запросы по endpoint (видно, как работают кеш и схлопывание запросов в CurrencyHelper).
+
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+# Курс 1 USD в валюте
+USD_RATES: Dict[str, float] = {
+    "USD": 1.0, "EUR": 0.92, "UAH": 41.2, "GBP": 0.79, "PLN": 3.98,
+    "JPY": 151.3, "CHF": 0.88, "CAD": 1.36, "CZK": 23.1, "SEK": 10.6,
+}
+
+
+class FakeCurrencyAPI:
+    """Заглушка API курсов; адрес для CURRENCY_API_URL — `url`."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        """
+        :param latency: Задержка каждого ответа, секунды.
+        """
+        self.latency = latency
+        self.requests: Counter = Counter()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _respond(self, endpoint: str, query: Dict[str, str]) -> dict:
+        self.requests[endpoint] += 1
+        if endpoint == "live":
+            source = query.get("source", "USD").upper()
+            base = USD_RATES.get(source)
+            if base is None:
+                return {"success": False, "error": {"code": 201, "info": "invalid source currency"}}
+            return {"success": True, "source": source, "timestamp": int(time.time()),
+                    "quotes": {source + code: rate / base for code, rate in USD_RATES.items() if code != source}}
+        if endpoint == "list":
+            return {"success": True, "currencies": {code: code for code in USD_RATES}}
+        if endpoint == "convert":
+            source, target = query.get("from", "").upper(), query.get("to", "").upper()
+            if source not in USD_RATES or target not in USD_RATES:
+                return {"success": False, "error": {"code": 402, "info": "invalid currency code"}}
+            rate = USD_RATES[target] / USD_RATES[source]
+            amount = float(query.get("amount", 1))
+            return {"success": True, "info": {"rate": rate}, "result": rate * amount}
+        return {"success": False, "error": {"code": 103, "info": "invalid API function"}}
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+                if api.latency:
+                    time.sleep(api.latency)
+                payload = json.dumps(api._respond(parts.path.strip("/"), query)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeCurrencyAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-currency-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
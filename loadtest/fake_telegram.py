@@ -0,0 +1,174 @@
+# Локальный фейковый Telegram Bot API для нагрузочного тестирования.
+# Что делает:
+# - Реализует getUpdates с семантикой offset: обновления с update_id < offset считаются
+#   подтверждёнными и удаляются; long-polling ждёт новых обновлений до `timeout` секунд.
+# - Реализует sendMessage: запоминает ответ и сообщает о нём через `on_send`
+#   (по нему генератор нагрузки считает задержку ответа). С вероятностью `error_rate`
+#   отвечает 429 Too Many Requests с retry_after, как настоящий Bot API.
+# - setWebhook / deleteWebhook / getMe отвечают успехом, остальные методы — 404.
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+class FakeBotAPI:
+    """Фейковый Bot API на ThreadingHTTPServer; адрес для бота — `api_url` (без токена)."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, error_rate: float = 0.0,
+                 retry_after: int = 1, on_send: Optional[Callable[[int, str, float], None]] = None,
+                 seed: Optional[int] = None):
+        """
+        :param port: Порт (0 — выбрать свободный).
+        :param error_rate: Доля вызовов sendMessage, на которые отвечаем 429.
+        :param retry_after: Значение parameters.retry_after в ответе 429, секунды.
+        :param on_send: Вызывается для каждого принятого sendMessage: (chat_id, text, время perf_counter).
+        """
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.on_send = on_send
+        self._random = random.Random(seed)
+        self._updates: Deque[Dict[str, Any]] = deque()
+        self._next_update_id = 1
+        self._cond = threading.Condition()
+        self._closed = False
+        self._message_id = 0
+        self.stats = {"getUpdates": 0, "sendMessage": 0, "injected_429": 0, "delivered_updates": 0}
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def api_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    # --- Обновления ---
+
+    def push_update(self, chat_id: int, user_id: int, text: str) -> int:
+        """Ставит в очередь текстовое сообщение от пользователя; возвращает update_id."""
+        with self._cond:
+            update_id = self._next_update_id
+            self._next_update_id += 1
+            self._updates.append({
+                "update_id": update_id,
+                "message": {
+                    "message_id": update_id,
+                    "date": int(time.time()),
+                    "text": text,
+                    "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+                    "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                },
+            })
+            self._cond.notify_all()
+        return update_id
+
+    @property
+    def pending(self) -> int:
+        """Сколько обновлений ещё не подтверждено ботом."""
+        with self._cond:
+            return len(self._updates)
+
+    def _get_updates(self, offset: Optional[int], limit: int, timeout: float):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            # offset подтверждает все обновления с меньшим update_id
+            if offset is not None:
+                while self._updates and self._updates[0]["update_id"] < offset:
+                    self._updates.popleft()
+            while not self._updates and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [self._updates[i] for i in range(min(limit, len(self._updates)))]
+            self.stats["getUpdates"] += 1
+            self.stats["delivered_updates"] += len(batch)
+        return batch
+
+    # --- Исходящие сообщения ---
+
+    def _send_message(self, payload: Dict[str, Any]):
+        if self.error_rate and self._random.random() < self.error_rate:
+            with self._cond:
+                self.stats["injected_429"] += 1
+            return 429, {"ok": False, "error_code": 429,
+                         "description": f"Too Many Requests: retry after {self.retry_after}",
+                         "parameters": {"retry_after": self.retry_after}}
+        received = time.perf_counter()
+        chat_id, text = int(payload["chat_id"]), str(payload.get("text", ""))
+        with self._cond:
+            self.stats["sendMessage"] += 1
+            self._message_id += 1
+            message_id = self._message_id
+        if self.on_send is not None:
+            self.on_send(chat_id, text, received)
+        return 200, {"ok": True, "result": {"message_id": message_id, "chat": {"id": chat_id},
+                                            "date": int(time.time()), "text": text}}
+
+    def _dispatch(self, method: str, params: Dict[str, Any]):
+        if method == "getUpdates":
+            offset = params.get("offset")
+            result = self._get_updates(int(offset) if offset is not None else None,
+                                       int(params.get("limit", 100)), float(params.get("timeout", 0)))
+            return 200, {"ok": True, "result": result}
+        if method == "sendMessage":
+            return self._send_message(params)
+        if method in ("setWebhook", "deleteWebhook"):
+            return 200, {"ok": True, "result": True}
+        if method == "getMe":
+            return 200, {"ok": True, "result": {"id": 1, "is_bot": True, "username": "loadtest_bot"}}
+        return 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self, body: Optional[bytes]):
+                parts = urlsplit(self.path)
+                params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+                if body:
+                    params.update(json.loads(body))
+                status, data = api._dispatch(parts.path.rsplit("/", 1)[-1], params)
+                payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Бот остановлен, пока ждал ответа long-polling
+                    pass
+
+            def do_GET(self):
+                self._handle(None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self._handle(self.rfile.read(length) if length else None)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeBotAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-bot-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Останавливает сервер; ожидающие getUpdates сразу получают пустой ответ."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
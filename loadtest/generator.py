@@ -0,0 +1,150 @@
+# Генератор нагрузки: синтетические чаты и пользователи с заданной частотой сообщений.
+# Что делает:
+# - Кладёт обновления в FakeBotAPI равномерно с частотой `rate` в секунду в течение `duration` секунд;
+#   чат, пользователь и текст выбираются случайно (текст — по весам из `mix`).
+# - Сопоставляет отправленные обновления с ответами sendMessage: бот отвечает на каждое
+#   текстовое сообщение ровно одним сообщением и сохраняет порядок внутри чата, поэтому ответ
+#   в чат закрывает самое старое неотвеченное обновление этого чата (FIFO).
+# - Считает пропускную способность (ответов в секунду) и перцентили задержки ответа.
+
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from loadtest.fake_telegram import FakeBotAPI
+
+# Смесь сообщений по умолчанию: (текст, вес)
+DEFAULT_MIX: Tuple[Tuple[str, float], ...] = (
+    ("/help", 3),
+    ("/currency USD", 3),
+    ("/currency1 10 EUR to UAH", 2),
+    ("привет, бот", 1),
+    ("/dev", 1),
+)
+
+
+def parse_mix(spec: str) -> List[Tuple[str, float]]:
+    """Разбирает смесь вида "/help=3;/currency USD=1" (вес по умолчанию 1)."""
+    mix = []
+    for item in filter(None, (part.strip() for part in spec.split(";"))):
+        text, _, weight = item.rpartition("=") if "=" in item else (item, "", "1")
+        mix.append((text.strip(), float(weight)))
+    return mix
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Перцентиль q (0..1) методом ближайшего ранга; для пустого списка — 0."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+class ReplyTracker:
+    """Сопоставляет обновления с ответами бота по чату (FIFO) и собирает задержки."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiting: Dict[int, Deque[float]] = {}
+        self.latencies: List[float] = []
+        self.unexpected = 0
+        self.first_sent: Optional[float] = None
+        self.last_reply: Optional[float] = None
+
+    def expect(self, chat_id: int, sent_at: float) -> None:
+        with self._lock:
+            self._waiting.setdefault(chat_id, deque()).append(sent_at)
+            if self.first_sent is None:
+                self.first_sent = sent_at
+
+    def on_send(self, chat_id: int, text: str, received_at: float) -> None:
+        """Колбэк FakeBotAPI.on_send."""
+        with self._lock:
+            waiting = self._waiting.get(chat_id)
+            if not waiting:
+                self.unexpected += 1
+                return
+            self.latencies.append(received_at - waiting.popleft())
+            self.last_reply = received_at
+
+    @property
+    def outstanding(self) -> int:
+        with self._lock:
+            return sum(len(waiting) for waiting in self._waiting.values())
+
+
+class LoadGenerator:
+    """Подаёт синтетические обновления в FakeBotAPI и собирает отчёт."""
+
+    def __init__(self, api: FakeBotAPI, tracker: ReplyTracker, rate: float, duration: float,
+                 chats: int = 100, users: int = 1000, mix: Sequence[Tuple[str, float]] = DEFAULT_MIX,
+                 seed: int = 1):
+        """
+        :param rate: Обновлений в секунду.
+        :param duration: Длительность подачи нагрузки, секунды.
+        :param chats: Количество синтетических чатов (id 1..chats).
+        :param users: Количество синтетических пользователей (id 100000..).
+        :param mix: Тексты сообщений с весами.
+        """
+        self.api = api
+        self.tracker = tracker
+        self.rate = rate
+        self.duration = duration
+        self.chats = chats
+        self.users = users
+        self.mix = list(mix)
+        self._random = random.Random(seed)
+        self.sent = 0
+        self.elapsed = 0.0
+
+    def run(self) -> None:
+        """Подаёт нагрузку (блокирует вызывающий поток на `duration` секунд)."""
+        texts = [text for text, _ in self.mix]
+        weights = [weight for _, weight in self.mix]
+        total = int(self.rate * self.duration)
+        clock = time.perf_counter
+        started = clock()
+        while self.sent < total:
+            # Догоняем расписание пачкой: так частота держится и при грубом sleep
+            due = min(total, int((clock() - started) * self.rate) + 1)
+            while self.sent < due:
+                chat_id = self._random.randint(1, self.chats)
+                user_id = 100000 + self._random.randrange(self.users)
+                text = self._random.choices(texts, weights)[0]
+                # Ожидание регистрируется до отправки: ответ может прийти раньше, чем push_update вернётся
+                self.tracker.expect(chat_id, clock())
+                self.api.push_update(chat_id, user_id, text)
+                self.sent += 1
+            next_at = started + self.sent / self.rate
+            delay = next_at - clock()
+            if delay > 0:
+                time.sleep(delay)
+        self.elapsed = clock() - started
+
+    def wait_for_replies(self, timeout: float) -> None:
+        """Ждёт, пока бот ответит на все обновления, но не дольше `timeout` секунд."""
+        deadline = time.monotonic() + timeout
+        while self.tracker.outstanding and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def report(self) -> Dict[str, float]:
+        latencies = sorted(self.tracker.latencies)
+        tracker = self.tracker
+        window = (tracker.last_reply - tracker.first_sent) if latencies else 0.0
+        return {
+            "sent": self.sent,
+            "replied": len(latencies),
+            "lost": tracker.outstanding,
+            "unexpected_replies": tracker.unexpected,
+            "offered_rate": self.sent / self.elapsed if self.elapsed else 0.0,
+            "throughput": len(latencies) / window if window else 0.0,
+            "latency_ms": {
+                "p50": percentile(latencies, 0.50) * 1000,
+                "p90": percentile(latencies, 0.90) * 1000,
+                "p99": percentile(latencies, 0.99) * 1000,
+                "max": (latencies[-1] if latencies else 0.0) * 1000,
+            },
+            "bot_api": dict(self.api.stats),
+        }
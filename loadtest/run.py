@@ -0,0 +1,164 @@
+# Сквозной нагрузочный тест: фейковый Bot API + заглушка API курсов + генератор нагрузки.
+# Запуск: python -m loadtest.run [--rate 200] [--duration 10] [--chats 100] [--users 1000]
+#                                [--mix "/help=3;/currency USD=1"] [--error-rate 0.01] [--retry-after 1]
+#                                [--currency-latency 0.05] [--engine sync|async] [--workers 8]
+#                                [--telegram-limits] [--in-process] [--output report.json]
+# Что делает:
+# - Поднимает FakeBotAPI и FakeCurrencyAPI на свободных локальных портах.
+# - Запускает бота отдельным процессом (`python main.py`, как в продакшене) с окружением,
+#   направленным на заглушки, либо в этом же процессе (--in-process, удобно для профилирования).
+#   Временные файлы бота (лог, база) пишутся во временную папку.
+# - Подаёт нагрузку, ждёт ответов и печатает пропускную способность и перцентили задержки ответа.
+# По умолчанию лимиты отправки OutboundQueue сняты, чтобы мерить сам бот, а не лимиты Telegram;
+# --telegram-limits оставляет лимиты из конфигурации (30 сообщений/с на бота, 1/с на чат).
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from loadtest.fake_currency import FakeCurrencyAPI  # noqa: E402
+from loadtest.fake_telegram import FakeBotAPI  # noqa: E402
+from loadtest.generator import DEFAULT_MIX, LoadGenerator, ReplyTracker, parse_mix  # noqa: E402
+
+TOKEN = "LOADTEST"
+
+
+def bot_environment(args, bot_api: FakeBotAPI, currency_api: FakeCurrencyAPI, workdir: str) -> Dict[str, str]:
+    """Переменные окружения бота под тест."""
+    env = {
+        "TOKEN": TOKEN,
+        "URL": bot_api.api_url,
+        "ADMIN_ID": "1",
+        "ADMIN_IDS": "1",
+        "UPDATE_MODE": "polling",
+        # Короткий long-poll: по SIGTERM бот завершается после текущего getUpdates
+        "POLL_TIMEOUT": "1",
+        "BOT_ENGINE": args.engine,
+        "DISPATCH_WORKERS": str(args.workers),
+        "CURRENCY_API_URL": currency_api.url,
+        "CURRENCY_API_KEY": "loadtest",
+        "CURRENCY_HISTORY_DIR": "",
+        "LOG_FILE": os.path.join(workdir, "bot.log"),
+        "LOG_CONSOLE": "false",
+        "USERS_DB_PATH": os.path.join(workdir, "users.db"),
+        "PROFILE_DIR": os.path.join(workdir, "profiles"),
+    }
+    if not args.telegram_limits:
+        env.update({"SEND_GLOBAL_RATE": "1000000", "SEND_CHAT_RATE": "1000000", "SEND_GROUP_RATE": "1000000"})
+    return env
+
+
+class SubprocessBot:
+    """Бот в отдельном процессе: `python main.py`."""
+
+    def __init__(self, env: Dict[str, str], workdir: str):
+        self.process = subprocess.Popen([sys.executable, str(ROOT / "main.py")], cwd=workdir,
+                                        env={**os.environ, **env})
+
+    def stop(self) -> None:
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class InProcessBot:
+    """Бот в потоке этого процесса (окружение должно быть задано до импорта bot)."""
+
+    def __init__(self, env: Dict[str, str]):
+        os.environ.update(env)
+        from bot.core import TelegramBot
+        from bot.helper.currency_helper import CurrencyHelper
+        # Как в main.py: фоновое обновление курсов запускается явно
+        CurrencyHelper.shared().start_background_refresh()
+        TelegramBot._instance = None
+        self.bot = TelegramBot(TOKEN, api_url=env["URL"])
+        self.thread = threading.Thread(target=self.bot.run, name="loadtest-bot", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.bot.stop()
+
+
+def wait_until_polling(bot_api: FakeBotAPI, timeout: float) -> None:
+    """Ждёт первого getUpdates от бота."""
+    deadline = time.monotonic() + timeout
+    while not bot_api.stats["getUpdates"]:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Бот не начал опрос getUpdates за {timeout:g} с")
+        time.sleep(0.05)
+
+
+def print_report(report: dict) -> None:
+    latency = report["latency_ms"]
+    print(f"Отправлено обновлений: {report['sent']} ({report['offered_rate']:.0f}/с)")
+    print(f"Получено ответов:      {report['replied']}, без ответа: {report['lost']}")
+    print(f"Пропускная способность: {report['throughput']:.1f} ответов/с")
+    print(f"Задержка ответа, мс:   p50 {latency['p50']:.1f}  p90 {latency['p90']:.1f}  "
+          f"p99 {latency['p99']:.1f}  max {latency['max']:.1f}")
+    print(f"Bot API: {report['bot_api']}")
+    print(f"API курсов: {report['currency_api']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Сквозной нагрузочный тест бота")
+    parser.add_argument("--rate", type=float, default=200, help="обновлений в секунду")
+    parser.add_argument("--duration", type=float, default=10, help="длительность нагрузки, секунды")
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--mix", default="", help='смесь сообщений: "/help=3;/currency USD=1"')
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля sendMessage с ответом 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after в ответе 429, секунды")
+    parser.add_argument("--currency-latency", type=float, default=0.0, help="задержка API курсов, секунды")
+    parser.add_argument("--engine", choices=("sync", "async"), default="sync")
+    parser.add_argument("--workers", type=int, default=8, help="DISPATCH_WORKERS для синхронного движка")
+    parser.add_argument("--telegram-limits", action="store_true", help="оставить лимиты отправки из конфигурации")
+    parser.add_argument("--in-process", action="store_true", help="запустить бота в этом же процессе")
+    parser.add_argument("--drain", type=float, default=30, help="сколько ждать оставшихся ответов, секунды")
+    parser.add_argument("--output", help="куда записать отчёт в JSON")
+    args = parser.parse_args()
+    if args.in_process and args.engine == "async":
+        parser.error("--in-process поддерживает только синхронный движок")
+
+    tracker = ReplyTracker()
+    bot_api = FakeBotAPI(error_rate=args.error_rate, retry_after=args.retry_after, on_send=tracker.on_send).start()
+    currency_api = FakeCurrencyAPI(latency=args.currency_latency).start()
+    with tempfile.TemporaryDirectory(prefix="bot-loadtest-") as workdir:
+        env = bot_environment(args, bot_api, currency_api, workdir)
+        bot = InProcessBot(env) if args.in_process else SubprocessBot(env, workdir)
+        try:
+            wait_until_polling(bot_api, timeout=30)
+            generator = LoadGenerator(bot_api, tracker, rate=args.rate, duration=args.duration,
+                                      chats=args.chats, users=args.users,
+                                      mix=parse_mix(args.mix) if args.mix else DEFAULT_MIX)
+            generator.run()
+            generator.wait_for_replies(args.drain)
+        finally:
+            bot.stop()
+            bot_api.stop()
+            currency_api.stop()
+
+    report = generator.report()
+    report["currency_api"] = dict(currency_api.requests)
+    report["config"] = {key: value for key, value in vars(args).items() if key != "output"}
+    print_report(report)
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return 0 if not report["lost"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,6 @@
 from bot.core import TelegramBot
 import os
+import signal
 from dotenv import load_dotenv
 
 def main():
@@ -15,7 +16,76 @@ def main():
     # print(bot.handle_message("/currency", 100, 1))
     # print(bot.handle_message("hello badword", 100, 2))  # буде заблоковано
 
-    bot.run()
+    from bot.config import config
+    user_service = None
+    if config.TRACK_USER_ACTIVITY:
+        from bot.services.user_service import UserService
+        from bot.services.user_activity_buffer import UserActivityBuffer
+        user_service = UserService(
+            config.USERS_DB_PATH,
+            user_cache_size=config.USER_CACHE_SIZE,
+            user_cache_ttl=config.USER_CACHE_TTL or None,
+        )
+        bot.activity_buffer = UserActivityBuffer(
+            user_service,
+            max_batch=config.ACTIVITY_BATCH_SIZE,
+            flush_interval=config.ACTIVITY_FLUSH_INTERVAL,
+        )
+
+    # Модули команд импортируются лениво; тяжёлые команды прогреваем в фоне
+    from bot.factories import CommandFactory
+    CommandFactory.warm(config.COMMAND_WARMUP)
+
+    # Фоновое обновление курсов запускается явно при старте бота, а не при создании хелпера
+    currency_helper = None
+    try:
+        from bot.helper.currency_helper import CurrencyHelper
+        currency_helper = CurrencyHelper.shared()
+        currency_helper.start_background_refresh()
+    except ValueError:
+        # Нет настроек API курсов — команды валют сами сообщат об ошибке
+        pass
+
+    metrics_server = None
+    if config.METRICS_PORT:
+        from bot.metrics import MetricsServer
+        metrics_server = MetricsServer(config.METRICS_HOST, config.METRICS_PORT)
+        metrics_server.start()
+
+    engine = bot
+    if config.UPDATE_MODE != "webhook" and config.BOT_ENGINE == "async":
+        from bot.async_core import AsyncTelegramBot
+        engine = AsyncTelegramBot(bot)
+
+    def on_sigterm(signum, frame):
+        # docker stop / systemd: штатная остановка, чтобы сработал finally ниже.
+        # Цикл завершится после текущего long-poll (до POLL_TIMEOUT секунд), поэтому
+        # буфер активности сбрасываем сразу — на случай, если следом придёт SIGKILL.
+        engine.stop()
+        if bot.activity_buffer is not None:
+            bot.activity_buffer.flush_soon()
+
+    signal.signal(signal.SIGTERM, on_sigterm)
+
+    try:
+        if config.UPDATE_MODE == "webhook":
+            bot.run_webhook()
+        elif engine is not bot:
+            # asyncio нужен только асинхронному движку (~50 мс на старте)
+            import asyncio
+            asyncio.run(engine.run())
+        else:
+            bot.run()
+    finally:
+        # Сбрасываем накопленную активность пользователей перед выходом
+        if bot.activity_buffer is not None:
+            bot.activity_buffer.close()
+        if user_service is not None:
+            user_service.close()
+        if currency_helper is not None:
+            currency_helper.stop_background_refresh()
+        if metrics_server is not None:
+            metrics_server.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,65 @@
+import os
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+# bot/config.py требует ADMIN_ID при импорте; в тестах .env отсутствует
+os.environ.setdefault("ADMIN_ID", "1")
+
+
+class StubServer:
+    """
+    Локальный HTTP-сервер: отвечает JSON по последнему сегменту пути и запоминает запросы.
+    Ответ — dict или функция (query, body) -> dict.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.connections = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, body):
+                stub.connections.add(self.client_address)
+                path = urlsplit(self.path).path
+                query = parse_qs(urlsplit(self.path).query)
+                stub.requests.append((self.command, path, query, body))
+                route = stub.routes.get(path.rsplit("/", 1)[-1], {"ok": True, "result": []})
+                payload = json.dumps(route(query, body) if callable(route) else route).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                self._reply(None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self._reply(json.loads(self.rfile.read(length) or b"null"))
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
@@ -0,0 +1,104 @@
+import time
+
+from bot.helper.currency_helper import CurrencyHelper
+from bot.helper.currency_refresher import CurrencyRefresher
+from bot.transport import HttpTransport
+
+
+def test_rate_cache_serves_any_amount_from_one_upstream_call(stub_server, monkeypatch):
+    monkeypatch.setenv("CURRENCY_API_URL", stub_server.url)
+    monkeypatch.setenv("CURRENCY_API_KEY", "key")
+    stub_server.routes["convert"] = {"success": True, "result": 40.0}
+    transport = HttpTransport(retries=0)
+    helper = CurrencyHelper(transport=transport, rate_ttl=60, background_refresh=False, history_dir="")
+
+    assert helper.convert("USD", "UAH", 1)["result"] == 40.0
+    assert helper.convert("usd", "uah", 2.5)["result"] == 100.0
+    assert helper.convert("UAH", "USD", 80)["result"] == 2.0
+
+    stats = helper.cache_stats()
+    # Один неудачный запрос снимка `live` + один запрос курса пары
+    assert (stats["upstream_calls"], stats["hits"], stats["misses"]) == (2, 2, 1)
+    transport.close()
+
+
+def test_rate_matrix_answers_every_pair_from_one_snapshot(stub_server, monkeypatch):
+    monkeypatch.setenv("CURRENCY_API_URL", stub_server.url)
+    monkeypatch.setenv("CURRENCY_API_KEY", "key")
+    stub_server.routes["live"] = {"success": True, "source": "USD",
+                                  "quotes": {"USDEUR": 0.5, "USDUAH": 40.0, "USDGBP": 0.25}}
+    transport = HttpTransport(retries=0)
+    helper = CurrencyHelper(transport=transport, rate_ttl=60, background_refresh=False, history_dir="")
+
+    assert helper.convert("EUR", "UAH", 3)["result"] == 240.0
+    assert helper.convert("GBP", "EUR", 1)["result"] == 2.0
+    result = helper.convert_many(["USD", "UAH", "XXX"], ["EUR", "GBP", "USD"], [10, 160, 1])
+    assert list(result[:2]) == [5.0, 1.0] and result[2] != result[2]
+    assert helper.cache_stats()["upstream_calls"] == 1
+    transport.close()
+
+
+def test_background_refresher_serves_stale_snapshot_without_blocking(stub_server, monkeypatch):
+    monkeypatch.setenv("CURRENCY_API_URL", stub_server.url)
+    monkeypatch.setenv("CURRENCY_API_KEY", "key")
+    stub_server.routes["live"] = {"success": True, "source": "USD", "quotes": {"USDEUR": 0.5}}
+    transport = HttpTransport(retries=0)
+    helper = CurrencyHelper(transport=transport, rate_ttl=60, background_refresh=False, history_dir="")
+    helper.refresher = CurrencyRefresher(helper, rates_interval=0, base_backoff=3600)
+    helper.refresher.start()
+    deadline = time.monotonic() + 5
+    while helper.rate_matrix.snapshot is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert helper.rate_matrix.snapshot is not None
+
+    # Снимок устарел, а API упал: ответ приходит сразу из старого снимка,
+    # фоновая попытка обновления уходит в паузу
+    helper.rate_ttl = 0
+    stub_server.routes["live"] = {"success": False}
+    assert helper.convert("EUR", "USD", 1)["result"] == 2.0
+    deadline = time.monotonic() + 5
+    while helper.refresher.rates.failures == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert helper.refresher.rates.failures == 1
+
+    # Во время паузы повторные запросы пользователей не долбят упавший API
+    helper.convert("EUR", "USD", 1)
+    time.sleep(0.1)
+    live_calls = [r for r in stub_server.requests if r[1].endswith("/live")]
+    assert len(live_calls) == 2
+    helper.refresher.stop()
+    transport.close()
+
+
+def test_refresher_respects_interval_and_idles_without_demand(stub_server, monkeypatch):
+    monkeypatch.setenv("CURRENCY_API_URL", stub_server.url)
+    monkeypatch.setenv("CURRENCY_API_KEY", "key")
+    monkeypatch.setenv("CURRENCY_REFRESH_INTERVAL", "3600")
+    stub_server.routes["live"] = {"success": True, "source": "USD", "quotes": {"USDEUR": 0.5}}
+    transport = HttpTransport(retries=0)
+    helper = CurrencyHelper(transport=transport, rate_ttl=0, background_refresh=True, history_dir="")
+    # Конструктор поток не запускает
+    assert helper.refresher is None
+    helper.start_background_refresh()
+    deadline = time.monotonic() + 5
+    while helper.rate_matrix.snapshot is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # Устаревший снимок отдаётся сразу, но повторный `live` не раньше интервала
+    for _ in range(5):
+        assert helper.convert("EUR", "USD", 1)["result"] == 2.0
+    time.sleep(0.1)
+    assert len([r for r in stub_server.requests if r[1].endswith("/live")]) == 1
+    assert helper.refresher.rates.next_run >= helper.refresher.rates.last_success + 3600
+
+    # Без запросов за интервал плановое обновление не выполняется
+    helper.refresher._rates_wanted = False
+    helper.refresher.rates.next_run = 0.0
+    helper.refresher._wake.set()
+    deadline = time.monotonic() + 5
+    while helper.refresher.rates.next_run != float("inf") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert helper.refresher.rates.next_run == float("inf")
+    assert len([r for r in stub_server.requests if r[1].endswith("/live")]) == 1
+    helper.stop_background_refresh()
+    transport.close()
@@ -0,0 +1,48 @@
+from bot.helper.rate_history import RateHistory, parse_period
+from bot.helper.rate_matrix import RateSnapshot
+
+
+def test_appends_and_vectorized_stats_survive_reopen(tmp_path):
+    history = RateHistory(str(tmp_path))
+    for minute, uah in enumerate([40.0, 41.0, 42.0, 44.0]):
+        snapshot = RateSnapshot("USD", {"UAH": uah, "EUR": 0.5})
+        assert history.append(snapshot, timestamp=1_000_000 + minute * 60)
+    # Повторные котировки с тем же временем не пишутся
+    assert not history.append(RateSnapshot("USD", {"UAH": 1.0}), timestamp=1_000_000 + 180)
+
+    reopened = RateHistory(str(tmp_path))
+    assert len(reopened) == 4
+    now = 1_000_000 + 180
+    stats = reopened.stats("EUR", "UAH", parse_period("2m"), moving_window=2, now=now)
+    assert stats["points"] == 3
+    assert (stats["min"], stats["max"], stats["last"]) == (82.0, 88.0, 88.0)
+    assert stats["moving_average"] == 86.0
+    assert reopened.sample("USD", "UAH", parse_period("1d"), points=2, now=now) == [
+        (1_000_000, 40.0), (1_000_180, 44.0)]
+    assert reopened.stats("XXX", "UAH", 3600, now=now) is None
+
+
+def test_truncated_tail_is_dropped_on_open(tmp_path):
+    history = RateHistory(str(tmp_path))
+    history.append(RateSnapshot("USD", {"UAH": 40.0}), timestamp=100)
+    with open(tmp_path / "rates.f4", "ab") as f:
+        f.write(b"\x00\x00")
+
+    assert len(RateHistory(str(tmp_path))) == 1
+
+
+def test_empty_columns_mean_no_history_and_new_currencies_are_logged(tmp_path, caplog):
+    (tmp_path / "columns.json").write_text('{"columns": []}', encoding="utf-8")
+    (tmp_path / "rates.f4").write_bytes(b"\x00" * 8)
+    history = RateHistory(str(tmp_path))
+    assert len(history) == 0
+
+    assert history.append(RateSnapshot("USD", {"UAH": 40.0}), timestamp=100)
+    assert history.append(RateSnapshot("USD", {"UAH": 41.0, "EUR": 0.5}), timestamp=160)
+    assert history.append(RateSnapshot("USD", {"UAH": 42.0, "EUR": 0.5}), timestamp=220)
+    assert [r.getMessage() for r in caplog.records if "EUR" in r.getMessage()] == [
+        "История курсов: валют EUR нет в колонках истории, их курсы не сохраняются."]
+
+    reopened = RateHistory(str(tmp_path))
+    assert len(reopened) == 3
+    assert list(reopened.series("USD", "UAH")[1]) == [40.0, 41.0, 42.0]
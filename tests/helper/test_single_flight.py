@@ -0,0 +1,57 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from bot.helper.single_flight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    joined = []
+    all_joined = threading.Event()
+
+    def on_deduplicated(key):
+        joined.append(key)
+        if len(joined) == 7:
+            all_joined.set()
+
+    flight = SingleFlight(on_deduplicated=on_deduplicated)
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"result": 40.0}
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, ("convert", ("USD", "UAH")), fetch) for _ in range(8)]
+        assert all_joined.wait(5)
+        release.set()
+        results = [f.result(timeout=5) for f in futures]
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {"calls": 1, "deduplicated": 7, "in_flight": 0}
+
+
+def test_concurrent_threads_share_one_error():
+    release = threading.Event()
+    flight = SingleFlight(on_deduplicated=lambda key: release.set())
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            flight.do("live", fetch)
+        except RuntimeError as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        results = [f.result(timeout=10) for f in [pool.submit(call) for _ in range(2)]]
+
+    assert len(calls) == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.stats()["deduplicated"] == 1
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from bot.async_core import AsyncTelegramBot
+from bot.base import AsyncBotCommand
+from bot.config import config
+from bot.core import TelegramBot
+from bot.factories import CommandFactory
+from bot.transport import HttpTransport
+
+
+class SlowCommand(AsyncBotCommand):
+    async def execute(self, text, chat_id, user_id, **kwargs):
+        await asyncio.sleep(0.3)
+        return f"done {chat_id}"
+
+
+def make_update(update_id, text, chat_id, user_id=99):
+    return {"update_id": update_id,
+            "message": {"text": text, "chat": {"id": chat_id}, "from": {"id": user_id}}}
+
+
+def test_async_bot_handles_updates_concurrently(stub_server, monkeypatch):
+    monkeypatch.setitem(CommandFactory.command_map, "/slow", SlowCommand)
+    monkeypatch.setattr(config, "POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(config, "SEND_CHAT_RATE", 100)
+    batches = [[make_update(i, "/slow", chat_id=i) for i in range(1, 6)],
+               [make_update(6, "/shutdown", chat_id=1, user_id=1)]]
+    stub_server.routes["getUpdates"] = lambda query, body: {
+        "ok": True, "result": batches.pop(0) if batches else []}
+
+    TelegramBot._instance = None
+    transport = HttpTransport(retries=0)
+    bot = TelegramBot("TOKEN", transport=transport, api_url=stub_server.url + "/bot")
+    engine = AsyncTelegramBot(bot, max_concurrency=10, executor_workers=4)
+
+    started = time.monotonic()
+    asyncio.run(engine.run())
+    elapsed = time.monotonic() - started
+
+    # Перед первым getUpdates снимается webhook (иначе Telegram отвечает 409)
+    assert [path.rsplit("/", 1)[-1] for _, path, _, _ in stub_server.requests[:2]] == ["deleteWebhook", "getUpdates"]
+    replies = sorted(body["text"] for _, path, _, body in stub_server.requests if path.endswith("sendMessage"))
+    assert replies == ["done 1", "done 2", "done 3", "done 4", "done 5", "Бот вимикається…"]
+    # Пять команд по 0.3 с выполнялись параллельно, а не последовательно
+    assert elapsed < 1.2
+    CommandFactory.command_instances.pop("/slow", None)
+    transport.close()
+    TelegramBot._instance = None
+
+
+def test_async_engine_runs_pipeline_before_factory_like_sync_engine(monkeypatch):
+    import threading
+    created_in = []
+
+    class Probe(AsyncBotCommand):
+        def __init__(self):
+            created_in.append(threading.current_thread().name)
+
+        async def execute(self, text, chat_id, user_id, **kwargs):
+            return "probe"
+
+    monkeypatch.setitem(CommandFactory.command_map, "/probe", Probe)
+    TelegramBot._instance = None
+    bot = TelegramBot("TOKEN")
+    engine = AsyncTelegramBot(bot, executor_workers=1)
+
+    async def replies():
+        return [await engine.handle_message(text, 10, 1) for text in ("/probe badword", "/nosuch", "/probe")]
+
+    try:
+        # Цензура срабатывает до фабрики: заблокированная команда даже не создаётся
+        assert asyncio.run(replies()) == [bot.handle_message("/probe badword", 10, 1),
+                                          TelegramBot.UNKNOWN_COMMAND_REPLY, "probe"]
+        # Первое создание команды (импорт и конструктор) — в пуле потоков, не в event loop
+        assert len(created_in) == 1 and created_in[0].startswith("bot-exec")
+    finally:
+        engine.executor.shutdown(wait=True)
+        CommandFactory.command_instances.pop("/probe", None)
+        TelegramBot._instance = None
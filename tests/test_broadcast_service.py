@@ -0,0 +1,46 @@
+from concurrent.futures import Future
+
+import pytest
+
+from bot.outbound import TelegramAPIError
+from bot.services.broadcast_service import BroadcastService
+from bot.services.user_service import UserService
+
+
+class FakeBot:
+    def __init__(self, blocked=()):
+        self.blocked = set(blocked)
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        future = Future()
+        if chat_id in self.blocked:
+            future.set_exception(TelegramAPIError(403, "Forbidden: bot was blocked by the user"))
+        else:
+            self.sent.append(chat_id)
+            future.set_result({})
+        return future
+
+
+def test_broadcast_resumes_and_marks_blocked_users(tmp_path):
+    users = UserService(str(tmp_path / "users.db"))
+    for user_id in range(1, 11):
+        users.add_user(user_id, f"user{user_id}")
+    bot = FakeBot(blocked={4})
+    engine = BroadcastService(bot, users, checkpoint_dir=str(tmp_path / "cp"), chunk_size=3)
+
+    def interrupt(progress):
+        if progress.last_user_id == 6:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        engine.broadcast("news", "hello", on_progress=interrupt)
+    assert bot.sent == [1, 2, 3, 5, 6]
+
+    progress = engine.broadcast("news", "hello")
+    assert bot.sent == [1, 2, 3, 5, 6, 7, 8, 9, 10]
+    assert (progress.sent, progress.failures, progress.done) == (9, {"blocked": 1}, True)
+    assert users.count_user_ids() == 9
+    # После завершения контрольная точка удаляется: тот же id — новая рассылка
+    assert not (tmp_path / "cp" / "news.json").exists()
+    assert engine.broadcast("news", "hello").sent == 9
@@ -0,0 +1,26 @@
+from bot.censorship import CensorshipFilter
+from bot.handlers import CensorshipHandler
+from bot.message import ParsedMessage
+
+
+def test_filter_catches_obfuscated_terms(tmp_path):
+    (tmp_path / "en.txt").write_text("# comment\nbadword\n=ass\n", encoding="utf-8")
+    (tmp_path / "ru.txt").write_text("дурак\n", encoding="utf-8")
+    censor = CensorshipFilter(str(tmp_path))
+
+    for text in ["BadWord!", "b.a.d-w_o*r*d", "b a d w o r d", "bаdwоrd", "b4dw0rd", "you ДУРАК", "ДypaK", "my @ss"]:
+        assert censor.find(text) is not None, text
+    for text in ["hello", "first class", "bad word choice"]:
+        assert censor.find(text) is None, text
+
+
+def test_hot_reload_swaps_automaton(tmp_path):
+    wordlist = tmp_path / "list.txt"
+    wordlist.write_text("spam\n", encoding="utf-8")
+    handler = CensorshipHandler(CensorshipFilter(str(tmp_path)))
+    assert handler.process(ParsedMessage.parse("buy eggs"), 1, 2) is None
+
+    wordlist.write_text("spam\neggs\n", encoding="utf-8")
+    assert handler.censor.reload()
+    assert handler.process(ParsedMessage.parse("buy eggs"), 1, 2) == "Message blocked due to bad language!"
+    assert not handler.censor.reload()
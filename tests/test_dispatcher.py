@@ -0,0 +1,52 @@
+import threading
+import time
+
+from bot.dispatcher import ChatDispatcher
+from bot.metrics import MetricsRegistry
+
+
+def make_update(update_id, chat_id):
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "text": "/x"}}
+
+
+def test_dispatcher_keeps_order_within_chat():
+    seen = {}
+    lock = threading.Lock()
+
+    def handler(update):
+        # Случайная задержка не должна нарушать порядок внутри чата
+        time.sleep(0.001 * (update["update_id"] % 3))
+        with lock:
+            seen.setdefault(update["message"]["chat"]["id"], []).append(update["update_id"])
+
+    dispatcher = ChatDispatcher(handler, workers=4, queue_size=10)
+    for update_id in range(60):
+        dispatcher.submit(make_update(update_id, chat_id=update_id % 6))
+    dispatcher.join()
+    stats = dispatcher.stats()
+    dispatcher.shutdown()
+
+    for chat_id, ids in seen.items():
+        assert ids == sorted(ids)
+    assert sum(shard["processed"] for shard in stats) == 60
+    assert all(shard["depth"] == 0 for shard in stats)
+
+
+def test_dispatcher_exports_queue_depth_per_shard():
+    release = threading.Event()
+    metrics = MetricsRegistry()
+    dispatcher = ChatDispatcher(lambda update: release.wait(5), workers=2, queue_size=10, metrics=metrics)
+    shard = dispatcher.shard_for(7)
+    for update_id in range(4):
+        dispatcher.submit(make_update(update_id, chat_id=7))
+    # Первое обновление уже у воркера, остальные ждут в очереди
+    deadline = time.monotonic() + 5
+    while dispatcher.stats()[shard]["depth"] != 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert f'bot_dispatch_queue_depth{{shard="{shard}"}} 3' in metrics.render_prometheus()
+    assert f"  {shard}: 3" in metrics.summary()
+    release.set()
+    dispatcher.join()
+    assert f'bot_dispatch_queue_depth{{shard="{shard}"}} 0' in metrics.render_prometheus()
+    dispatcher.shutdown()
@@ -0,0 +1,51 @@
+import threading
+
+from bot.core import TelegramBot
+from bot.transport import HttpTransport
+from loadtest.fake_telegram import FakeBotAPI
+from loadtest.generator import LoadGenerator, ReplyTracker
+
+
+def test_fake_bot_api_offsets_and_429_injection():
+    api = FakeBotAPI(error_rate=1.0, retry_after=3).start()
+    transport = HttpTransport(retries=0)
+    url = api.api_url + "TOKEN/"
+    try:
+        for text in ("a", "b", "c"):
+            api.push_update(10, 20, text)
+        first = transport.get(url + "getUpdates", params={"limit": 2, "timeout": 0}).json()["result"]
+        assert [update["message"]["text"] for update in first] == ["a", "b"]
+        # offset подтверждает всё, что меньше него
+        rest = transport.get(url + "getUpdates", params={"offset": first[-1]["update_id"] + 1}).json()["result"]
+        assert [update["message"]["text"] for update in rest] == ["c"]
+        assert api.pending == 1
+
+        data = transport.post(url + "sendMessage", json={"chat_id": 10, "text": "hi"}).json()
+        assert data["error_code"] == 429 and data["parameters"]["retry_after"] == 3
+        assert api.stats["injected_429"] == 1 and api.stats["sendMessage"] == 0
+    finally:
+        api.stop()
+        transport.close()
+
+
+def test_load_generator_correlates_replies_end_to_end():
+    tracker = ReplyTracker()
+    api = FakeBotAPI(on_send=tracker.on_send).start()
+    transport = HttpTransport(retries=0)
+    TelegramBot._instance = None
+    bot = TelegramBot("TOKEN", transport=transport, api_url=api.api_url)
+    thread = threading.Thread(target=bot.run, daemon=True)
+    thread.start()
+    try:
+        generator = LoadGenerator(api, tracker, rate=40, duration=0.5, chats=20, users=5, mix=[("/help", 1)])
+        generator.run()
+        generator.wait_for_replies(timeout=10)
+        report = generator.report()
+    finally:
+        bot.stop()
+        api.stop()
+        thread.join(timeout=10)
+        transport.close()
+
+    assert report["sent"] == 20 and report["replied"] == 20 and report["lost"] == 0
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"] <= report["latency_ms"]["max"]
@@ -0,0 +1,23 @@
+import json
+import logging
+
+from bot.logger import JsonFormatter, SamplingFilter
+
+
+def make_record(name, level=logging.INFO, msg="hello %s", args=("world",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_sampling_keeps_share_of_low_level_records_per_logger():
+    sampling = SamplingFilter({"bot.requests": 0.25})
+    kept = [sampling.filter(make_record("bot.requests")) for _ in range(8)]
+    assert kept == [True, False, False, False, True, False, False, False]
+    assert sampling.filter(make_record("bot.requests", level=logging.WARNING))
+    assert all(sampling.filter(make_record("bot.core")) for _ in range(3))
+    assert sampling.dropped == {"bot.requests": 6}
+
+
+def test_json_formatter_emits_one_object_per_line():
+    line = JsonFormatter().format(make_record("bot.requests"))
+    data = json.loads(line)
+    assert (data["level"], data["logger"], data["message"]) == ("INFO", "bot.requests", "hello world")
@@ -0,0 +1,39 @@
+from bot.base import BotCommand
+from bot.core import TelegramBot
+from bot.factories import CommandFactory
+from bot.message import ParsedMessage
+from bot.transport import HttpTransport
+
+
+class LegacyCommand(BotCommand):
+    def execute(self, text, chat_id, user_id):
+        return f"legacy {text}"
+
+
+class EchoArgsCommand(BotCommand):
+    def execute(self, text, chat_id, user_id, **kwargs):
+        message = kwargs["message"]
+        return f"{message.command} {'|'.join(message.args)} @{message.mention}"
+
+
+def test_parse_command_args_and_mention():
+    message = ParsedMessage.parse("  /currency1@MyBot 10 usd\nto EUR ")
+    assert (message.command, message.args, message.mention) == ("/currency1", ("10", "usd", "to", "EUR"), "MyBot")
+    assert message.arg_text == "10 usd\nto EUR"
+    assert message.is_command and not ParsedMessage.parse("hello").is_command
+    assert ParsedMessage.parse("").command == ""
+
+
+def test_message_is_threaded_to_commands_and_legacy_commands_still_work(monkeypatch):
+    monkeypatch.setitem(CommandFactory.command_map, "/legacy", LegacyCommand)
+    monkeypatch.setitem(CommandFactory.command_map, "/echo", EchoArgsCommand)
+    TelegramBot._instance = None
+    transport = HttpTransport(retries=0)
+    bot = TelegramBot("TOKEN", transport=transport, api_url="http://127.0.0.1:9/bot")
+    try:
+        assert bot.handle_message("/legacy a b", 1, 2) == "legacy /legacy a b"
+        assert bot.handle_message("/echo@TestBot x y", 1, 2) == "/echo x|y @TestBot"
+    finally:
+        for name in ("/legacy", "/echo"):
+            CommandFactory.command_instances.pop(name, None)
+        transport.close()
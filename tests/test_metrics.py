@@ -0,0 +1,41 @@
+import urllib.request
+
+from bot.metrics import Histogram, MetricsRegistry, MetricsServer
+
+
+def test_histogram_percentiles_follow_buckets():
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for _ in range(90):
+        histogram.observe(0.005)
+    for _ in range(10):
+        histogram.observe(0.5)
+
+    assert histogram.count == 100
+    assert 0 < histogram.percentile(0.5) <= 0.01
+    assert 0.1 < histogram.percentile(0.99) <= 0.5
+    assert histogram.max == 0.5
+
+
+def test_prometheus_rendering_and_endpoint():
+    metrics = MetricsRegistry()
+    seconds = metrics.histogram("bot_test_seconds", "Тест", "command", buckets=(0.1, 1.0))
+    seconds.labels("/help").observe(0.05)
+    seconds.labels("/help").observe(2.0)
+    metrics.counter("bot_test_total", "Тест", "command").labels("/help").inc(3)
+
+    text = metrics.render_prometheus()
+    assert "# TYPE bot_test_seconds histogram" in text
+    assert 'bot_test_seconds_bucket{command="/help",le="0.1"} 1' in text
+    assert 'bot_test_seconds_bucket{command="/help",le="+Inf"} 2' in text
+    assert 'bot_test_seconds_count{command="/help"} 2' in text
+    assert 'bot_test_total{command="/help"} 3' in text
+    assert "/help: n=2" in metrics.summary()
+
+    server = MetricsServer(port=0, metrics=metrics)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            assert response.status == 200
+            assert response.read().decode("utf-8") == metrics.render_prometheus()
+    finally:
+        server.stop()
@@ -0,0 +1,44 @@
+import asyncio
+
+from bot.message import ParsedMessage
+from bot.metrics import MetricsRegistry
+from bot.middleware import Middleware, MiddlewarePipeline
+
+
+class Recorder(Middleware):
+    def __init__(self, calls, reply=None, commands=None):
+        self.calls = calls
+        self.reply = reply
+        self.commands = frozenset(commands) if commands else None
+
+    def process(self, message, chat_id, user_id):
+        self.calls.append(message.command)
+        return self.reply
+
+
+class AsyncGate(Middleware):
+    commands = frozenset({"/admin"})
+
+    async def process(self, message, chat_id, user_id):
+        await asyncio.sleep(0)
+        return "denied" if user_id != 1 else None
+
+
+def test_stages_are_filtered_by_command_and_short_circuit():
+    first, second = [], []
+    metrics = MetricsRegistry()
+    pipeline = MiddlewarePipeline([Recorder(first), Recorder(second, reply="stop", commands={"/ban"}), AsyncGate()],
+                                  metrics=metrics)
+
+    assert pipeline.run(ParsedMessage.parse("/help"), 10, 2) is None
+    assert pipeline.run(ParsedMessage.parse("/ban 5"), 10, 2) == "stop"
+    assert pipeline.run(ParsedMessage.parse("/admin"), 10, 2) == "denied"
+    assert asyncio.run(pipeline.run_async(ParsedMessage.parse("/admin"), 10, 1)) is None
+    assert first == ["/help", "/ban", "/admin", "/admin"]
+    assert second == ["/ban"]
+
+    # Два экземпляра Recorder учитываются раздельно
+    stats = pipeline.stats()
+    assert {label: (stage["calls"], stage["stopped"]) for label, stage in stats.items()} == {
+        "0:Recorder": (4, 0), "1:Recorder": (1, 1), "2:AsyncGate": (2, 1)}
+    assert 'bot_pipeline_stage_seconds_count{stage="1:Recorder"} 1' in metrics.render_prometheus()
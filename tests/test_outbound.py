@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+
+from bot.outbound import OutboundQueue, TelegramAPIError
+
+
+def test_queue_honors_retry_after_and_keeps_chat_order():
+    sent = []
+    lock = threading.Lock()
+    throttled = {"done": False}
+
+    def send(chat_id, text):
+        with lock:
+            if text == "b" and not throttled["done"]:
+                throttled["done"] = True
+                raise TelegramAPIError(429, "Too Many Requests", retry_after=0.2)
+            sent.append((chat_id, text, time.monotonic()))
+        return {"message_id": len(sent)}
+
+    queue = OutboundQueue(send, global_rate=100, chat_rate=100, workers=4)
+    started = time.monotonic()
+    futures = [queue.submit(1, text) for text in "abc"]
+    assert [f.result(timeout=5)["message_id"] for f in futures] == [1, 2, 3]
+
+    assert [text for _, text, _ in sent] == ["a", "b", "c"]
+    # После 429 отправка стояла на паузе retry_after секунд
+    assert sent[1][2] - started >= 0.2
+    assert queue.stats()["retried"] == 1
+    queue.close()
+
+
+def test_queue_limits_per_chat_rate():
+    queue = OutboundQueue(lambda chat_id, text: {}, global_rate=100, chat_rate=10, workers=4)
+    started = time.monotonic()
+    for future in [queue.submit(5, str(i)) for i in range(4)]:
+        future.result(timeout=5)
+    # Первое сообщение сразу, остальные три — не чаще 10 в секунду
+    assert time.monotonic() - started >= 0.28
+    queue.close()
+
+
+def test_queue_reports_api_errors():
+    def send(chat_id, text):
+        raise TelegramAPIError(403, "Forbidden: bot was blocked by the user")
+
+    queue = OutboundQueue(send, workers=1)
+    with pytest.raises(TelegramAPIError):
+        queue.submit(7, "hi").result(timeout=5)
+    assert queue.stats()["failed"] == 1
+    queue.close()
+
+
+def test_queue_exports_wait_time_and_depth():
+    from bot.metrics import MetricsRegistry
+    metrics = MetricsRegistry()
+    release = threading.Event()
+    queue = OutboundQueue(lambda chat_id, text: release.wait(5) and {}, global_rate=100, chat_rate=100,
+                          workers=1, metrics=metrics)
+    futures = [queue.submit(1, "a"), queue.submit(1, "b")]
+    deadline = time.monotonic() + 5
+    while 'bot_outbound_queue_depth{state="in_flight"} 1' not in metrics.render_prometheus() \
+            and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert 'bot_outbound_queue_depth{state="pending"} 1' in metrics.render_prometheus()
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    text = metrics.render_prometheus()
+    assert "bot_outbound_wait_seconds_count 2" in text
+    assert 'bot_outbound_queue_depth{state="pending"} 0' in text
+    queue.close()
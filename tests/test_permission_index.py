@@ -0,0 +1,32 @@
+from bot.commands.role import RoleAddStrategy, RoleAddToStrategy, RoleDeleteStrategy, RoleRemoveFromStrategy
+from bot.roles import role_helper
+from bot.roles.permission_index import PermissionIndex
+from bot.roles.users import users_dict
+
+
+def test_multiple_roles_per_user():
+    index = PermissionIndex.from_dicts({"seller": [5], "admin": [5, 6]}, {"/shutdown": ["admin"], "/sell": ["seller"]})
+    assert index.check("/shutdown", 5) is True
+    assert index.check("/sell", "5") is True
+    assert index.check("/sell", 6) == "Access denied: role 'admin' does not have access to '/sell'"
+    assert index.check("/sell", 7) == "Access denied: your role is not assigned"
+    assert index.check("/help", 7) is True
+
+
+def test_role_strategies_keep_index_in_sync(monkeypatch):
+    monkeypatch.setitem(users_dict, "admin", list(users_dict["admin"]))
+    try:
+        RoleAddToStrategy().execute(["/role", "add", "to", "admin", "42"])
+        assert role_helper.check_command_access("/shutdown", 42) is True
+
+        RoleRemoveFromStrategy().execute(["/role", "remove", "from", "admin", "42"])
+        assert role_helper.check_command_access("/shutdown", 42) == "Access denied: your role is not assigned"
+
+        RoleAddStrategy().execute(["/role", "add", "tester"])
+        RoleAddToStrategy().execute(["/role", "add", "to", "tester", "42"])
+        RoleAddToStrategy().execute(["/role", "add", "to", "admin", "42"])
+        RoleDeleteStrategy().execute(["/role", "admin", "delete"])
+        assert role_helper.permission_index.roles_of(42) == ["tester"]
+    finally:
+        users_dict.pop("tester", None)
+        role_helper.permission_index.rebuild(users_dict, role_helper.commands_dict)
@@ -0,0 +1,63 @@
+from bot.polling import UpdatePoller
+from bot.core import TelegramBot
+
+
+def make_update(update_id, text="/unknown", chat_id=10, user_id=99):
+    return {"update_id": update_id,
+            "message": {"text": text, "chat": {"id": chat_id}, "from": {"id": user_id}}}
+
+
+def test_poller_passes_offset_and_drains_backlog():
+    calls = []
+    batches = [[make_update(1), make_update(2)], [make_update(3)], []]
+
+    def fetch(offset, limit, timeout):
+        calls.append((offset, limit, timeout))
+        return batches.pop(0)
+
+    poller = UpdatePoller(fetch, timeout=25, batch_size=2, sleep=lambda s: None)
+    for update in poller.poll():
+        poller.acknowledge(update["update_id"])
+    for update in poller.poll():
+        poller.acknowledge(update["update_id"])
+    poller.poll()
+
+    # Первый запрос без offset, второй — сразу (батч был полным), третий — long-polling
+    assert calls == [(None, 2, 25), (3, 2, 0), (4, 2, 25)]
+
+
+def test_run_processes_every_update_in_batch(monkeypatch):
+    TelegramBot._instance = None
+    bot = TelegramBot("token")
+    sent = []
+    batches = [[make_update(1, chat_id=1), make_update(2, chat_id=2), {"update_id": 3}],
+               [make_update(4, "/shutdown", chat_id=1, user_id=1)]]
+
+    monkeypatch.setattr(bot, "get_updates", lambda offset, limit, timeout: batches.pop(0) if batches else [])
+    monkeypatch.setattr(bot, "send_message", lambda chat_id, text: sent.append((chat_id, text)))
+    monkeypatch.setattr(bot, "delete_webhook", lambda: None)
+    bot.run()
+
+    assert [chat_id for chat_id, _ in sent] == [1, 2, 1]
+    assert bot.last_update_id == 4
+    TelegramBot._instance = None
+
+
+def test_run_deletes_webhook_before_first_poll(stub_server):
+    from bot.transport import HttpTransport
+    TelegramBot._instance = None
+    transport = HttpTransport(retries=0)
+    bot = TelegramBot("TOKEN", transport=transport, api_url=stub_server.url + "/bot")
+
+    def get_updates(query, body):
+        bot.stop()
+        return {"ok": True, "result": []}
+
+    stub_server.routes["getUpdates"] = get_updates
+    try:
+        bot.run()
+    finally:
+        transport.close()
+        TelegramBot._instance = None
+
+    assert [path.rsplit("/", 1)[-1] for _, path, _, _ in stub_server.requests] == ["deleteWebhook", "getUpdates"]
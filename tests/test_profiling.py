@@ -0,0 +1,75 @@
+import os
+import time
+
+from bot.base import BotCommand
+from bot.core import TelegramBot
+from bot.factories import CommandFactory
+from bot.profiling import MessageProfiler, profiler as shared_profiler
+from bot.transport import HttpTransport
+
+
+class SlowCommand(BotCommand):
+    def execute(self, text, chat_id, user_id, **kwargs):
+        return str(sum(i * i for i in range(20000)))
+
+
+def test_profiles_next_n_messages_and_restores_handler(monkeypatch, tmp_path):
+    monkeypatch.setitem(CommandFactory.command_map, "/slow", SlowCommand)
+    TelegramBot._instance = None
+    transport = HttpTransport(retries=0)
+    bot = TelegramBot("TOKEN", transport=transport, api_url="http://127.0.0.1:9/bot")
+    original = TelegramBot.__dict__["handle_message"]
+    profiler = MessageProfiler(str(tmp_path), top=5)
+    try:
+        profiler.start(messages=2)
+        assert TelegramBot.__dict__["handle_message"] is not original
+        for _ in range(3):
+            bot.handle_message("/slow", 1, 2)
+
+        # После N сообщений обёртка снята, профиль сохранён, отчёт доступен через stop()
+        assert TelegramBot.__dict__["handle_message"] is original
+        assert profiler.profiled == 2
+        report = profiler.stop()
+        assert "handle_message" in report
+        assert [name for name in os.listdir(tmp_path) if name.endswith(".prof")]
+    finally:
+        profiler.stop()
+        CommandFactory.command_instances.pop("/slow", None)
+        transport.close()
+
+
+def test_dev_profile_stop_from_a_profiled_message_returns_report(monkeypatch, tmp_path):
+    TelegramBot._instance = None
+    transport = HttpTransport(retries=0)
+    bot = TelegramBot("TOKEN", transport=transport, api_url="http://127.0.0.1:9/bot")
+    monkeypatch.setattr(CommandFactory.create_command("/dev").strategy, "admin_ids", [1])
+    monkeypatch.setattr(shared_profiler, "directory", str(tmp_path))
+    original = TelegramBot.__dict__["handle_message"]
+    try:
+        # Без положительного лимита профилирование не закончилось бы само — такие значения отклоняются
+        for value in ("0", "0s", "-3", "abc", "inf"):
+            assert bot.handle_message(f"/dev profile start {value}", 1, 1).startswith("Использование")
+        assert bot.handle_message("/dev profile sample 0s", 1, 1).startswith("Использование")
+        assert not shared_profiler.active
+        assert "включено" in bot.handle_message("/dev profile start 5", 1, 1)
+        bot.handle_message("/help", 1, 1)
+        # Сообщение со stop само проходит через обёртку профилировщика и не должно зависнуть
+        report = bot.handle_message("/dev profile stop", 1, 1)
+        assert "handle_message" in report
+        assert TelegramBot.__dict__["handle_message"] is original
+        assert not shared_profiler.active
+    finally:
+        shared_profiler.stop()
+        transport.close()
+
+
+def test_sampling_mode_writes_collapsed_stacks(tmp_path):
+    profiler = MessageProfiler(str(tmp_path), top=5)
+    profiler.sample(seconds=5, interval=0.001)
+    time.sleep(0.05)
+    report = profiler.stop()
+
+    assert not profiler.active
+    assert report.startswith("Выборок:")
+    collapsed = [name for name in os.listdir(tmp_path) if name.endswith(".collapsed")]
+    assert collapsed and (tmp_path / collapsed[0]).read_text(encoding="utf-8")
@@ -0,0 +1,43 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from bot.factories import CommandFactory
+from bot.registry import CommandRegistry, CommandSpec, build_manifest
+
+
+def test_factory_import_does_not_load_command_modules():
+    code = ("import sys, bot.factories; "
+            "print(any(m.startswith('bot.commands.command_') for m in sys.modules), 'numpy' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).parent.parent, env={"ADMIN_ID": "1"})
+    assert result.stdout.split() == ["False", "False"]
+
+
+def test_core_import_keeps_heavy_modules_out():
+    # Эти модули нужны только отдельным командам, режимам или движкам и не должны попадать в холодный старт
+    heavy = ["numpy", "asyncio", "sqlite3", "cProfile", "http.server", "bot.async_core", "bot.webhook",
+             "bot.profiling", "bot.helper.currency_helper", "bot.services.user_service"]
+    code = f"import sys, bot.core; print([m for m in {heavy!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).parent.parent, env={"ADMIN_ID": "1"})
+    assert result.stdout.strip() == "[]"
+
+
+def test_registry_imports_command_on_first_use(tmp_path):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(json.dumps({"commands": {
+        "/help": {"module": "bot.commands.help_menu", "class": "HelpMenuCommand", "doc": "Справка"}}}))
+    registry = CommandRegistry(manifest)
+    assert "/help" in registry and not registry.is_loaded("/help")
+    assert registry.get_class("/help").__name__ == "HelpMenuCommand"
+    assert registry.is_loaded("/help")
+    assert registry.get_class("/missing") is None
+
+
+def test_manifest_matches_command_classes(tmp_path):
+    specs = build_manifest(CommandFactory.registry.specs.values(), tmp_path / "manifest.json")
+    assert {name: spec.to_dict() for name, spec in specs.items()} == \
+        {name: spec.to_dict() for name, spec in CommandFactory.registry.specs.items()}
+    assert CommandSpec("/x", "m", "C").to_dict()["roles"] == []
@@ -0,0 +1,33 @@
+from bot.core import TelegramBot
+from bot.services.currency_service import CurrencyService
+from bot.transport import HttpTransport
+
+
+def test_requests_reuse_keep_alive_connection(stub_server):
+    transport = HttpTransport(pool_size=2, retries=0)
+    stub_server.routes["latest"] = {"rates": {"EUR": 0.9}}
+    service = CurrencyService(stub_server.url + "/latest", transport=transport)
+
+    for _ in range(5):
+        assert service.get_exchange_rate("USD", "EUR") == 0.9
+
+    assert len(stub_server.requests) == 5
+    # Все запросы прошли через одно keep-alive соединение
+    assert len(stub_server.connections) == 1
+    transport.close()
+
+
+def test_telegram_bot_uses_injected_transport(stub_server):
+    TelegramBot._instance = None
+    transport = HttpTransport(retries=0)
+    stub_server.routes["getUpdates"] = {"ok": True, "result": [{"update_id": 7}]}
+    bot = TelegramBot("TOKEN", transport=transport, api_url=stub_server.url + "/bot")
+
+    assert bot.get_updates(offset=5, limit=10, timeout=0) == [{"update_id": 7}]
+    bot.send_message(42, "hi").result(timeout=5)
+
+    (method, path, query, _), (post_method, post_path, _, body) = stub_server.requests
+    assert (method, path, query["offset"]) == ("GET", "/botTOKEN/getUpdates", ["5"])
+    assert (post_method, post_path, body) == ("POST", "/botTOKEN/sendMessage", {"chat_id": 42, "text": "hi"})
+    transport.close()
+    TelegramBot._instance = None
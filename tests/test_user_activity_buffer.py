@@ -0,0 +1,50 @@
+import time
+
+from bot.metrics import MetricsRegistry
+from bot.services.user_activity_buffer import UserActivityBuffer
+from bot.services.user_service import UserService
+
+
+def test_buffer_coalesces_and_flushes_on_close(tmp_path):
+    users = UserService(str(tmp_path / "users.db"))
+    buffer = UserActivityBuffer(users, max_batch=1000, flush_interval=60)
+    for i in range(300):
+        buffer.record(i % 3, f"name{i}", seen_at=1000 + i)
+    # Ни порог размера, ни таймер не сработали — база ещё пуста
+    assert users.count_user_ids() == 0
+
+    buffer.close()
+    stats = buffer.stats()
+    assert (stats["flushed"], stats["coalesced"], stats["flush_count"]) == (3, 297, 1)
+    assert users.get_user(2) == "name299"
+
+
+def test_buffer_flushes_on_size_threshold(tmp_path):
+    users = UserService(str(tmp_path / "users.db"))
+    buffer = UserActivityBuffer(users, max_batch=10, flush_interval=60)
+    for user_id in range(10):
+        buffer.record(user_id, "u")
+    deadline = time.monotonic() + 5
+    while buffer.stats()["flushed"] < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert users.count_user_ids() == 10
+    buffer.close()
+
+
+def test_buffer_flush_soon_and_metrics(tmp_path):
+    users = UserService(str(tmp_path / "users.db"))
+    metrics = MetricsRegistry()
+    buffer = UserActivityBuffer(users, max_batch=1000, flush_interval=60, metrics=metrics)
+    buffer.record(1, "Ann")
+    buffer.record(2, "Bob")
+    assert 'bot_activity_buffer{stat="pending"} 2' in metrics.render_prometheus()
+
+    buffer.flush_soon()
+    deadline = time.monotonic() + 5
+    while buffer.stats()["flushed"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert users.count_user_ids() == 2
+    text = metrics.render_prometheus()
+    assert 'bot_activity_buffer{stat="last_batch_size"} 2' in text
+    assert 'bot_activity_buffer{stat="pending"} 0' in text
+    buffer.close()
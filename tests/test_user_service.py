@@ -0,0 +1,90 @@
+import threading
+
+from bot.metrics import MetricsRegistry
+from bot.services.user_service import UserService
+
+
+def test_bulk_add_and_scan_share_per_thread_connections(tmp_path):
+    users = UserService(str(tmp_path / "users.db"))
+    assert users.add_users((user_id, f"user{user_id}") for user_id in range(1000, 0, -1)) == 1000
+    users.add_user(5, "renamed")
+
+    rows = list(users.iter_users(chunk_size=64))
+    assert [user_id for user_id, _ in rows] == list(range(1, 1001))
+    assert rows[4] == (5, "renamed")
+
+    # В другом потоке — своё соединение к той же базе (WAL)
+    names = []
+    thread = threading.Thread(target=lambda: names.append(users.get_user(5)))
+    thread.start()
+    thread.join()
+    assert names == ["renamed"]
+    assert users._get_connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # Соединение завершившегося потока закрывается, когда следующий поток открывает своё
+    thread = threading.Thread(target=lambda: names.append(list(users.iter_user_ids(chunk_size=400))))
+    thread.start()
+    thread.join()
+    assert [len(chunk) for chunk in names[1]] == [400, 400, 200]
+    assert list(users._connections) == [threading.main_thread(), thread]
+    users.close()
+
+
+def test_get_user_cache_with_negative_caching_and_write_through(tmp_path):
+    metrics = MetricsRegistry()
+    users = UserService(str(tmp_path / "users.db"), user_cache_size=2, metrics=metrics)
+    assert users.get_user(1) == "Пользователь не найден"
+    assert users.get_user(1) == "Пользователь не найден"
+    users.add_user(1, "Ann")
+    assert users.get_user(1) == "Ann"
+    users.add_users([(2, "Bob"), (3, "Eve")])
+
+    stats = users.cache_stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 1, 1, 2)
+    text = metrics.render_prometheus()
+    assert 'bot_user_cache{stat="hits"} 2' in text and 'bot_user_cache{stat="evictions"} 1' in text
+    users.close()
+
+
+def test_get_user_miss_does_not_overwrite_newer_write(tmp_path, monkeypatch):
+    users = UserService(str(tmp_path / "users.db"))
+    users.add_user(1, "Ann")
+    users._user_cache.clear()
+    get_connection = users._get_connection
+
+    class RacingCursor:
+        """Писатель обновляет имя между SELECT читателя и заполнением кеша."""
+
+        def __init__(self, cursor):
+            self._cursor = cursor
+
+        def execute(self, *args):
+            self._cursor.execute(*args)
+
+        def fetchone(self):
+            row = self._cursor.fetchone()
+            monkeypatch.setattr(users, "_get_connection", get_connection)
+            users.add_user(1, "Bob")
+            return row
+
+    class RacingConnection:
+        def cursor(self):
+            return RacingCursor(get_connection().cursor())
+
+    monkeypatch.setattr(users, "_get_connection", lambda: RacingConnection())
+    assert users.get_user(1) == "Ann"
+    # Устаревшее "Ann" не попало в кеш поверх записанного "Bob"
+    assert users.get_user(1) == "Bob"
+    users.close()
+
+
+def test_activity_reactivates_user_marked_inactive(tmp_path):
+    users = UserService(str(tmp_path / "users.db"))
+    users.add_users([(1, "Ann"), (2, "Bob")])
+    users.set_active(1, False)
+    assert users.count_user_ids() == 1
+
+    # Пользователь разблокировал бота и написал ему — он снова получает рассылки
+    users.upsert_activity([(1, "Ann", 1_700_000_000.0)])
+    assert users.count_user_ids() == 2
+    users.close()
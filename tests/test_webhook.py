@@ -0,0 +1,69 @@
+import json
+import queue
+
+import pytest
+import requests
+
+from bot.config import config
+from bot.core import TelegramBot
+from bot.webhook import WebhookServer, SECRET_HEADER
+
+
+def test_webhook_accepts_recorded_update_with_secret():
+    received = queue.Queue()
+    server = WebhookServer(lambda update, timeout=None: received.put(update),
+                           host="127.0.0.1", port=0, path="/webhook", secret_token="s3cret")
+    server.start()
+    url = f"http://127.0.0.1:{server.port}/webhook"
+    update = {"update_id": 1, "message": {"text": "/help", "chat": {"id": 5}, "from": {"id": 5}}}
+    try:
+        bad = requests.post(url, data=json.dumps(update), headers={SECRET_HEADER: "wrong"}, timeout=5)
+        good = requests.post(url, data=json.dumps(update), headers={SECRET_HEADER: "s3cret"}, timeout=5)
+    finally:
+        server.stop()
+
+    assert (bad.status_code, good.status_code) == (403, 200)
+    assert received.get_nowait() == update
+    assert received.empty()
+
+
+def test_webhook_returns_503_when_queue_is_full():
+    def submit(update, timeout=None):
+        raise queue.Full
+
+    server = WebhookServer(submit, host="127.0.0.1", port=0, secret_token="s3cret")
+    assert server.accept("/webhook", "s3cret", b'{"update_id": 2}') == 503
+    server.stop()
+
+
+def test_webhook_requires_secret(stub_server, monkeypatch):
+    with pytest.raises(ValueError):
+        WebhookServer(lambda update, timeout=None: None, host="127.0.0.1", port=0)
+
+    from bot.transport import HttpTransport
+    TelegramBot._instance = None
+    transport = HttpTransport(retries=0)
+    bot = TelegramBot("TOKEN", transport=transport, api_url=stub_server.url + "/bot")
+    monkeypatch.setattr(config, "WEBHOOK_SECRET", "")
+    monkeypatch.setattr(config, "WEBHOOK_HOST", "127.0.0.1")
+    monkeypatch.setattr(config, "WEBHOOK_PORT", 0)
+    try:
+        # Без секрета и без WEBHOOK_URL проверять заголовок нечем — режим не стартует
+        monkeypatch.setattr(config, "WEBHOOK_URL", "")
+        with pytest.raises(ValueError):
+            bot.run_webhook()
+
+        # С WEBHOOK_URL секрет генерируется и передаётся в setWebhook
+        def set_webhook(query, body):
+            bot.stop()
+            return {"ok": True, "result": True}
+
+        stub_server.routes["setWebhook"] = set_webhook
+        monkeypatch.setattr(config, "WEBHOOK_URL", "https://example.org/webhook")
+        bot.run_webhook()
+    finally:
+        transport.close()
+        TelegramBot._instance = None
+
+    body = [body for _, path, _, body in stub_server.requests if path.endswith("setWebhook")][0]
+    assert len(body["secret_token"]) >= 32